@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark for position-to-feature queries against an airport layout.
+
+Builds a synthetic hub (a grid of taxiways cut into short segments, four
+runways, parking rows and holding points) and times AirportIndex
+nearest-feature and point-in-area queries at random positions, plus
+searches that find nothing (far outside the airport, or a feature kind
+the layout does not have). For
+comparison it also times the scan a caller would otherwise need: every
+taxiway segment through geo_utils.distance_to_segment. Before timing, it
+checks that the index and a brute-force scan agree on the nearest
+segment.
+
+Usage:
+    python scripts/bench_airport_index.py [taxiway_segments]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from utils.airport_index import AirportIndex, TAXIWAY
+from utils.geo_utils import distance_to_segment
+
+CENTER = (48.35, 11.78)
+DEG_LAT = 1 / 111195.0  # degrees per metre of latitude
+DEG_LON = DEG_LAT / math.cos(math.radians(CENTER[0]))
+QUERIES = 2000
+
+
+def offset(east: float, north: float):
+    return [CENTER[0] + north * DEG_LAT, CENTER[1] + east * DEG_LON]
+
+
+def synthetic_hub(segments: int, seed: int = 7):
+    """Layout dict in the OSMAirportExtractor format with about this many taxiway segments."""
+    rng = random.Random(seed)
+    segment_length = 40.0
+    per_line = int(4000.0 / segment_length)
+    lines = max(2, segments // (2 * per_line))  # one east-west and one north-south taxiway each
+    spacing = 4000.0 / lines
+    taxiways = []
+    for number in range(lines):
+        for direction in ('EW', 'NS'):
+            fixed = -2000.0 + number * spacing
+            parts = []
+            for step in range(per_line):
+                a = -2000.0 + step * segment_length
+                b = a + segment_length
+                start, end = ((offset(a, fixed), offset(b, fixed)) if direction == 'EW'
+                              else (offset(fixed, a), offset(fixed, b)))
+                parts.append({'start': start, 'end': end, 'width': 23.0})
+            taxiways.append({'name': f"{direction}{number}", 'segments': parts})
+    runways = [{'name': f"{8 + i}/{26 + i}", 'threshold1_coords': offset(-1800, -2300 + i * 1500),
+                'threshold2_coords': offset(1800, -2100 + i * 1500), 'width': 60.0, 'length': 3600.0}
+               for i in range(4)]
+    parking = [{'name': f"P{i}", 'coords': offset(rng.uniform(-1900, 1900), rng.uniform(-1900, 1900)),
+                'type': 'Commercial', 'elevation': 0.0, 'heading': 0.0, 'size': 80.0}
+               for i in range(segments // 10)]
+    holding = [{'name': f"H{i}", 'coords': offset(rng.uniform(-1900, 1900), rng.uniform(-1900, 1900)),
+                'associated_with': ''} for i in range(segments // 50)]
+    return {'name': 'Synthetic Hub', 'icao': 'ZZZZ', 'runways': runways, 'taxiways': taxiways,
+            'parking_positions': parking, 'holding_points': holding}
+
+
+def scan_nearest_segment(layout, lat: float, lon: float):
+    best, best_distance = None, float('inf')
+    for taxiway in layout['taxiways']:
+        for segment in taxiway['segments']:
+            distance = distance_to_segment((lat, lon), segment['start'], segment['end'])
+            if distance < best_distance:
+                best, best_distance = segment, distance
+    return best, best_distance
+
+
+def main():
+    segments = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    layout = synthetic_hub(segments)
+    total = sum(len(taxiway['segments']) for taxiway in layout['taxiways'])
+
+    start = time.perf_counter()
+    index = AirportIndex(layout)
+    build = time.perf_counter() - start
+    print(f"{total} taxiway segments, {len(index)} features; index built in {build * 1000:.1f} ms")
+
+    rng = random.Random(1)
+    positions = [offset(rng.uniform(-2000, 2000), rng.uniform(-2000, 2000)) for _ in range(QUERIES)]
+
+    # The index must find the same segment as an exact scan in the same local frame
+    for lat, lon in positions[:200]:
+        x, y = index.to_local(lat, lon)
+        expected = min((feature for feature in index.features if feature.kind == TAXIWAY),
+                       key=lambda feature: feature.distance(x, y))
+        found = index.nearest(lat, lon, TAXIWAY)
+        assert found is not None and found[0].distance(x, y) == expected.distance(x, y), (lat, lon)
+
+    def timed(label, query, count):
+        start = time.perf_counter()
+        for lat, lon in positions[:count]:
+            query(lat, lon)
+        per_query = (time.perf_counter() - start) / count
+        print(f"{label:<34} {per_query * 1e6:9.1f} us/query  ({per_query * 20 * 100:.3f}% of a core at 20 Hz)")
+
+    timed("nearest taxiway segment (index)", lambda lat, lon: index.nearest(lat, lon, TAXIWAY), QUERIES)
+    timed("nearest feature, any kind", lambda lat, lon: index.nearest(lat, lon), QUERIES)
+    timed("containing (all kinds)", lambda lat, lon: index.containing(lat, lon), QUERIES)
+    timed("within 100 m", lambda lat, lon: index.within(lat, lon, 100.0), QUERIES)
+    # Searches that find nothing: an aircraft en route 10 km out, and a layout without taxiways
+    far = [offset(10000.0 + rng.uniform(0, 2000), rng.uniform(-2000, 2000)) for _ in range(QUERIES)]
+    runways_only = AirportIndex(dict(layout, taxiways=[], parking_positions=[], holding_points=[]))
+    timed("nearest feature, 10 km out", lambda lat, lon: index.nearest(*far.pop()), QUERIES)
+    timed("nearest taxiway, none in layout", lambda lat, lon: runways_only.nearest(lat, lon, TAXIWAY), QUERIES)
+    timed("nearest taxiway segment (scan)", lambda lat, lon: scan_nearest_segment(layout, lat, lon), 50)
+
+
+if __name__ == "__main__":
+    main()
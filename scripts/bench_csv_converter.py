@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark for converting old CSV flight logs into a recording store.
+
+Checks that every row shape csv.writer produced (GPS and attitude, GPS
+only, attitude only) is read, then writes a set of synthetic logs in the
+old recorder's format, times
+read_my_csv.extract_gps_from_csv against the converter's tokenizer on one
+of them (checking both read the same numbers), then converts the whole set
+with one worker and with one per CPU, and once more to time the skip of
+files already converted.
+
+Usage:
+    python scripts/bench_csv_converter.py [files] [hours_per_file]
+"""
+import contextlib
+import csv
+import io
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from data.udp_parser import AttitudeData, GPSData
+from tools.convert_csv_recordings import convert, parse_legacy_csv
+from tools.read_my_csv import extract_gps_from_csv
+
+RATE = 1  # rows per second, as the old recorder wrote them
+
+
+def write_log(path: str, seconds: int, seed: int) -> None:
+    start = 1745845412.93 + seed * 86400
+    with open(path, 'w') as f:
+        f.write('"AAAA","BBB"\n')
+        for tick in range(seconds * RATE):
+            gps = GPSData(round(15.4436 + tick * 1e-4, 4), round(46.9988 + seed * 1e-3, 4), 337.9 + tick % 100,
+                          169.0, round(tick % 250 * 0.5, 1))
+            attitude = AttitudeData(169.0, round(tick % 10 * 0.11, 2), -0.09)
+            f.write(f'"{gps}","{attitude}",{start + tick / RATE}\n')
+
+
+def check_row_shapes() -> None:
+    """Rows written by csv.writer with one of the two records missing leave an empty field."""
+    gps = GPSData(15.4436, 46.9988, 337.9, 169.0, 12.5)
+    attitude = AttitudeData(169.0, 0.11, -0.09)
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(['AAAA', 'BBB'])
+    writer.writerow([gps, attitude, 1745845412.5])
+    writer.writerow([gps, None, 1745845413.5])
+    writer.writerow([None, attitude, 1745845414.5])
+    log = parse_legacy_csv(text.getvalue().encode('utf-8'))
+    assert (log.icao_address, log.callsign) == ('AAAA', 'BBB'), log
+    assert [struct.unpack('<dddfff', record)[0] for record in log.gps] == [1745845412.5, 1745845413.5], log.gps
+    assert [struct.unpack('<dfff', record)[0] for record in log.attitude] == [1745845412.5, 1745845414.5], \
+        log.attitude
+    assert struct.unpack('<dddfff', log.gps[1])[1:3] == (gps.longitude, gps.latitude), log.gps
+    assert log.skipped == 0, log.skipped
+
+
+def run_quietly(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+def best_of(repeat, function, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = run_quietly(function, *args)
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    seconds = int(hours * 3600)
+    check_row_shapes()
+
+    with tempfile.TemporaryDirectory() as directory:
+        logs = os.path.join(directory, 'logs')
+        os.makedirs(logs)
+        for number in range(files):
+            write_log(os.path.join(logs, f'output_GPS_DATA_{number}.csv'), seconds, number)
+        first = os.path.join(logs, 'output_GPS_DATA_0.csv')
+        size = sum(os.path.getsize(os.path.join(logs, name)) for name in os.listdir(logs))
+        print(f"{files} logs of {seconds * RATE} rows, {size / 2**20:.1f} MiB")
+
+        # read_my_csv hands back strings; converting them to numbers is part of reading a log
+        split_time, rows = best_of(3, lambda path: [[float(value) for value in row]
+                                                    for row in extract_gps_from_csv(path)[0]], first)
+        with open(first, 'rb') as f:
+            data = f.read()
+        token_time, log = best_of(3, parse_legacy_csv, data)
+        print(f"read_my_csv + float(): {split_time * 1e3:7.1f} ms, tokenizer + packing: {token_time * 1e3:7.1f} ms "
+              f"({split_time / token_time:.1f}x)")
+        same = len(rows) == len(log.gps) and all(
+            struct.unpack('<dddfff', packed)[2] == row[1] and abs(struct.unpack('<dfff', attitude)[2] - row[6]) < 1e-6
+            for packed, attitude, row in zip(log.gps, log.attitude, rows))
+        print(f"same values: {same}, {len(log.gps)} samples, {log.skipped} skipped")
+
+        for jobs in sorted({1, os.cpu_count() or 1}):
+            store = os.path.join(directory, f'store_{jobs}')
+            begin = time.perf_counter()
+            failed = run_quietly(convert, store, [logs], jobs)
+            elapsed = time.perf_counter() - begin
+            print(f"convert with {jobs:2d} worker(s): {elapsed:6.2f} s, {size / elapsed / 2**20:6.1f} MiB/s"
+                  f"{', %d failed' % failed if failed else ''}")
+        begin = time.perf_counter()
+        run_quietly(convert, store, [logs], None)
+        print(f"skip converted files:     {time.perf_counter() - begin:6.2f} s")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
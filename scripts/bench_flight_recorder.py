@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the binary flight recorder.
+
+Feeds FlightRecorder.record_batch with parsed messages shaped like a busy
+session (ownship GPS and attitude plus a few hundred traffic targets per
+second), times the cost per sample on the calling thread (the ingest loop
+in Rewinger) and the time close() then waits for the writer thread. It
+reads the channel files back with struct to check every sample arrived,
+and compares their size with the dataclass-repr CSV the old recorder
+wrote for GPS and attitude.
+
+Usage:
+    python scripts/bench_flight_recorder.py [seconds_of_traffic]
+"""
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from data.flight_recorder import CHANNELS, HEADER_SIZE, FlightRecorder, unpack_header
+from data.udp_parser import ATTITUDE, GPS, TRAFFIC, AirTrafficData, AttitudeData, GPSData
+
+RATE = 20  # ownship messages per second
+TARGETS = 300
+TRAFFIC_RATE = 1  # updates per target per second
+
+
+def synthetic_batches(seconds: int, seed: int = 2):
+    """(messages, receive_time) batches: every 50 ms one GPS and one attitude plus 1/20 of the traffic."""
+    rng = random.Random(seed)
+    start = time.time()
+    batches = []
+    per_tick = TARGETS * TRAFFIC_RATE // RATE
+    for tick in range(seconds * RATE):
+        messages = [(GPS, GPSData(15.44 + tick * 1e-5, 47.0, 350.0, 160.0, 70.0)),
+                    (ATTITUDE, AttitudeData(161.0, 2.5, -1.0))]
+        for _ in range(per_tick):
+            target = rng.randrange(TARGETS)
+            messages.append((TRAFFIC, AirTrafficData(f"{0x400000 + target:06X}", 47.0 + rng.random(),
+                                                     15.0 + rng.random(), 12000.0, 500.0, 1, 90.0, 250.0,
+                                                     f"TST{target}")))
+        batches.append((messages, start + tick / RATE))
+    return batches
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    batches = synthetic_batches(seconds)
+    samples = sum(len(messages) for messages, _ in batches)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'flight.skyrec')
+        recorder = FlightRecorder(path)
+        start = time.perf_counter()
+        for messages, receive_time in batches:
+            recorder.record_batch(messages, receive_time)
+        recording = time.perf_counter() - start
+        start = time.perf_counter()
+        recorder.close()
+        closing = time.perf_counter() - start
+
+        sizes = {}
+        counts = {}
+        for kind in (GPS, ATTITUDE, TRAFFIC):
+            with open(os.path.join(path, kind + '.bin'), 'rb') as f:
+                data = f.read()
+            channel, _, record_size = unpack_header(data)
+            assert channel == CHANNELS[kind]
+            counts[kind] = (len(data) - HEADER_SIZE) // record_size
+            sizes[kind] = len(data)
+            # Times come back in order
+            times = [struct.unpack_from('<d', data, HEADER_SIZE + i * record_size)[0]
+                     for i in range(0, counts[kind], max(1, counts[kind] // 100))]
+            assert times == sorted(times)
+        assert sum(counts.values()) == samples == recorder.stats['samples'], (counts, samples)
+        assert recorder.stats['dropped'] == 0
+
+    gps, attitude = batches[0][0][0][1], batches[0][0][1][1]
+    csv_row = len(f'"{gps!r}","{attitude!r}",{batches[0][1]!r}\r\n')
+    binary_row = (sizes[GPS] + sizes[ATTITUDE]) / counts[GPS]
+    print(f"{samples} samples ({seconds} s: {RATE} Hz ownship, {TARGETS} targets at {TRAFFIC_RATE} Hz)")
+    print(f"record_batch      {recording / samples * 1e6:6.2f} us/sample on the calling thread "
+          f"({recorder.stats['flushes']} blocks handed to the writer)")
+    print(f"close             {closing * 1000:6.1f} ms waiting for the writer")
+    print(f"ownship per fix   {binary_row:6.1f} bytes binary (GPS + attitude) vs {csv_row} bytes of old CSV")
+    print("file sizes        " + ", ".join(f"{kind} {size / 1024:.0f} KiB" for kind, size in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
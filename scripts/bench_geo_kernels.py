@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the batched geo_utils kernels against the scalar functions.
+
+Before timing anything it checks that every scalar function and its
+batched kernel agree on random inputs from the whole globe, plus the
+edge cases (identical and antipodal points, poles, the antimeridian,
+zero-length segments); the two are separate implementations of each
+formula, so run this after changing either. "check" runs only that.
+
+For traffic-sized inputs (one ownship against a few hundred to a few
+thousand targets) and airport-sized inputs (one position against every
+taxiway segment of a hub, and every parking position against every
+holding point) it checks that the batched results match the scalar
+functions and prints the throughput of both. Array setup (PointArray,
+SegmentArray) is timed separately, since it is done once per dataset.
+
+It also measures LocalProjection: the cost of a point-to-segment query
+against pre-projected segments, and (when geographiclib is installed)
+the distance error across an airport of the tangent plane, a flat
+spherical projection and lat_lon_to_meters, against exact geodesics.
+
+Usage:
+    python scripts/bench_geo_kernels.py [check]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from utils.geo_utils import (EARTH_RADIUS, LocalProjection, PointArray, SegmentArray, calculate_heading,
+                             calculate_headings, distance_to_segment, distances_to_segments,
+                             haversine_distance, haversine_distances, haversine_matrix, lat_lon_to_meters)
+
+try:
+    from geographiclib.geodesic import Geodesic
+except ImportError:
+    Geodesic = None
+
+CENTER = (48.35, 11.78)
+REPEATS = 20
+ANTIPODE_DISTANCE = math.pi * EARTH_RADIUS - 1.0  # meters; farther than this, the heading is undefined
+
+
+def random_points(rng, count, spread_deg):
+    return [(CENTER[0] + rng.uniform(-spread_deg, spread_deg),
+             CENTER[1] + rng.uniform(-spread_deg, spread_deg)) for _ in range(count)]
+
+
+def timed(function, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def report(label, elements, scalar_seconds, batched_seconds):
+    print(f"{label:<40} {elements:>8} "
+          f"{elements / scalar_seconds / 1e6:9.2f} {elements / batched_seconds / 1e6:9.2f} "
+          f"{scalar_seconds / batched_seconds:8.1f}x")
+
+
+def random_global_points(rng, count):
+    return [(math.degrees(math.asin(rng.uniform(-1.0, 1.0))), rng.uniform(-180.0, 180.0)) for _ in range(count)]
+
+
+def edge_points(lat, lon):
+    """Points that stress the formulas as seen from (lat, lon)."""
+    return [(lat, lon), (-lat, lon + 180.0 if lon <= 0 else lon - 180.0),
+            (90.0, lon), (-90.0, 0.0), (lat, 180.0), (lat, -180.0), (lat + 1e-9, lon)]
+
+
+def heading_difference(a, b):
+    difference = abs(a - b) % 360
+    return min(difference, 360 - difference)
+
+
+def check_agreement(rng, positions, count):
+    """
+    Assert that the scalar functions and the batched kernels agree for
+    random positions against random targets and segments anywhere on Earth.
+    Segments are checked on a projection centred on the position, which is
+    what distance_to_segment uses, so the two must agree to rounding.
+    """
+    worst = {'haversine': 0.0, 'heading': 0.0, 'matrix': 0.0, 'segment': 0.0}
+    for lat, lon in random_global_points(rng, positions) + [(90.0, 0.0), (-90.0, 45.0), (0.0, 180.0)]:
+        targets = random_global_points(rng, count) + edge_points(lat, lon)
+        points = PointArray.from_coords(targets)
+        for target, found in zip(targets, haversine_distances(lat, lon, points)):
+            expected = haversine_distance(lat, lon, target[0], target[1])
+            worst['haversine'] = max(worst['haversine'], abs(expected - found))
+        for target, found in zip(targets, calculate_headings(lat, lon, points)):
+            if haversine_distance(lat, lon, target[0], target[1]) > ANTIPODE_DISTANCE:
+                continue  # every heading leads to the antipode; which one comes out is down to rounding
+            expected = calculate_heading(lat, lon, target[0], target[1])
+            worst['heading'] = max(worst['heading'], heading_difference(expected, found))
+
+        starts = random_global_points(rng, count) + [(lat, lon), (lat + 0.001, lon)]
+        ends = [(a + rng.uniform(-0.01, 0.01), b + rng.uniform(-0.01, 0.01)) for a, b in starts[:-1]] + [starts[-1]]
+        segments = SegmentArray(starts, ends, LocalProjection(lat, lon))
+        for start, end, found in zip(starts, ends, distances_to_segments((lat, lon), segments)):
+            expected = distance_to_segment((lat, lon), start, end)
+            if math.isinf(expected) or math.isinf(found):
+                assert expected == found, f"segment {start}-{end} from {(lat, lon)}: {expected} != {found}"
+            else:
+                worst['segment'] = max(worst['segment'], abs(expected - found) / max(expected, 1.0))
+
+    first, second = random_global_points(rng, count), random_global_points(rng, count)
+    matrix = haversine_matrix(PointArray.from_coords(first), PointArray.from_coords(second))
+    for i, a in enumerate(first):
+        for j, b in enumerate(second):
+            worst['matrix'] = max(worst['matrix'], abs(haversine_distance(a[0], a[1], b[0], b[1]) - matrix[i, j]))
+
+    assert worst['haversine'] < 1e-6 and worst['matrix'] < 1e-6, worst
+    assert worst['heading'] < 1e-6, worst
+    assert worst['segment'] < 1e-9, worst
+    print("scalar and batched agree; worst difference: "
+          f"haversine {worst['haversine']:.2e} m, heading {worst['heading']:.2e} deg, "
+          f"matrix {worst['matrix']:.2e} m, segment {worst['segment']:.2e} (relative)")
+
+
+def bench_one_to_many(rng, count, spread_deg):
+    lat, lon = CENTER
+    targets = random_points(rng, count, spread_deg)
+    setup, points = timed(lambda: PointArray.from_coords(targets), 5)
+
+    scalar, expected = timed(lambda: [haversine_distance(lat, lon, t[0], t[1]) for t in targets])
+    batched, found = timed(lambda: haversine_distances(lat, lon, points))
+    assert max(abs(a - b) for a, b in zip(expected, found)) < 1e-6
+    report(f"haversine 1 x N (setup {setup * 1e6:.0f} us)", count, scalar, batched)
+
+    scalar, expected = timed(lambda: [calculate_heading(lat, lon, t[0], t[1]) for t in targets])
+    batched, found = timed(lambda: calculate_headings(lat, lon, points))
+    assert max(min(abs(a - b), 360 - abs(a - b)) for a, b in zip(expected, found)) < 1e-9
+    report("heading 1 x N", count, scalar, batched)
+
+
+def bench_segments(rng, count):
+    position = CENTER
+    starts = random_points(rng, count, 0.02)
+    ends = [(lat + rng.uniform(-0.0005, 0.0005), lon + rng.uniform(-0.0005, 0.0005)) for lat, lon in starts]
+    setup, segments = timed(lambda: SegmentArray(starts, ends), 5)
+
+    scalar, expected = timed(lambda: [distance_to_segment(position, a, b) for a, b in zip(starts, ends)], 5)
+    batched, found = timed(lambda: distances_to_segments(position, segments))
+    assert max(abs(a - b) for a, b in zip(expected, found)) < 1e-3
+    report(f"point to segment 1 x N (setup {setup * 1e3:.1f} ms)", count, scalar, batched)
+
+
+def bench_pairwise(rng, rows, columns):
+    first = random_points(rng, rows, 0.02)
+    second = random_points(rng, columns, 0.02)
+    first_points, second_points = PointArray.from_coords(first), PointArray.from_coords(second)
+
+    scalar, expected = timed(lambda: [[haversine_distance(a[0], a[1], b[0], b[1]) for b in second]
+                                      for a in first], 2)
+    batched, found = timed(lambda: haversine_matrix(first_points, second_points), 5)
+    assert max(abs(expected[i][j] - found[i, j]) for i in range(rows) for j in range(columns)) < 1e-6
+    report(f"haversine N x M ({rows} x {columns})", rows * columns, scalar, batched)
+
+
+def bench_projection(rng, count):
+    projection = LocalProjection(*CENTER)
+    starts = random_points(rng, count, 0.02)
+    ends = [(lat + rng.uniform(-0.0005, 0.0005), lon + rng.uniform(-0.0005, 0.0005)) for lat, lon in starts]
+    segments = [(projection.to_local(*a), projection.to_local(*b)) for a, b in zip(starts, ends)]
+    positions = random_points(rng, count, 0.02)
+
+    scalar, _ = timed(lambda: [distance_to_segment(p, a, b) for p, a, b in zip(positions, starts, ends)], 5)
+    projected, _ = timed(lambda: [projection.distance_to_segment(projection.to_local(*p), a, b)
+                                  for p, (a, b) in zip(positions, segments)], 5)
+    local = [projection.to_local(*p) for p in positions]
+    plane, _ = timed(lambda: [projection.distance_to_segment(p, a, b) for p, (a, b) in zip(local, segments)], 5)
+    print(f"point to segment, per query: distance_to_segment {scalar / count * 1e9:.0f} ns, "
+          f"projecting the position {projected / count * 1e9:.0f} ns, "
+          f"position already projected {plane / count * 1e9:.0f} ns")
+
+
+def projection_accuracy(rng, count):
+    if Geodesic is None:
+        print("projection accuracy: skipped (geographiclib not installed)")
+        return
+    projection = LocalProjection(*CENTER)
+    metres_per_degree = math.radians(1.0) * EARTH_RADIUS
+    cos_lat = math.cos(math.radians(CENTER[0]))
+    worst = {'tangent plane': 0.0, 'flat sphere': 0.0, 'lat_lon_to_meters': 0.0}
+    for _ in range(count):
+        a, b = random_points(rng, 2, 0.03)
+        exact = Geodesic.WGS84.Inverse(a[0], a[1], b[0], b[1])['s12']
+        (ax, ay), (bx, by) = projection.to_local(*a), projection.to_local(*b)
+        flat = math.hypot((b[1] - a[1]) * metres_per_degree * cos_lat, (b[0] - a[0]) * metres_per_degree)
+        (ex, ey), (fx, fy) = lat_lon_to_meters(*a), lat_lon_to_meters(*b)
+        for label, distance in (('tangent plane', math.hypot(bx - ax, by - ay)), ('flat sphere', flat),
+                                ('lat_lon_to_meters', math.hypot(fx - ex, fy - ey))):
+            worst[label] = max(worst[label], abs(distance - exact))
+    print("worst distance error within about 3 km of the centre: "
+          + ", ".join(f"{label} {error:.4f} m" for label, error in worst.items()))
+
+
+def main():
+    rng = random.Random(3)
+    check_agreement(rng, 200, 200)
+    if len(sys.argv) > 1 and sys.argv[1] == 'check':
+        return
+    print(f"{'kernel':<40} {'elements':>8} {'scalar':>9} {'batched':>9} {'speedup':>9}")
+    print(f"{'':<40} {'':>8} {'M/s':>9} {'M/s':>9}")
+    print("traffic-sized")
+    for count in (100, 500, 5000):
+        bench_one_to_many(rng, count, 1.5)
+    print("airport-sized")
+    for count in (500, 5000, 20000):
+        bench_segments(rng, count)
+    bench_pairwise(rng, 400, 100)
+    bench_pairwise(rng, 1000, 300)
+    print("local projection")
+    bench_projection(rng, 20000)
+    projection_accuracy(rng, 2000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for OSMAirportExtractor nearest-node lookups.
+
+Builds a synthetic airport of about 50,000 OSM nodes (taxiway ways with
+a node every few metres over a 4 x 4 km area, plus parking positions) in
+the Overpass JSON shape, loads it through _process_osm_data, builds the
+node index and times find_nearest_nodes on random points
+against the linear haversine scan _find_nearest_node used to do. Before
+timing, it checks that both pick an equally near node.
+
+Usage:
+    python scripts/bench_osm_nearest_node.py [nodes]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from tools.osm_airport_extractor import OSMAirportExtractor
+from utils.geo_utils import haversine_distance
+
+CENTER = (47.0, 15.44)
+DEG_LAT = 1 / 111195.0  # degrees per metre of latitude
+DEG_LON = DEG_LAT / math.cos(math.radians(CENTER[0]))
+QUERIES = 5000
+SCAN_QUERIES = 20
+
+
+def synthetic_elements(count: int, seed: int = 11):
+    """Overpass-style elements: taxiway ways over a 4 x 4 km grid, then parking nodes."""
+    rng = random.Random(seed)
+    elements = []
+    node_id = 1
+    way_id = 1
+    parking = count // 20
+    per_way = 200
+    spacing = 4000.0 / per_way
+    while node_id <= count - parking:
+        north = rng.uniform(-2000, 2000)
+        refs = []
+        for step in range(per_way):
+            east = -2000.0 + step * spacing
+            elements.append({'type': 'node', 'id': node_id,
+                             'lat': CENTER[0] + (north + rng.uniform(-3, 3)) * DEG_LAT,
+                             'lon': CENTER[1] + east * DEG_LON})
+            refs.append(node_id)
+            node_id += 1
+        elements.append({'type': 'way', 'id': way_id, 'nodes': refs,
+                         'tags': {'aeroway': 'taxiway', 'ref': f"T{way_id}"}})
+        way_id += 1
+    while node_id <= count:
+        elements.append({'type': 'node', 'id': node_id,
+                         'lat': CENTER[0] + rng.uniform(-2000, 2000) * DEG_LAT,
+                         'lon': CENTER[1] + rng.uniform(-2000, 2000) * DEG_LON,
+                         'tags': {'aeroway': 'parking_position', 'ref': f"P{node_id}"}})
+        node_id += 1
+    return {'elements': elements}
+
+
+def scan_nearest(extractor, lat: float, lon: float):
+    """The linear scan _find_nearest_node used to do."""
+    nearest, min_distance = None, float('inf')
+    for node in extractor.nodes.values():
+        distance = haversine_distance(lat, lon, node.lat, node.lon)
+        if distance < min_distance:
+            nearest, min_distance = node, distance
+    return nearest, min_distance
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data = synthetic_elements(count)
+    extractor = OSMAirportExtractor()
+
+    start = time.perf_counter()
+    extractor._process_osm_data(data)
+    load = time.perf_counter() - start
+    start = time.perf_counter()
+    extractor._build_node_index()
+    build = time.perf_counter() - start
+    print(f"{len(extractor.nodes)} nodes, {len(extractor.ways)} ways; "
+          f"loaded in {load * 1000:.0f} ms, node index built in {build * 1000:.0f} ms")
+
+    rng = random.Random(5)
+    points = [(CENTER[0] + rng.uniform(-2100, 2100) * DEG_LAT, CENTER[1] + rng.uniform(-2100, 2100) * DEG_LON)
+              for _ in range(QUERIES)]
+
+    # Same answer as the scan (up to ties and the sphere/ellipsoid difference)
+    for (lat, lon), node in zip(points[:SCAN_QUERIES], extractor.find_nearest_nodes(points[:SCAN_QUERIES],
+                                                                                     float('inf'))):
+        expected, distance = scan_nearest(extractor, lat, lon)
+        found = haversine_distance(lat, lon, node.lat, node.lon)
+        assert found <= distance * 1.005 + 0.01, (lat, lon, expected, node)
+
+    start = time.perf_counter()
+    for lat, lon in points[:SCAN_QUERIES]:
+        scan_nearest(extractor, lat, lon)
+    scan = (time.perf_counter() - start) / SCAN_QUERIES
+
+    start = time.perf_counter()
+    found = extractor.find_nearest_nodes(points)
+    batch = (time.perf_counter() - start) / QUERIES
+    snapped = sum(1 for node in found if node is not None)
+
+    print(f"linear scan         {scan * 1e3:9.2f} ms/point")
+    print(f"find_nearest_nodes  {batch * 1e6:9.2f} us/point  ({scan / batch:.0f}x faster, "
+          f"{snapped}/{QUERIES} points within the default snap distance)")
+    print(f"snapping {QUERIES} points: scan about {scan * QUERIES:.0f} s, index {batch * QUERIES * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Time and memory of loading a large OSM extract into OSMAirportExtractor.
+
+Writes a synthetic regional Overpass JSON dump to a temporary file: an
+airport's worth of aeroway ways among many times as many building and
+road ways with their own tags, and untagged multipolygon members of
+landuse relations and of one aerodrome relation; nodes first, relations
+last, as in a real dump. It then loads it three ways:
+
+- the old way: json.load of the whole file, then a Node or Way with its
+  own tags dict for every element (what _process_osm_data used to do)
+- one pass: _process_osm_data streaming the elements once, which has to
+  keep every node's coordinates until the ways are known
+- two passes: load_osm_file, which reads ways and relations first and
+  then only the nodes they reference
+
+Peak memory is measured with tracemalloc in a separate run from the
+timing, so tracing does not distort the times.
+
+Usage:
+    python scripts/bench_osm_streaming.py [nodes]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from tools.osm_airport_extractor import Node, OSMAirportExtractor, Way, iter_osm_elements
+
+CENTER = (48.35, 11.78)
+NODES_PER_WAY = 10
+AEROWAY_SHARE = 0.02  # fraction of the ways that are taxiways and runways
+UNTAGGED_SHARE = 0.1  # fraction of the other ways that are untagged multipolygon members
+AERODROME_MEMBERS = 4  # untagged ways that outline the aerodrome
+
+
+def write_fixture(path: str, count: int, seed: int = 3) -> None:
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        f.write('{"version":0.6,"generator":"bench","osm3s":{"copyright":"synthetic"},"elements":[\n')
+        for node_id in range(1, count + 1):
+            node = {'type': 'node', 'id': node_id,
+                    'lat': CENTER[0] + rng.uniform(-0.5, 0.5), 'lon': CENTER[1] + rng.uniform(-0.5, 0.5)}
+            if node_id % 500 == 0:
+                node['tags'] = {'aeroway': 'parking_position', 'ref': f"P{node_id}"}
+            elif node_id % 7 == 0:
+                node['tags'] = {'natural': 'tree', 'leaf_type': 'broadleaved'}
+            f.write(json.dumps(node, separators=(',', ':')) + ',\n')
+        ways = count // NODES_PER_WAY
+        untagged = []
+        for way_id in range(1, ways + 1):
+            refs = list(range((way_id - 1) * NODES_PER_WAY + 1, way_id * NODES_PER_WAY + 1))
+            way = {'type': 'way', 'id': way_id, 'nodes': refs}
+            if rng.random() < AEROWAY_SHARE:
+                way['tags'] = {'aeroway': 'taxiway', 'ref': f"T{way_id}", 'width': '23'}
+            elif rng.random() < UNTAGGED_SHARE:
+                untagged.append(way_id)
+            elif way_id % 2:
+                way['tags'] = {'building': 'yes', 'addr:street': 'Flughafenstrasse', 'addr:housenumber': str(way_id)}
+            else:
+                way['tags'] = {'highway': 'residential', 'name': f"Street {way_id}", 'maxspeed': '30'}
+            f.write(json.dumps(way, separators=(',', ':')) + ',\n')
+        relations = [(untagged[:AERODROME_MEMBERS], {'type': 'multipolygon', 'aeroway': 'aerodrome', 'icao': 'EDDM'})]
+        for start in range(AERODROME_MEMBERS, len(untagged), 5):
+            relations.append((untagged[start:start + 5], {'type': 'multipolygon', 'landuse': 'forest'}))
+        for relation_id, (members, tags) in enumerate(relations, 1):
+            relation = {'type': 'relation', 'id': relation_id, 'tags': tags,
+                        'members': [{'type': 'way', 'ref': ref, 'role': 'outer'} for ref in members]}
+            f.write(json.dumps(relation, separators=(',', ':')) + (',\n' if relation_id < len(relations) else '\n'))
+        f.write(']}\n')
+
+
+def load_old(path: str):
+    with open(path) as f:
+        data = json.load(f)
+    nodes, ways = {}, {}
+    for element in data['elements']:
+        if element['type'] == 'node':
+            nodes[element['id']] = Node(id=element['id'], lat=element['lat'], lon=element['lon'],
+                                        tags=element.get('tags', {}))
+        elif element['type'] == 'way':
+            ways[element['id']] = Way(id=element['id'], nodes=element['nodes'], tags=element.get('tags', {}))
+    return nodes, ways
+
+
+def load_one_pass(path: str):
+    extractor = OSMAirportExtractor()
+    extractor._process_osm_data({'elements': iter_osm_elements(path)})
+    return extractor.nodes, extractor.ways
+
+
+def load_two_passes(path: str):
+    extractor = OSMAirportExtractor()
+    extractor.load_osm_file(path)
+    return extractor.nodes, extractor.ways
+
+
+def measure(label: str, load, path: str) -> None:
+    gc.collect()
+    start = time.perf_counter()
+    nodes, ways = load(path)
+    seconds = time.perf_counter() - start
+    kept = f"{len(nodes)} nodes, {len(ways)} ways kept"
+    del nodes, ways
+    gc.collect()
+
+    tracemalloc.start()
+    result = load(path)
+    _, peak = tracemalloc.get_traced_memory()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label:<11} {seconds:7.2f} s  peak {peak / 2**20:8.1f} MiB  held after {held / 2**20:7.1f} MiB  ({kept})")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'region.json')
+        write_fixture(path, count)
+        print(f"fixture: {count} nodes, {count // NODES_PER_WAY} ways, {os.path.getsize(path) / 2**20:.1f} MiB")
+        measure("old", load_old, path)
+        measure("one pass", load_one_pass, path)
+        measure("two passes", load_two_passes, path)
+
+
+if __name__ == "__main__":
+    main()
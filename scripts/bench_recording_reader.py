@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for reading flight recordings.
+
+Writes a multi-hour recording (ownship GPS and attitude at 20 Hz) with
+FlightRecorder and the same samples as a dataclass-repr CSV like the old
+recorder wrote, then compares loading the CSV with read_my_csv against
+opening the recording, seeking to random times, taking NumPy column views
+and iterating a window of records. It checks every seek against a plain
+scan of the times.
+
+Usage:
+    python scripts/bench_recording_reader.py [hours]
+"""
+import bisect
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from data.flight_recorder import FlightRecorder
+from data.flight_recording import FlightRecording
+from data.udp_parser import ATTITUDE, GPS, AttitudeData, GPSData
+from tools.read_my_csv import extract_gps_from_csv
+
+RATE = 20  # messages per second per channel
+SEEKS = 10000
+
+
+def write_recording(path: str, csv_path: str, seconds: int) -> float:
+    recorder = FlightRecorder(path, flush_interval=float('inf'))
+    start = time.time()
+    with open(csv_path, 'w') as f:
+        for tick in range(seconds * RATE):
+            now = start + tick / RATE
+            gps = GPSData(15.44 + tick * 1e-6, 47.0, 350.0, 160.0, 70.0)
+            attitude = AttitudeData(161.0, 2.5, -1.0)
+            recorder.record_batch([(GPS, gps), (ATTITUDE, attitude)], now)
+            f.write(f'"{gps}","{attitude}",{now}\n')
+    recorder.close()
+    return start
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = int(hours * 3600)
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'flight.skyrec')
+        csv_path = os.path.join(directory, 'flight.csv')
+        start_time = write_recording(path, csv_path, seconds)
+        samples = seconds * RATE
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        print(f"{hours:g} h, {samples} GPS samples: recording {size / 2**20:.1f} MiB, "
+              f"CSV {os.path.getsize(csv_path) / 2**20:.1f} MiB")
+
+        begin = time.perf_counter()
+        rows, _, _ = extract_gps_from_csv(csv_path)
+        csv_time = time.perf_counter() - begin
+        print(f"read_my_csv:        {csv_time * 1e3:9.1f} ms to load {len(rows)} rows")
+
+        begin = time.perf_counter()
+        recording = FlightRecording(path)
+        gps = recording[GPS]
+        open_time = time.perf_counter() - begin
+        print(f"open recording:     {open_time * 1e3:9.3f} ms")
+
+        times = [start_time + rng.uniform(-1, seconds + 1) for _ in range(SEEKS)]
+        begin = time.perf_counter()
+        found = [gps.seek(when) for when in times]
+        seek_time = time.perf_counter() - begin
+        print(f"seek:               {seek_time / SEEKS * 1e6:9.2f} us per seek")
+
+        begin = time.perf_counter()
+        latitude = gps.column('latitude')
+        track = gps.column('track')
+        view_time = time.perf_counter() - begin
+        print(f"column views:       {view_time * 1e6:9.2f} us for 2 x {len(latitude)} values "
+              f"(shares memory: {not latitude.flags.owndata})")
+
+        middle = start_time + seconds / 2
+        begin = time.perf_counter()
+        window = list(gps.iter_records(middle, middle + 600))
+        iter_time = time.perf_counter() - begin
+        print(f"iterate 10 minutes: {iter_time * 1e3:9.2f} ms for {len(window)} records")
+
+        # Every seek agrees with a bisect over all the times
+        all_times = gps.column('time').tolist()
+        mismatches = sum(bisect.bisect_left(all_times, when) != number for when, number in zip(times, found))
+        merged = list(recording.iter_messages(middle, middle + 60))
+        ordered = all(a[1].time <= b[1].time for a, b in zip(merged, merged[1:]))
+        print(f"seek mismatches: {mismatches}, merged window in order: {ordered} ({len(merged)} messages), "
+              f"mean track {float(track.mean()):.1f}")
+        del latitude, track
+        recording.close()
+        if mismatches or not ordered:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the replay scheduler used by send_GPS_data.
+
+Replays a synthetic log (rows 50 ms apart, the spacing the recorder logs
+at when the sim sends 20 Hz) over UDP to a local socket, first the way
+send_GPS_data used to (send, print, sleep the row's delta) and then with
+ReplayScheduler, and compares how far each ends from the recorded
+duration. Then it times the same log in max throughput mode.
+
+Usage:
+    python scripts/bench_replay_scheduler.py [rows] [rate]
+"""
+import contextlib
+import io
+import os
+import socket
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from core.replay import ReplayScheduler
+
+SPACING = 0.05  # seconds between rows
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(('127.0.0.1', 0))
+    sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    address = sink.getsockname()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    datagrams = [f"XGPSAerofly FS 4,15.{n:04d},46.9988,337.9,169.0,70.0".encode('utf-8') for n in range(rows)]
+    times = [n * SPACING for n in range(rows)]
+    expected = times[-1] / rate
+    print(f"{rows} rows {SPACING * 1e3:.0f} ms apart at {rate:g}x: {expected:.2f} s expected")
+
+    # The old loop: send, print the line, sleep the delta
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for number, datagram in enumerate(datagrams):
+            sock.sendto(datagram, address)
+            print(number, datagram, SPACING)
+            time.sleep(SPACING / rate)
+    sleep_loop = time.perf_counter() - start - SPACING / rate  # it also sleeps after the last row
+    print(f"sleep loop:      ended {(sleep_loop - expected) * 1e3:8.1f} ms late")
+
+    scheduler = ReplayScheduler(times, lambda number: sock.sendto(datagrams[number], address), rate)
+    stats = scheduler.run()
+    print(f"scheduler:       ended {stats.last * 1e3:8.3f} ms late; {stats.report()}")
+
+    # Halfway through, switch to 4x the rate: the remaining half takes a quarter of the time
+    switch = rows // 2
+    scheduler = ReplayScheduler(times, lambda number: sock.sendto(datagrams[number], address), rate / 2,
+                                progress=lambda number: number >= switch and scheduler.set_rate(rate * 2),
+                                progress_interval=0.0)
+    stats = scheduler.run()
+    expected_switched = times[switch - 1] / (rate / 2) + (times[-1] - times[switch - 1]) / (rate * 2)
+    print(f"rate change:     {stats.finished - stats.started:.2f} s for {expected_switched:.2f} s expected")
+
+    scheduler = ReplayScheduler(times * 50, lambda number: sock.sendto(datagrams[number % rows], address),
+                                max_throughput=True)
+    stats = scheduler.run()
+    print(f"max throughput:  {stats.report()}")
+
+
+if __name__ == "__main__":
+    main()
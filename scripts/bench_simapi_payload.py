@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for building the SimAPI input payload.
+
+Compares SimAPIHandler.create_simapi_data followed by compact JSON encoding
+(the dict path) against SimAPIPayloadBuilder (the template path). Both are
+fed the same simulated flight, updated at 20 Hz and at 100 Hz. The script
+prints the cost per update and the share of one core each path needs at
+that rate. Before timing anything, it checks that both paths produce
+identical bytes.
+
+Usage:
+    python scripts/bench_simapi_payload.py [simulated_seconds]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from core.aircraft_state import AircraftStateManager
+from core.radio_manager import RadioManager
+from core.transponder_manager import TransponderManager
+from data.simapi_handler import SimAPIHandler
+from data.simapi_input_writer import encode_payload
+from data.udp_parser import GPSData, AttitudeData
+
+RATES = (20, 100)  # Hz
+
+
+def flight(updates: int, seed: int = 42):
+    """Yield (GPSData, AttitudeData) pairs of a random-walk flight."""
+    rng = random.Random(seed)
+    lat, lon, alt, heading, speed = 47.26, 11.35, 580.0, 80.0, 0.0
+    for _ in range(updates):
+        speed = max(0.0, speed + rng.uniform(-0.5, 0.8))
+        alt = max(0.0, alt + rng.uniform(-2.0, 3.0))
+        heading = (heading + rng.uniform(-1.5, 1.5)) % 360.0
+        lat += rng.uniform(-1e-4, 1e-4)
+        lon += rng.uniform(-1e-4, 1e-4)
+        yield (GPSData(lon, lat, alt, heading, speed),
+               AttitudeData(heading, rng.uniform(-5, 5), rng.uniform(-20, 20)))
+
+
+def dict_path(handler: SimAPIHandler, state, radio: dict, transponder: dict) -> bytes:
+    return encode_payload(handler.create_simapi_data(state.to_dict(), radio, transponder))
+
+
+def template_path(handler: SimAPIHandler, state, radio: dict, transponder: dict) -> bytes:
+    return handler.payload_builder.build(state, radio, transponder)
+
+
+def run(path, rate: int, seconds: float):
+    """Feed one simulated session through path; return seconds spent building payloads."""
+    with tempfile.TemporaryDirectory(prefix='simapi_bench_') as directory:
+        return _run(SimAPIHandler(directory), path, rate, seconds)
+
+
+def _run(handler: SimAPIHandler, path, rate: int, seconds: float):
+    manager = AircraftStateManager()
+    radio = RadioManager()
+    transponder = TransponderManager()
+    spent = 0.0
+    for gps, attitude in flight(int(rate * seconds)):
+        manager.update_from_gps(gps, attitude)
+        radio_state = radio.get_radio_state()
+        transponder_state = transponder.get_transponder_state()
+        start = time.perf_counter()
+        path(handler, manager.state, radio_state, transponder_state)
+        spent += time.perf_counter() - start
+    return spent
+
+
+def check_identical(updates: int = 5000) -> None:
+    with tempfile.TemporaryDirectory(prefix='simapi_bench_') as directory:
+        _check_identical(SimAPIHandler(directory), updates)
+
+
+def _check_identical(handler: SimAPIHandler, updates: int) -> None:
+    manager = AircraftStateManager()
+    radio = RadioManager().get_radio_state()
+    transponder = TransponderManager().get_transponder_state()
+    for gps, attitude in flight(updates, seed=7):
+        manager.update_from_gps(gps, attitude)
+        expected = dict_path(handler, manager.state, radio, transponder)
+        actual = template_path(handler, manager.state, radio, transponder)
+        assert actual == expected, f"payloads differ:\n{expected!r}\n{actual!r}"
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    check_identical()
+
+    print(f"simulated session: {seconds:.0f} s")
+    print(f"{'rate':>6}{'dict us/upd':>14}{'tmpl us/upd':>14}{'dict core%':>12}{'tmpl core%':>12}{'speedup':>10}")
+    for rate in RATES:
+        updates = int(rate * seconds)
+        legacy = run(dict_path, rate, seconds)
+        template = run(template_path, rate, seconds)
+        print(f"{rate:>4}Hz{legacy / updates * 1e6:>14.1f}{template / updates * 1e6:>14.1f}"
+              f"{legacy / seconds * 100:>11.3f}%{template / seconds * 100:>11.3f}%{legacy / template:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the multi-aircraft traffic replay.
+
+Builds a fleet of time-shifted, spread-out copies of one synthetic flight
+(a 1 Hz circuit) and replays it over local UDP in real time to a receiver
+thread that parses every datagram with DatagramParser and keeps the
+targets in a TrafficStore, as Rewinger does. It reports the send timing,
+how many distinct targets the store ended up with and whether any
+datagram failed to parse, then times the heap merge and the full send
+path in max throughput mode.
+
+Usage:
+    python scripts/bench_traffic_replay.py [targets] [seconds]
+"""
+import math
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from core.traffic_replay import TrafficReplay, TrafficTrack, fleet
+from core.traffic_store import TrafficStore
+from data.udp_parser import TRAFFIC, DatagramParser
+
+
+def circuit(seconds: int):
+    """(time, lon, lat, alt m, track, speed m/s) samples of a 1 Hz circle around LOWG."""
+    for tick in range(seconds):
+        angle = tick / 300 * 2 * math.pi
+        yield (1745845412.0 + tick, 15.44 + 0.05 * math.cos(angle), 46.99 + 0.03 * math.sin(angle),
+               600.0 + 100 * math.sin(angle), (math.degrees(angle) + 90) % 360, 55.0)
+
+
+def receive(sink: socket.socket, store: TrafficStore, counts: dict, done: threading.Event) -> None:
+    parser = DatagramParser()
+    sink.settimeout(0.2)
+    while not done.is_set():
+        datagrams = []
+        try:
+            datagrams.append(sink.recv(2048))
+            sink.setblocking(False)
+            while len(datagrams) < 256:
+                datagrams.append(sink.recv(2048))
+        except (BlockingIOError, socket.timeout):
+            pass
+        finally:
+            sink.settimeout(0.2)
+        now = time.time()
+        for kind, record in parser.parse_batch(datagrams):
+            if kind == TRAFFIC and record is not None:
+                store.update(record.icao_address, record, now)
+                counts['parsed'] += 1
+        counts['received'] += len(datagrams)
+
+
+def main():
+    targets = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    track = TrafficTrack(circuit(seconds))
+    replay = TrafficReplay(fleet([track], copies=targets, time_shift=1.0 / targets, spread=300.0))
+    print(f"{len(replay.targets)} targets, {replay.messages} messages over {replay.duration:.1f} s")
+
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 << 20)
+    sink.bind(('127.0.0.1', 0))
+    store = TrafficStore()
+    counts = {'received': 0, 'parsed': 0}
+    done = threading.Event()
+    receiver = threading.Thread(target=receive, args=(sink, store, counts, done), daemon=True)
+    receiver.start()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    stats = replay.run(sock, sink.getsockname())
+    time.sleep(0.5)
+    done.set()
+    receiver.join()
+    print(f"real time:       {stats.report()}")
+    print(f"receiver:        {counts['received']} datagrams, {counts['parsed']} parsed, "
+          f"{len(store)} distinct targets in the store")
+
+    begin = time.perf_counter()
+    merged = sum(1 for _ in replay.times())
+    merge_time = time.perf_counter() - begin
+    print(f"heap merge:      {merge_time / merged * 1e6:.2f} us per message")
+    stats = replay.run(sock, ('127.0.0.1', 9), max_throughput=True)  # discard port, nobody reading
+    print(f"max throughput:  {stats.report()}")
+    if counts['parsed'] != counts['received'] or len(store) != targets:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
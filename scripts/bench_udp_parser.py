@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the UDP datagram parser.
+
+Compares the split-based DatagramParser against the regex path UDPReceiver
+used before (str decode, startswith chain, pattern literal per call) and
+prints datagrams/sec for each message type (best of several runs, as a
+busy machine only ever makes a run slower).
+
+Usage:
+    python scripts/bench_udp_parser.py [iterations]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from data.udp_parser import DatagramParser, GPSData, AttitudeData, AircraftData, AirTrafficData
+
+SAMPLES = {
+    'XGPS': b'XGPSAerofly FS 4,15.4436,46.9988,337.9,169.0,0.1',
+    'XATT': b'XATTAerofly FS 4,169.0,5.5,-0.09',
+    'XAIRCRAFT': b'XAIRCRAFTAerofly FS 4,aB3dE5gH7jK9mN1p,3C6444,A320,D-AIBA,DLH4AB,LH123',
+    'XTRAFFIC': b'XTRAFFICAerofly FS 4,3C6444,48.109,16.5757,3500.0,-700.0,1,295.9,180.5,DLH4AB',
+}
+
+
+def legacy_receive(data: bytes):
+    """The receive/parse path as it was before the dispatch-table parser."""
+    message = data.decode('utf-8')
+    result = None
+    if message.startswith('XGPS'):
+        match = re.match(r'XGPSAerofly FS 4,([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+)', message)
+        if match:
+            latitude, longitude, altitude, track, ground_speed = map(float, match.groups())
+            if not (latitude == 0.0 and longitude == 0.0 and
+                    altitude == 0.0 and track == 90.0 and ground_speed == 0.0):
+                result = GPSData(*map(float, match.groups()))
+    if message.startswith('XATT'):
+        match = re.match(r'XATTAerofly FS 4,([-\d.]+),([-\d.]+),([-\d.]+)', message)
+        if match:
+            result = AttitudeData(*map(float, match.groups()))
+    if message.startswith('XAIRCRAFT'):
+        match = re.match(r'^XAIRCRAFTAerofly FS 4,([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),'
+                         r'([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+)', message)
+        if match:
+            result = AircraftData(*map(str, match.groups()))
+    if message.startswith('XTRAFFIC'):
+        match = re.match(r'^XTRAFFICAerofly FS 4,([A-Za-z0-9\-_]+),([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+),([01]),'
+                         r'([-\d.]+),([-\d.]+),([A-Za-z0-9\-_]+)', message)
+        if match:
+            groups = match.groups()
+            result = AirTrafficData(
+                icao_address=str(groups[0]),
+                latitude=float(groups[1]),
+                longitude=float(groups[2]),
+                altitude_ft=float(groups[3]),
+                vertical_speed_ft_min=float(groups[4]),
+                airborne_flag=int(groups[5]),
+                heading_true=float(groups[6]),
+                velocity_knots=float(groups[7]),
+                callsign=str(groups[8])
+            )
+    return result
+
+
+REPEAT = 5
+
+
+def rate(func, data: bytes, iterations: int) -> float:
+    """Return calls per second of func(data), from the fastest of REPEAT runs."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(data)
+        best = min(best, time.perf_counter() - start)
+    return iterations / best
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    parser = DatagramParser()
+
+    # Both paths have to agree before their speed means anything
+    for name, data in SAMPLES.items():
+        expected = legacy_receive(data)
+        _, record = parser.parse(data)
+        assert record == expected, f"{name}: {record!r} != {expected!r}"
+
+    print(f"{'message':<12}{'regex dg/s':>14}{'split dg/s':>14}{'speedup':>10}")
+    for name, data in SAMPLES.items():
+        legacy = rate(legacy_receive, data, iterations)
+        split = rate(parser.parse, data, iterations)
+        print(f"{name:<12}{legacy:>14,.0f}{split:>14,.0f}{split / legacy:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
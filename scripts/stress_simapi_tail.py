@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Stress test for the SimAPI output tail reader.
+
+A writer process appends numbered XPNDR_SET commands to a scratch
+simAPI_output.jsonl the way SayIntentions.AI does: opening the file for
+append, sometimes writing several lines per open, sometimes flushing half a
+line and finishing it a moment later. Meanwhile the reader consumes the file
+with compaction after every read and is periodically thrown away and
+recreated from its checkpoint, as on an application restart.
+
+The run fails unless every command is seen exactly once and in order.
+
+Usage:
+    python scripts/stress_simapi_tail.py [commands] [restart_every]
+"""
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skybridge'))
+
+from data.jsonl_tail import JsonlTailReader
+
+READ_INTERVAL = 0.002  # seconds
+ROTATION_GRACE = 0.2  # seconds, shortened so rotations cycle often
+
+
+def writer(path: str, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    sequence = 0
+    while sequence < count:
+        with open(path, 'ab') as f:
+            for _ in range(rng.randint(1, 5)):
+                if sequence >= count:
+                    break
+                line = json.dumps({'setvar': 'XPNDR_SET', 'value': sequence}).encode('utf-8') + b'\n'
+                if rng.random() < 0.2:
+                    # Half a line now, the rest after the reader has had a chance to see it
+                    cut = rng.randint(1, len(line) - 1)
+                    f.write(line[:cut])
+                    f.flush()
+                    time.sleep(rng.random() * 0.003)
+                    f.write(line[cut:])
+                else:
+                    f.write(line)
+                f.flush()
+                sequence += 1
+                if rng.random() < 0.1:
+                    # Hold the file open across a possible rename
+                    time.sleep(rng.random() * 0.005)
+        time.sleep(rng.random() * 0.001)
+
+
+def new_reader(path: str) -> JsonlTailReader:
+    return JsonlTailReader(path, compact_threshold=0, rotation_grace=ROTATION_GRACE)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    restart_every = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    directory = tempfile.mkdtemp(prefix='simapi_tail_')
+    path = os.path.join(directory, 'simAPI_output.jsonl')
+    try:
+        process = multiprocessing.Process(target=writer, args=(path, count, 1234))
+        process.start()
+        reader = new_reader(path)
+        received = []
+        reads = restarts = 0
+        deadline = None
+        while True:
+            for line in reader.read_lines():
+                received.append(json.loads(line)['value'])
+            reads += 1
+            if reads % restart_every == 0:
+                reader = new_reader(path)
+                restarts += 1
+            if not process.is_alive():
+                # Writer done: keep reading until the rotated file has been drained too
+                deadline = deadline or time.monotonic() + ROTATION_GRACE * 3
+                if len(received) >= count and (reader.rotated is None or time.monotonic() > deadline):
+                    break
+                if time.monotonic() > deadline + 5.0:
+                    break
+            time.sleep(READ_INTERVAL)
+        process.join()
+
+        missing = sorted(set(range(count)) - set(received))
+        duplicates = len(received) - len(set(received))
+        in_order = received == sorted(received)
+        print(f"commands written: {count}, received: {len(received)}, reads: {reads}, restarts: {restarts}")
+        print(f"missing: {len(missing)}, duplicates: {duplicates}, in order: {in_order}")
+        if missing or duplicates or not in_order:
+            print(f"FAIL (first missing: {missing[:10]})")
+            sys.exit(1)
+        print("OK")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ setup(
         "typing-extensions>=4.0.0",
         "python-dateutil>=2.8.2",
     ],
+    extras_require={
+        "numpy": ["numpy>=1.17"],
+    },
     author="Your Name",
     author_email="your.email@example.com",
     description="A bridge between flight simulators and SayIntentions.AI",
@@ -1,45 +1,106 @@
-from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict
 import time
 from datetime import datetime
 import math
 
-@dataclass
 class AircraftState:
-    """Class to hold aircraft state information"""
-    # Basic aircraft info
-    callsign: str = 'aabbcc'
-    type: str = ''
-    position: str = ''
-    altitude: str = ''
-    heading: str = ''
-    latitude: float = 0.0
-    longitude: float = 0.0
-    ground_speed: float = 0.0
-    bank: float = 0.0
-    pitch: float = 0.0
-    vertical_speed: int = 0
-    on_ground: bool = True
-    
-    # Additional SimAPI variables
-    engine_type: int = 1  # 0=Piston, 1=Jet, 2=None, 3=Helo, 4=Unsupported, 5=Turboprop
-    total_weight: int = 150000  # in pounds
-    sea_level_pressure: int = 2992  # in inHg (29.92)
-    magvar: int = 0  # magnetic variation
-    typical_descent_rate: int = 1000  # in feet per minute
-    
-    # Electrical and circuit states
-    electrical_master_battery: bool = True
-    circuit_com1: bool = True
-    circuit_com2: bool = True
-    
-    # Environmental data
-    ambient_wind_direction: int = 0  # in degrees true
-    ambient_wind_velocity: int = 0  # in knots
-    
-    # Time data
-    local_time: float = 0.0  # seconds since midnight
-    zulu_time: float = 0.0  # seconds since midnight
+    """Numeric aircraft state; display strings are produced on demand by AircraftStateView"""
+    __slots__ = (
+        'callsign', 'type', 'has_fix',
+        'latitude', 'longitude', 'altitude_m', 'heading_deg', 'ground_speed',
+        'bank', 'pitch', 'vertical_speed', 'on_ground',
+        'engine_type', 'total_weight', 'sea_level_pressure', 'magvar', 'typical_descent_rate',
+        'electrical_master_battery', 'circuit_com1', 'circuit_com2',
+        'ambient_wind_direction', 'ambient_wind_velocity',
+        'local_time', 'zulu_time',
+    )
+
+    def __init__(self):
+        # Basic aircraft info
+        self.callsign: str = 'aabbcc'
+        self.type: str = ''
+        self.has_fix: bool = False  # True once a GPS position has been received
+        self.latitude: float = 0.0
+        self.longitude: float = 0.0
+        self.altitude_m: float = 0.0
+        self.heading_deg: float = 0.0  # true heading
+        self.ground_speed: float = 0.0  # m/s
+        self.bank: float = 0.0
+        self.pitch: float = 0.0
+        self.vertical_speed: int = 0  # feet per minute
+        self.on_ground: bool = True
+
+        # Additional SimAPI variables
+        self.engine_type: int = 1  # 0=Piston, 1=Jet, 2=None, 3=Helo, 4=Unsupported, 5=Turboprop
+        self.total_weight: int = 150000  # in pounds
+        self.sea_level_pressure: int = 2992  # in inHg (29.92)
+        self.magvar: int = 0  # magnetic variation
+        self.typical_descent_rate: int = 1000  # in feet per minute
+
+        # Electrical and circuit states
+        self.electrical_master_battery: bool = True
+        self.circuit_com1: bool = True
+        self.circuit_com2: bool = True
+
+        # Environmental data
+        self.ambient_wind_direction: int = 0  # in degrees true
+        self.ambient_wind_velocity: int = 0  # in knots
+
+        # Time data
+        self.local_time: float = 0.0  # seconds since midnight
+        self.zulu_time: float = 0.0  # seconds since midnight
+
+    def snapshot(self) -> 'AircraftState':
+        """Return an independent copy, safe to hand to another thread"""
+        copy = AircraftState.__new__(AircraftState)
+        for name in AircraftState.__slots__:
+            setattr(copy, name, getattr(self, name))
+        return copy
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Field values as a dict, for callers that want a mapping"""
+        return {name: getattr(self, name) for name in AircraftState.__slots__}
+
+
+class AircraftStateView:
+    """
+    Display strings for an AircraftState, formatted only when read.
+
+    Wrap a snapshot, not the live state, when the view is read on another
+    thread (e.g. handed to the Tk thread).
+    """
+    __slots__ = ('state',)
+
+    FIELDS = ('position', 'altitude', 'heading')
+
+    def __init__(self, state: AircraftState):
+        self.state = state
+
+    @property
+    def callsign(self) -> str:
+        return self.state.callsign
+
+    @property
+    def type(self) -> str:
+        return self.state.type
+
+    @property
+    def position(self) -> str:
+        if not self.state.has_fix:
+            return ''
+        return f"{self.state.latitude:.4f}, {self.state.longitude:.4f}"
+
+    @property
+    def altitude(self) -> str:
+        if not self.state.has_fix:
+            return ''
+        return f"{self.state.altitude_m} ft"
+
+    @property
+    def heading(self) -> str:
+        if not self.state.has_fix:
+            return ''
+        return f"{self.state.heading_deg:.1f}°"
 
 class AircraftStateManager:
     """Manages aircraft state and provides methods to update it"""
@@ -56,12 +117,11 @@ class AircraftStateManager:
             self.state.latitude = gps_data.latitude
             self.state.longitude = gps_data.longitude
             self.state.ground_speed = gps_data.ground_speed
-            self.state.altitude = f"{gps_data.altitude} ft"
-            self.state.position = f"{gps_data.latitude:.4f}, {gps_data.longitude:.4f}"
+            self.state.altitude_m = gps_data.altitude
+            self.state.has_fix = True
             
             # Use true_heading from attitude data if available, otherwise use track from GPS
-            heading = attitude_data.true_heading if attitude_data else gps_data.track
-            self.state.heading = f"{heading:.1f}°"
+            self.state.heading_deg = attitude_data.true_heading if attitude_data else gps_data.track
             
             # Update vertical speed
             self.state.vertical_speed = self._calculate_vertical_speed(gps_data.altitude)
@@ -126,8 +186,7 @@ class AircraftStateManager:
     
     def get_magnetic_heading(self) -> int:
         """Calculate magnetic heading from true heading"""
-        true_heading = float(self.state.heading.strip('°'))
-        magnetic_heading = true_heading - self.state.magvar
+        magnetic_heading = self.state.heading_deg - self.state.magvar
         
         # Normalize to 0-360 range
         magnetic_heading = magnetic_heading % 360
@@ -176,5 +235,13 @@ class AircraftStateManager:
             self.state.ambient_wind_velocity = velocity
     
     def get_state(self) -> AircraftState:
-        """Get current aircraft state"""
-        return self.state 
\ No newline at end of file
+        """Get current aircraft state (the live object, updated in place)"""
+        return self.state
+
+    def snapshot(self) -> AircraftState:
+        """Get a copy of the current aircraft state"""
+        return self.state.snapshot()
+
+    def view(self) -> AircraftStateView:
+        """Get display strings for a copy of the current aircraft state"""
+        return AircraftStateView(self.state.snapshot()) 
\ No newline at end of file
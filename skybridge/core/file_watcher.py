@@ -0,0 +1,140 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import Callable, Optional, Tuple
+
+from core.ingest import IngestCore, PeriodicJob
+
+# Fallback stat poll interval when inotify is not available
+WATCH_POLL_INTERVAL = 0.02  # seconds
+
+# inotify(7) event masks
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_IN_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _load_libc():
+    """Return libc with the inotify calls, or None when the platform has no inotify."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') else None
+
+
+class FileWatcher:
+    """
+    Calls on_change on the ingest loop whenever a file is written, created or replaced.
+
+    On Linux the file's directory is watched with inotify and the descriptor
+    is registered with the loop, so changes are seen as soon as the writer
+    flushes. Elsewhere (or if inotify fails) the file is stat()ed every
+    poll_interval seconds and a change of size, mtime or inode counts as a
+    write. Several events arriving together produce a single callback.
+    """
+
+    def __init__(self, ingest: IngestCore, path: str, on_change: Callable[[], None],
+                 poll_interval: float = WATCH_POLL_INTERVAL):
+        self.ingest = ingest
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None  # 'inotify' or 'poll' once started
+        self._inotify_fd: Optional[int] = None
+        self._poll_job: Optional[PeriodicJob] = None
+        self._last_stat: Optional[Tuple[int, int, int]] = None
+
+    def start(self) -> None:
+        """Start watching; callable from any thread."""
+        self.ingest.call_soon(self._start)
+
+    def stop(self) -> None:
+        """Stop watching; callable from any thread."""
+        self.ingest.call_soon(self._stop)
+
+    def _start(self) -> None:
+        if self.mode is not None:
+            return
+        if self._start_inotify():
+            self.mode = 'inotify'
+        else:
+            self.mode = 'poll'
+            self._last_stat = self._stat()
+            self._poll_job = self.ingest.add_periodic(self.poll_interval, self._poll, "file watch")
+
+    def _stop(self) -> None:
+        if self._inotify_fd is not None:
+            self.ingest.loop.remove_reader(self._inotify_fd)
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+        if self._poll_job:
+            self._poll_job.cancel()
+            self._poll_job = None
+        self.mode = None
+
+    def _start_inotify(self) -> bool:
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        # Watch the directory, not the file: the file may not exist yet or may be replaced
+        directory = os.path.dirname(self.path)
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_WATCH_MASK) < 0:
+            os.close(fd)
+            return False
+        try:
+            self.ingest.loop.add_reader(fd, self._on_inotify)
+        except NotImplementedError:
+            os.close(fd)
+            return False
+        self._inotify_fd = fd
+        return True
+
+    def _on_inotify(self) -> None:
+        """Read every pending event and fire once if any of them is about our file."""
+        name = os.fsencode(os.path.basename(self.path))
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self._inotify_fd, 4096)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                _, _, _, length = _IN_EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _IN_EVENT_HEADER.size
+                if buffer[offset:offset + length].rstrip(b'\0') == name:
+                    changed = True
+                offset += length
+        if changed:
+            self._notify()
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _poll(self) -> None:
+        current = self._stat()
+        if current != self._last_stat:
+            self._last_stat = current
+            if current is not None:
+                self._notify()
+
+    def _notify(self) -> None:
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"Error handling change of {self.path}: {e}")
@@ -0,0 +1,127 @@
+import types
+from typing import Any, Dict, Mapping, Optional
+
+from core.traffic_store import TrafficStore
+
+# Record kinds that hold a single latest value (traffic is keyed by ICAO address)
+LATEST_KINDS = ('gps', 'attitude', 'aircraft')
+
+_EMPTY_TRAFFIC: Mapping[str, Any] = types.MappingProxyType({})
+
+
+class Frame:
+    """
+    One consistent view of everything received up to a point; never modified
+    once published.
+
+    sequence increases with every published frame. The per-source counters
+    (gps_seq, attitude_seq, aircraft_seq, traffic_seq) only increase when
+    that source changed, so a consumer that remembers them can skip work for
+    sources that did not change. traffic_count is the number of traffic
+    targets and traffic_generation the TrafficStore generation the frame
+    was published at, for TrafficStore.changes_since().
+
+    traffic is a read-only mapping of ICAO address to the latest
+    AirTrafficData taken at publish time, or None if the FrameBuffer was
+    not asked for snapshots (see FrameBuffer); frames with the same
+    traffic_seq share the same mapping object.
+    """
+    __slots__ = ('sequence', 'receive_time', 'gps', 'attitude', 'aircraft', 'traffic',
+                 'gps_seq', 'attitude_seq', 'aircraft_seq', 'traffic_seq', 'traffic_generation',
+                 'traffic_count')
+
+    def __init__(self, sequence: int = 0, receive_time: float = 0.0,
+                 gps=None, attitude=None, aircraft=None,
+                 traffic: Optional[Mapping[str, Any]] = None,
+                 gps_seq: int = 0, attitude_seq: int = 0, aircraft_seq: int = 0, traffic_seq: int = 0,
+                 traffic_generation: int = 0, traffic_count: int = 0):
+        self.sequence = sequence
+        self.receive_time = receive_time
+        self.gps = gps
+        self.attitude = attitude
+        self.aircraft = aircraft
+        self.traffic = traffic
+        self.gps_seq = gps_seq
+        self.attitude_seq = attitude_seq
+        self.aircraft_seq = aircraft_seq
+        self.traffic_seq = traffic_seq
+        self.traffic_generation = traffic_generation
+        self.traffic_count = traffic_count
+
+
+class FrameBuffer:
+    """
+    Double buffer between one writer (the ingest loop) and any number of readers.
+
+    The writer updates a private back buffer record by record and then
+    publishes it as a new immutable Frame with a single reference swap.
+    Readers call current() from any thread and always get a whole frame,
+    never a GPS fix from one batch paired with the attitude of another. No
+    locks are involved: replacing the front reference is atomic, and
+    published frames are never modified.
+
+    Copying the whole traffic table into every frame costs O(targets) per
+    batch, so it is only done with snapshot_traffic=True, and then only
+    when traffic changed since the previous publish. Otherwise frames carry
+    just traffic_count and traffic_generation, and consumers ask the
+    TrafficStore in self.traffic for changes_since(frame.traffic_generation).
+    """
+
+    def __init__(self, traffic: Optional[TrafficStore] = None, snapshot_traffic: bool = False):
+        # Back buffer, touched only by the writer
+        self._latest: Dict[str, Any] = dict.fromkeys(LATEST_KINDS)
+        self.traffic = traffic if traffic is not None else TrafficStore()
+        self._published_generation = self.traffic.generation
+        self._source_seq: Dict[str, int] = dict.fromkeys(LATEST_KINDS + ('traffic',), 0)
+        self._dirty = set()
+        self.snapshot_traffic = snapshot_traffic
+        # Front buffer
+        self._front = Frame(traffic=_EMPTY_TRAFFIC if snapshot_traffic else None)
+
+    def current(self) -> Frame:
+        """Return the latest published frame; O(1), safe from any thread."""
+        return self._front
+
+    # Writer side; call only from the thread that owns the buffer
+
+    def set_latest(self, kind: str, record: Any) -> None:
+        """Replace the latest GPS, attitude or aircraft record (None clears it)."""
+        if self._latest[kind] is not record:
+            self._latest[kind] = record
+            self._dirty.add(kind)
+
+    def update_traffic(self, icao: str, record: Any, receive_time: float) -> None:
+        """Store the latest record for one traffic target."""
+        self.traffic.update(icao, record, receive_time)
+
+    def expire_traffic(self, now: float) -> int:
+        """Drop traffic that timed out by now; return how many targets were dropped."""
+        return self.traffic.expire(now)
+
+    def publish(self, receive_time: Optional[float] = None) -> Frame:
+        """Publish the back buffer as a new frame if anything changed; return the current frame."""
+        previous = self._front
+        traffic_generation = self.traffic.generation
+        if traffic_generation != self._published_generation:
+            self._dirty.add('traffic')
+        if not self._dirty:
+            return previous
+        seq = self._source_seq
+        for kind in self._dirty:
+            seq[kind] += 1
+        if 'traffic' in self._dirty:
+            # Taken on the writer thread, so the store cannot move on between the two reads
+            traffic = types.MappingProxyType(self.traffic.snapshot()) if self.snapshot_traffic else None
+            self._published_generation = traffic_generation
+        else:
+            traffic = previous.traffic
+        self._dirty.clear()
+        latest = self._latest
+        self._front = Frame(
+            previous.sequence + 1,
+            previous.receive_time if receive_time is None else receive_time,
+            latest['gps'], latest['attitude'], latest['aircraft'], traffic,
+            seq['gps'], seq['attitude'], seq['aircraft'], seq['traffic'],
+            self._published_generation, len(self.traffic),
+        )
+        return self._front
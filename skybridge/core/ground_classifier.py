@@ -0,0 +1,219 @@
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from utils.airport_index import AirportFeature, AirportIndex, HOLDING, PARKING, RUNWAY, TAXIWAY
+
+# Detection thresholds, same meaning as the airport visualizer's controls
+PARKING_THRESHOLD = 5.0  # meters from the parking position
+TAXIWAY_THRESHOLD = 5.0  # meters beyond the taxiway edge
+RUNWAY_WIDTH_FACTOR = 0.5  # fraction of the runway width either side of the centre line
+HOLDING_THRESHOLD = 15.0  # meters from the holding point
+
+# Hysteresis
+EXIT_MARGIN = 5.0  # meters the current area is grown by before it counts as left
+MIN_DWELL = 1.0  # seconds a new position has to hold before it is reported
+HOLDING_MAX_SPEED = 2.5  # m/s (about 5 kts); faster than this past a holding point is just taxiing
+
+# Ground or air
+ON_GROUND_HEIGHT = 15.0  # meters above the airport elevation still counted as on the ground
+TAXI_MAX_SPEED = 15.0  # m/s (about 30 kts); used to learn the elevation when the layout has none
+ELEVATION_FIX_DISTANCE = 100.0  # meters from a feature of the layout such a fix has to be
+
+
+def layout_elevation(layout: Dict[str, Any]) -> Optional[float]:
+    """
+    Airport elevation in metres from a layout: its 'elevation' if it has
+    one, else the median of its parking positions' elevations (the
+    extractor writes 0 for untagged ones, so those are left out).
+    """
+    if layout.get('elevation') is not None:
+        return float(layout['elevation'])
+    elevations = sorted(float(parking['elevation']) for parking in layout.get('parking_positions', [])
+                        if parking.get('elevation'))
+    return elevations[len(elevations) // 2] if elevations else None
+
+# Checked in this order; the first kind with a match wins
+PRIORITY = (RUNWAY, HOLDING, PARKING, TAXIWAY)
+
+
+class GroundPosition(NamedTuple):
+    """Where on the airport the aircraft is: a feature kind and its name."""
+    kind: str
+    name: str
+
+
+class GroundEvent(NamedTuple):
+    """A change of ground position, reported once it has held for the dwell time."""
+    time: float
+    position: Optional[GroundPosition]  # None: off every known area
+    previous: Optional[GroundPosition]
+    text: str
+
+
+def describe(position: Optional[GroundPosition], previous: Optional[GroundPosition] = None) -> str:
+    """Short text for a position change, e.g. "entered runway 16" or "holding short at H1"."""
+    if position is None:
+        if previous is None:
+            return "off airport areas"
+        kind = "holding point" if previous.kind == HOLDING else previous.kind
+        return f"left {kind} {previous.name}".rstrip()
+    if position.kind == RUNWAY:
+        return f"entered runway {position.name}".rstrip()
+    if position.kind == HOLDING:
+        return f"holding short at {position.name}".rstrip()
+    if position.kind == PARKING:
+        return f"at parking {position.name}".rstrip()
+    return f"on taxiway {position.name}".rstrip()
+
+
+class GroundClassifier:
+    """
+    Classifies a stream of ownship fixes into runway / holding point /
+    parking / taxiway positions on one airport, and reports changes.
+
+    Each fix is located with a handful of AirportIndex lookups, so update()
+    is cheap enough to run for every GPS message on the ingest loop.
+
+    Two kinds of hysteresis keep jitter from producing event storms: the
+    current area is grown by exit_margin before the aircraft counts as
+    having left it (so it stays "on taxiway A" at a junction with B until it
+    is clearly on B), and a new position has to hold for min_dwell seconds
+    before it is reported. Positions that do not last that long are counted
+    as suppressed.
+
+    is_on_ground() tells fixes on the ground from airborne ones by their
+    height above the airport elevation (metres, as GPSData.altitude). If
+    the elevation is not known, the first fix slower than taxi_max_speed
+    within elevation_fix_distance of a feature of the airport sets it; until
+    then no fix counts as on the ground.
+    """
+
+    def __init__(self, index: AirportIndex, exit_margin: float = EXIT_MARGIN,
+                 min_dwell: float = MIN_DWELL, holding_max_speed: float = HOLDING_MAX_SPEED,
+                 elevation: Optional[float] = None, on_ground_height: float = ON_GROUND_HEIGHT,
+                 taxi_max_speed: float = TAXI_MAX_SPEED, elevation_fix_distance: float = ELEVATION_FIX_DISTANCE):
+        self.index = index
+        self.exit_margin = exit_margin
+        self.min_dwell = min_dwell
+        self.holding_max_speed = holding_max_speed
+        self.elevation = elevation
+        self.on_ground_height = on_ground_height
+        self.taxi_max_speed = taxi_max_speed
+        self.elevation_fix_distance = elevation_fix_distance
+
+        self.position: Optional[GroundPosition] = None  # last reported position
+        self._feature: Optional[AirportFeature] = None  # feature that position was matched on
+        # Candidate waiting out min_dwell; None is a valid candidate (off every area)
+        self._has_pending = False
+        self._pending: Optional[GroundPosition] = None
+        self._pending_feature: Optional[AirportFeature] = None
+        self._pending_since = 0.0
+
+        self.stats = {'fixes': 0, 'events': 0, 'suppressed': 0, 'time': 0.0}
+
+    @classmethod
+    def from_layout(cls, layout: Dict[str, Any],
+                    parking_threshold: float = PARKING_THRESHOLD,
+                    taxiway_threshold: float = TAXIWAY_THRESHOLD,
+                    runway_width_factor: float = RUNWAY_WIDTH_FACTOR,
+                    holding_threshold: float = HOLDING_THRESHOLD, **kwargs) -> 'GroundClassifier':
+        """Index an airport layout (OSMAirportExtractor JSON) with the given thresholds in metres."""
+        index = AirportIndex(layout,
+                             runway_width_factor=runway_width_factor,
+                             taxiway_margin=taxiway_threshold,
+                             parking_radius=parking_threshold,
+                             holding_radius=holding_threshold)
+        kwargs.setdefault('elevation', layout_elevation(layout))
+        return cls(index, **kwargs)
+
+    def is_on_ground(self, gps) -> bool:
+        """Whether a fix (GPSData) is on the ground rather than flying over the airport."""
+        if self.elevation is None:
+            if gps.ground_speed > self.taxi_max_speed or self.index.nearest(
+                    gps.latitude, gps.longitude, max_distance=self.elevation_fix_distance) is None:
+                return False
+            self.elevation = gps.altitude
+        return gps.altitude - self.elevation <= self.on_ground_height
+
+    def _locate(self, latitude: float, longitude: float,
+                ground_speed: float) -> Tuple[Optional[GroundPosition], Optional[AirportFeature]]:
+        """Position the fix is in right now, preferring the current one while it is within the exit margin."""
+        current = self._feature
+        if current is not None:
+            x, y = self.index.to_local(latitude, longitude)
+            if not current.contains(x, y, self.exit_margin):
+                current = None
+
+        for kind in PRIORITY:
+            if current is not None and current.kind == kind:
+                # Nothing of a higher priority matched: stay where we are
+                return self.position, current
+            if kind == HOLDING and ground_speed > self.holding_max_speed:
+                continue
+            features = self.index.containing(latitude, longitude, kind)
+            if not features:
+                continue
+            feature = features[0]
+            if self.position is not None and self.position.kind == kind:
+                # Keep the same name across segment joints (taxiway A to the next piece of A)
+                feature = next((f for f in features if f.name == self.position.name), feature)
+            return GroundPosition(kind, feature.name), feature
+        return None, None
+
+    def update(self, gps, receive_time: Optional[float] = None, on_ground: bool = True) -> List[GroundEvent]:
+        """
+        Feed one fix (GPSData); return the events it completes (usually none).
+
+        Fixes with on_ground False count as off every area, so flying over a
+        runway does not "enter" it.
+        """
+        if gps is None:
+            return []
+        started = time.perf_counter()
+        now = time.time() if receive_time is None else receive_time
+        events: List[GroundEvent] = []
+        if on_ground:
+            position, feature = self._locate(gps.latitude, gps.longitude, gps.ground_speed)
+        else:
+            position, feature = None, None
+
+        if position == self.position:
+            # Still (or back) where we were; a short excursion is dropped
+            if self._has_pending:
+                self.stats['suppressed'] += 1
+                self._clear_pending()
+            if feature is not None:
+                self._feature = feature
+        else:
+            if not self._has_pending or position != self._pending:
+                if self._has_pending:
+                    self.stats['suppressed'] += 1
+                self._has_pending = True
+                self._pending, self._pending_since = position, now
+            self._pending_feature = feature
+            if now - self._pending_since >= self.min_dwell:
+                previous = self.position
+                self.position, self._feature = position, feature
+                self._clear_pending()
+                events.append(GroundEvent(now, position, previous, describe(position, previous)))
+                self.stats['events'] += 1
+
+        self.stats['fixes'] += 1
+        self.stats['time'] += time.perf_counter() - started
+        return events
+
+    def _clear_pending(self) -> None:
+        self._has_pending = False
+        self._pending = self._pending_feature = None
+
+    def reset(self) -> None:
+        """Forget the current position, e.g. after a reposition or disconnect."""
+        self.position = self._feature = None
+        self._clear_pending()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus the average cost of update() in microseconds."""
+        stats: Dict[str, Any] = dict(self.stats)
+        total = stats.pop('time')
+        stats['avg_us'] = total / stats['fixes'] * 1e6 if stats['fixes'] else 0.0
+        return stats
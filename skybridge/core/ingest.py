@@ -0,0 +1,210 @@
+import asyncio
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PeriodicJob:
+    """A callback the ingest loop runs at a fixed interval, scheduled against absolute loop time."""
+
+    def __init__(self, core: 'IngestCore', interval: float, callback: Callable[[], Any], name: str = ''):
+        self.core = core
+        self.interval = interval
+        self.callback = callback
+        self.name = name or getattr(callback, '__name__', 'job')
+        self._next_run = 0.0
+        self._handle: Optional[asyncio.Handle] = None
+        self._cancelled = False
+
+    def _start(self) -> None:
+        """Schedule the first run; must be called in the loop thread."""
+        if not self._cancelled:
+            self._next_run = self.core.loop.time()
+            self._handle = self.core.loop.call_soon(self._run)
+
+    def _run(self) -> None:
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"Error in {self.name}: {e}")
+        loop = self.core.loop
+        # Next deadline is relative to the previous one so the cadence does not drift;
+        # ticks missed while the loop was busy are skipped instead of run back to back
+        self._next_run = max(self._next_run + self.interval, loop.time())
+        if not self._cancelled:
+            self._handle = loop.call_at(self._next_run, self._run)
+
+    def cancel(self) -> None:
+        """Stop the job. Safe to call from any thread."""
+        self._cancelled = True
+        self.core.call_soon(self._cancel_handle)
+
+    def _cancel_handle(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+
+
+class BatchingDatagramProtocol(asyncio.DatagramProtocol):
+    """
+    Datagram protocol that hands every datagram queued on the socket to
+    on_batch in one call.
+
+    The transport delivers one datagram per wakeup; the rest of the queue is
+    drained straight from the (non-blocking) socket into a preallocated
+    memoryview pool, so a burst costs one callback instead of one per packet.
+    """
+
+    def __init__(self, sock: socket.socket, on_batch: Callable[[List[bytes]], None],
+                 batch_size: int, slot_size: int, stats: Dict[str, int]):
+        self.sock = sock
+        self.on_batch = on_batch
+        self.slot_size = slot_size
+        self.stats = stats
+        # One byte over slot_size, so a datagram of exactly slot_size bytes is told apart from a truncated one
+        self._slots = [memoryview(bytearray(slot_size + 1)) for _ in range(max(batch_size - 1, 0))]
+        # Set once the transport has closed the socket
+        self.closed = threading.Event()
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        batch = [data]
+        if len(data) > self.slot_size:
+            # Keep the same size limit as the pool so oversized datagrams are treated alike
+            self.stats['dropped'] += 1
+            batch = []
+        recv_into = self.sock.recv_into
+        for slot in self._slots:
+            try:
+                size = recv_into(slot)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # e.g. ICMP port unreachable reported on Windows; the next wakeup carries on
+                break
+            if size > self.slot_size:
+                # Too long for a slot: it was cut short, don't parse half a message
+                self.stats['dropped'] += 1
+                continue
+            batch.append(slot[:size].tobytes())
+        if not batch:
+            return
+        stats = self.stats
+        stats['datagrams'] += len(batch)
+        stats['batches'] += 1
+        if len(batch) > stats['max_batch']:
+            stats['max_batch'] = len(batch)
+        try:
+            self.on_batch(batch)
+        except Exception as e:
+            print(f"Error receiving data: {e}")
+
+    def error_received(self, exc: Exception) -> None:
+        print(f"Error receiving data: {exc}")
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed.set()
+
+
+class IngestCore:
+    """
+    Single asyncio event loop, run in one background thread, that owns UDP
+    receive and the periodic work around it (SimAPI write/read cycle,
+    traffic expiry, file checks).
+
+    Everything the loop runs happens on the loop thread. Other threads hand
+    work in with call_soon(), and get results out by subscribing to a topic;
+    Tk code wraps its callbacks with gui.tk_bridge.TkBridge so they run on
+    the Tk thread instead.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._started = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> None:
+        """Start the event loop thread (no-op if already running)."""
+        if self.running:
+            return
+        # Selector loop on every platform: the datagram protocol drains its socket directly,
+        # which the proactor loop on Windows does not allow
+        self.loop = asyncio.SelectorEventLoop()
+        self._started.clear()
+        self.thread = threading.Thread(target=self._run_loop, name="ingest-loop", daemon=True)
+        self.thread.start()
+        self._started.wait()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def stop(self) -> None:
+        """Stop the event loop and wait for its thread to exit."""
+        if not self.running:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if threading.current_thread() is not self.thread:
+            self.thread.join()
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self.thread
+
+    def call_soon(self, callback: Callable, *args) -> None:
+        """Run callback(*args) on the loop thread. Safe to call from any thread."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def add_periodic(self, interval: float, callback: Callable[[], Any], name: str = '') -> PeriodicJob:
+        """Run callback every interval seconds on the loop thread, starting right away."""
+        job = PeriodicJob(self, interval, callback, name)
+        self.call_soon(job._start)
+        return job
+
+    def open_udp_endpoint(self, sock: socket.socket, on_batch: Callable[[List[bytes]], None],
+                          batch_size: int, slot_size: int, stats: Dict[str, int]) -> asyncio.DatagramTransport:
+        """Attach a bound, non-blocking UDP socket to the loop; on_batch runs on the loop thread."""
+        protocol = BatchingDatagramProtocol(sock, on_batch, batch_size, slot_size, stats)
+        future = asyncio.run_coroutine_threadsafe(
+            self.loop.create_datagram_endpoint(lambda: protocol, sock=sock), self.loop)
+        transport, _ = future.result(timeout=5.0)
+        return transport
+
+    def close_udp_endpoint(self, transport: asyncio.DatagramTransport, timeout: float = 5.0) -> None:
+        """
+        Close a transport from open_udp_endpoint on the loop thread and wait
+        until it has closed its socket, so the loop can be stopped right after.
+        """
+        protocol = transport.get_protocol()
+        if not self.running:
+            # Nothing left to run the close on; the socket goes with the loop
+            protocol.sock.close()
+            return
+        self.call_soon(transport.close)
+        if not self.in_loop_thread():
+            protocol.closed.wait(timeout)
+
+    def subscribe(self, topic: str, callback: Callable) -> None:
+        """Call callback(*args) on the loop thread whenever topic is published."""
+        # Copy on write so publish() never iterates a list being changed from another thread
+        self._subscribers[topic] = self._subscribers.get(topic, []) + [callback]
+
+    def unsubscribe(self, topic: str, callback: Callable) -> None:
+        self._subscribers[topic] = [cb for cb in self._subscribers.get(topic, []) if cb != callback]
+
+    def publish(self, topic: str, *args) -> None:
+        """Deliver args to every subscriber of topic; meant to be called on the loop thread."""
+        for callback in self._subscribers.get(topic, ()):
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in {topic} subscriber: {e}")
@@ -0,0 +1,180 @@
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, Optional
+
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+# Sleep until this close to a deadline, then yield until it passes; sleeps overshoot by up to a
+# scheduler tick, so waking early and spinning the last stretch keeps sends on time
+SPIN_WINDOW = 0.002  # seconds
+# Lateness histogram for the percentiles: fixed-width buckets, the last one open-ended
+HISTOGRAM_BUCKET = 10e-6  # seconds
+HISTOGRAM_BUCKETS = 10000  # up to 100 ms; anything later counts in the last bucket
+
+
+class JitterStats:
+    """
+    Lateness of each send against its deadline, in seconds.
+
+    Memory does not grow with the replay: only the count, sum, maximum and
+    last value are kept, plus a histogram of HISTOGRAM_BUCKET wide buckets
+    that the percentiles are read from (to within one bucket).
+    """
+
+    def __init__(self):
+        self.histogram = array('L', bytes(array('L').itemsize * HISTOGRAM_BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.sent = 0
+        self.started = 0.0
+        self.finished = 0.0
+
+    def add(self, lateness: float) -> None:
+        self.count += 1
+        self.total += lateness
+        if lateness > self.max or self.count == 1:
+            self.max = lateness
+        self.last = lateness
+        bucket = int(lateness / HISTOGRAM_BUCKET)
+        self.histogram[min(max(bucket, 0), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Lateness that fraction of the sends were no later than; the upper edge of its bucket, at most max."""
+        rank = min(self.count - 1, int(self.count * fraction))
+        seen = 0
+        for bucket, number in enumerate(self.histogram):
+            seen += number
+            if seen > rank:
+                if bucket == HISTOGRAM_BUCKETS - 1:
+                    return self.max
+                return min((bucket + 1) * HISTOGRAM_BUCKET, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Send count and rate plus lateness mean, percentiles and maximum (ms); drift is the last send's."""
+        elapsed = self.finished - self.started
+        result = {'sent': self.sent, 'elapsed': elapsed, 'per_second': self.sent / elapsed if elapsed > 0 else 0.0}
+        if self.count:
+            result.update({
+                'mean_ms': self.total / self.count * 1e3,
+                'p50_ms': self.percentile(0.5) * 1e3,
+                'p99_ms': self.percentile(0.99) * 1e3,
+                'max_ms': self.max * 1e3,
+                'drift_ms': self.last * 1e3,
+            })
+        return result
+
+    def report(self) -> str:
+        summary = self.summary()
+        text = f"{summary['sent']} sends in {summary['elapsed']:.1f} s ({summary['per_second']:,.0f}/s)"
+        if 'mean_ms' in summary:
+            text += (f", lateness mean {summary['mean_ms']:.3f} ms, p50 {summary['p50_ms']:.3f} ms, "
+                     f"p99 {summary['p99_ms']:.3f} ms, max {summary['max_ms']:.3f} ms, "
+                     f"final drift {summary['drift_ms']:.3f} ms")
+        return text
+
+
+class ReplayScheduler:
+    """
+    Replays timestamped samples: send(number) is called for each sample at
+    start + (times[number] - times[0]) / rate. times may be any iterable in
+    time order, such as a generator that merges several streams lazily;
+    the next sample is only taken from it once the previous one is sent.
+
+    Deadlines are absolute on the monotonic perf_counter clock, so the cost
+    of sending and any oversleep are not added up from one sample to the
+    next: an hour-long replay ends when it should, and each sample goes out
+    at its recorded spacing. A sample that could not be sent in time is sent
+    at once, late, and the lateness goes into stats.
+
+    set_rate() may be called from any thread during a replay; playback
+    continues from the current sample at the new rate. In max_throughput
+    mode samples are sent back to back, without waiting, for load testing.
+    """
+
+    def __init__(self, times: Iterable[float], send: Callable[[int], None], rate: float = 1.0,
+                 max_throughput: bool = False, progress: Optional[Callable[[int], None]] = None,
+                 progress_interval: float = 1.0):
+        self.times = times
+        self.send = send
+        self.max_throughput = max_throughput
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.stats = JitterStats()
+        self._rate = self._checked_rate(rate)
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _checked_rate(rate: float) -> float:
+        if not MIN_RATE <= rate <= MAX_RATE:
+            raise ValueError(f"playback rate must be between {MIN_RATE}x and {MAX_RATE:g}x, not {rate}")
+        return rate
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float) -> None:
+        self._rate = self._checked_rate(rate)
+
+    def stop(self) -> None:
+        """End the replay before the next sample. Safe to call from any thread."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def _wait_until(self, deadline: float) -> None:
+        clock = time.perf_counter
+        while True:
+            remaining = deadline - clock()
+            if remaining <= 0 or self._stop.is_set():
+                return
+            if remaining > SPIN_WINDOW:
+                self._stop.wait(remaining - SPIN_WINDOW)
+            else:
+                time.sleep(0)
+
+    def run(self) -> JitterStats:
+        """Replay every sample (or until stop()); returns the timing statistics."""
+        clock = time.perf_counter
+        stats = self.stats
+        times = self.times
+        send = self.send
+        add = stats.add
+        rate = self._rate
+        stats.started = next_progress = clock()
+        # Deadlines are measured from an anchor: sample time anchor_time is due at anchor_clock.
+        # A rate change moves the anchor to the previous sample, so its deadline stays put.
+        anchor_clock = stats.started
+        anchor_time = previous = None
+        deadline = anchor_clock
+        try:
+            for number, due in enumerate(times):
+                if self._stop.is_set():
+                    break
+                if self.max_throughput:
+                    send(number)
+                else:
+                    if anchor_time is None:
+                        anchor_time = due
+                    elif self._rate != rate:
+                        anchor_clock, anchor_time, rate = deadline, previous, self._rate
+                    deadline = anchor_clock + (due - anchor_time) / rate
+                    self._wait_until(deadline)
+                    if self._stop.is_set():
+                        break
+                    add(clock() - deadline)
+                    send(number)
+                    previous = due
+                stats.sent += 1
+                if self.progress is not None and clock() >= next_progress:
+                    self.progress(number)
+                    next_progress = clock() + self.progress_interval
+        finally:
+            stats.finished = clock()
+        return stats
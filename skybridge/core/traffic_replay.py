@@ -0,0 +1,166 @@
+import heapq
+import math
+import socket
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from core.replay import JitterStats, ReplayScheduler
+from data.udp_parser import DEFAULT_SIMULATOR_NAME
+from utils.geo_utils import DEG_TO_RAD, EARTH_RADIUS
+
+METERS_TO_FEET = 3.28084
+MPS_TO_KNOTS = 1.943844
+# Targets at or above this ground speed are sent as airborne
+AIRBORNE_SPEED_KT = 40.0
+# Synthetic targets get consecutive ICAO addresses from here (a block no real aircraft uses)
+ICAO_BASE = 0xF00000
+CALLSIGN_PREFIX = 'RPL'
+
+# (time, longitude, latitude, altitude m, track, ground speed m/s): the GPS channel layout
+Sample = Tuple[float, float, float, float, float, float]
+
+
+class TrafficTrack:
+    """
+    One recorded flight as XTRAFFIC needs it: times from the first sample
+    in seconds, positions, altitude in feet, speed in knots and the
+    vertical speed between samples in feet per minute.
+    """
+    __slots__ = ('times', 'lats', 'lons', 'altitudes_ft', 'tracks', 'speeds_kt', 'vertical_speeds')
+
+    def __init__(self, samples: Iterable[Sample]):
+        self.times = array('d')
+        self.lats = array('d')
+        self.lons = array('d')
+        self.altitudes_ft = array('d')
+        self.tracks = array('d')
+        self.speeds_kt = array('d')
+        self.vertical_speeds = array('d')
+        first_time = last_time = last_altitude = None
+        for receive_time, longitude, latitude, altitude, track, ground_speed in samples:
+            if first_time is None:
+                first_time = receive_time
+            elif receive_time <= last_time:
+                continue  # repeated or out of order: keeps the stream time-ordered
+            altitude_ft = altitude * METERS_TO_FEET
+            vertical_speed = 0.0 if last_altitude is None else \
+                (altitude_ft - last_altitude) / (receive_time - last_time) * 60.0
+            self.times.append(receive_time - first_time)
+            self.lats.append(latitude)
+            self.lons.append(longitude)
+            self.altitudes_ft.append(altitude_ft)
+            self.tracks.append(track)
+            self.speeds_kt.append(ground_speed * MPS_TO_KNOTS)
+            self.vertical_speeds.append(vertical_speed)
+            last_time, last_altitude = receive_time, altitude_ft
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1] if self.times else 0.0
+
+
+class TrafficTarget(NamedTuple):
+    """One replayed aircraft: a track under its own identity, shifted in time and position."""
+    track: TrafficTrack
+    icao_address: str
+    callsign: str
+    time_shift: float = 0.0  # seconds after the start of the replay
+    lat_offset: float = 0.0  # degrees
+    lon_offset: float = 0.0  # degrees
+
+
+def fleet(tracks: List[TrafficTrack], copies: int = 1, time_shift: float = 0.0,
+          spread: float = 0.0) -> List[TrafficTarget]:
+    """
+    Targets for every track, each flown copies times. Copy k of a track
+    starts k * time_shift seconds later and is moved onto a square grid
+    spread meters apart (copy 0 in place). Every target gets its own ICAO
+    address and callsign.
+    """
+    targets = []
+    side = math.ceil(math.sqrt(copies))
+    meters_per_degree = EARTH_RADIUS * DEG_TO_RAD
+    for track in tracks:
+        if not len(track):
+            continue
+        cos_lat = max(math.cos(track.lats[0] * DEG_TO_RAD), 1e-6)
+        for copy in range(copies):
+            number = len(targets)
+            east, north = (copy % side) * spread, (copy // side) * spread
+            targets.append(TrafficTarget(track, f"{ICAO_BASE + number:06X}", f"{CALLSIGN_PREFIX}{number:04d}",
+                                         copy * time_shift, north / meters_per_degree,
+                                         east / (meters_per_degree * cos_lat)))
+    return targets
+
+
+class TrafficReplay:
+    """
+    Replays many targets as one time-ordered stream of XTRAFFIC datagrams
+    over a single socket.
+
+    A heap holds the next sample of every target, keyed by when it is due,
+    so merging N tracks costs O(log N) per datagram and memory for one
+    entry per target, however long the tracks. Timing (rate, max
+    throughput, jitter statistics) is left to ReplayScheduler.
+    """
+
+    def __init__(self, targets: List[TrafficTarget], simulator_name: str = DEFAULT_SIMULATOR_NAME):
+        self.targets = targets
+        self._prefixes = [f"XTRAFFIC{simulator_name},{target.icao_address},".encode('utf-8') for target in targets]
+        self._suffixes = [f",{target.callsign}".encode('utf-8') for target in targets]
+        self._current: Tuple[int, int] = (0, 0)
+        self.scheduler: Optional[ReplayScheduler] = None
+
+    @property
+    def duration(self) -> float:
+        return max((target.time_shift + target.track.duration for target in self.targets), default=0.0)
+
+    @property
+    def messages(self) -> int:
+        return sum(len(target.track) for target in self.targets)
+
+    def times(self) -> Iterator[float]:
+        """
+        Due time of each datagram in order. While a time is being handled,
+        datagram() is the datagram due then; the heap moves on to the next
+        one when the following time is asked for.
+        """
+        heap = [(target.time_shift, number, 0) for number, target in enumerate(self.targets) if len(target.track)]
+        heapq.heapify(heap)
+        targets = self.targets
+        while heap:
+            due, number, index = heap[0]
+            self._current = (number, index)
+            yield due
+            index += 1
+            target = targets[number]
+            if index < len(target.track):
+                heapq.heapreplace(heap, (target.time_shift + target.track.times[index], number, index))
+            else:
+                heapq.heappop(heap)
+
+    def datagram(self) -> bytes:
+        number, index = self._current
+        target = self.targets[number]
+        track = target.track
+        speed = track.speeds_kt[index]
+        return b"%s%.6f,%.6f,%.0f,%.0f,%d,%.1f,%.0f%s" % (
+            self._prefixes[number], track.lats[index] + target.lat_offset, track.lons[index] + target.lon_offset,
+            track.altitudes_ft[index], track.vertical_speeds[index], speed >= AIRBORNE_SPEED_KT,
+            track.tracks[index], speed, self._suffixes[number])
+
+    def run(self, sock: socket.socket, address: Tuple[str, int], rate: float = 1.0, max_throughput: bool = False,
+            progress=None, progress_interval: float = 1.0) -> JitterStats:
+        """Send every datagram to address at its time (scaled by rate); stop() ends it early."""
+        sendto = sock.sendto
+        datagram = self.datagram
+        self.scheduler = ReplayScheduler(self.times(), lambda number: sendto(datagram(), address), rate,
+                                         max_throughput, progress=progress, progress_interval=progress_interval)
+        return self.scheduler.run()
+
+    def stop(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.stop()
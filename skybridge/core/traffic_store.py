@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Traffic not heard from for this long is dropped
+TRAFFIC_TIMEOUT = 30.0  # seconds
+# Width of one expiry bucket; targets are dropped between TRAFFIC_TIMEOUT and
+# TRAFFIC_TIMEOUT + EXPIRY_BUCKET seconds after their last update
+EXPIRY_BUCKET = 1.0  # seconds
+# Removals remembered for changes_since(); older consumers get a full resync
+REMOVAL_HISTORY = 4096
+
+
+class TrafficDelta(NamedTuple):
+    """What changed in a TrafficStore after a given generation."""
+    generation: int                  # pass this to the next changes_since() call
+    updated: List[Tuple[str, Any]]   # (icao, record) added or updated, newest first
+    removed: List[str]               # icao addresses dropped
+    full: bool                       # True: updated holds every target, drop anything not in it
+
+
+class TrafficStore:
+    """
+    Latest record per traffic target, with bucketed expiry and change tracking.
+
+    Each ICAO address keeps the same slot index for as long as it is present,
+    so consumers can key their own per-target data on it. Targets are filed
+    in one-second buckets by receive time (a timing wheel), so expiry only
+    visits buckets that are old enough instead of scanning every target.
+
+    Every change bumps generation. changes_since(generation) returns only
+    the targets added, updated or removed after that point, so consumers can
+    update incrementally. The store is written by the ingest loop and may be
+    read from other threads; a lock is held for the length of each call.
+    """
+
+    def __init__(self, timeout: float = TRAFFIC_TIMEOUT, bucket_width: float = EXPIRY_BUCKET,
+                 removal_history: int = REMOVAL_HISTORY):
+        self.timeout = timeout
+        self.bucket_width = bucket_width
+        self.removal_history = removal_history
+        self.generation = 0
+        self._lock = threading.Lock()
+
+        # Stable slots: parallel lists indexed by slot number, reused through a free list
+        self._slot_of: Dict[str, int] = {}
+        self._icao: List[Optional[str]] = []
+        self._records: List[Any] = []
+        self._bucket: List[int] = []
+        self._free: List[int] = []
+
+        # Timing wheel: bucket number -> icao addresses last heard in that bucket
+        self._wheel: Dict[int, Set[str]] = {}
+
+        # icao -> generation of the last change, oldest first
+        self._changed: 'OrderedDict[str, int]' = OrderedDict()
+        self._removed: 'OrderedDict[str, int]' = OrderedDict()
+        self._history_floor = 0  # removals up to this generation have been forgotten
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, icao: str) -> bool:
+        return icao in self._slot_of
+
+    def get(self, icao: str) -> Optional[Any]:
+        slot = self._slot_of.get(icao)
+        return None if slot is None else self._records[slot]
+
+    def slot(self, icao: str) -> Optional[int]:
+        """Slot index of a target, stable until it is removed."""
+        return self._slot_of.get(icao)
+
+    def update(self, icao: str, record: Any, receive_time: float) -> None:
+        """Store the latest record for a target."""
+        bucket = int(receive_time // self.bucket_width)
+        with self._lock:
+            self.generation += 1
+            slot = self._slot_of.get(icao)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                    self._icao[slot] = icao
+                    self._records[slot] = record
+                    self._bucket[slot] = bucket
+                else:
+                    slot = len(self._icao)
+                    self._icao.append(icao)
+                    self._records.append(record)
+                    self._bucket.append(bucket)
+                self._slot_of[icao] = slot
+                self._wheel.setdefault(bucket, set()).add(icao)
+                self._removed.pop(icao, None)
+            else:
+                self._records[slot] = record
+                old_bucket = self._bucket[slot]
+                if bucket != old_bucket:
+                    self._unfile(icao, old_bucket)
+                    self._wheel.setdefault(bucket, set()).add(icao)
+                    self._bucket[slot] = bucket
+            self._changed[icao] = self.generation
+            self._changed.move_to_end(icao)
+
+    def _unfile(self, icao: str, bucket: int) -> None:
+        members = self._wheel.get(bucket)
+        if members is not None:
+            members.discard(icao)
+            if not members:
+                del self._wheel[bucket]
+
+    def remove(self, icao: str) -> bool:
+        """Drop a target; return False if it was not present."""
+        with self._lock:
+            if icao not in self._slot_of:
+                return False
+            self._unfile(icao, self._bucket[self._slot_of[icao]])
+            self._remove(icao)
+            return True
+
+    def _remove(self, icao: str) -> None:
+        self.generation += 1
+        slot = self._slot_of.pop(icao)
+        self._icao[slot] = None
+        self._records[slot] = None
+        self._free.append(slot)
+        self._changed.pop(icao, None)
+        self._removed[icao] = self.generation
+        while len(self._removed) > self.removal_history:
+            _, self._history_floor = self._removed.popitem(last=False)
+
+    def expire(self, now: float) -> int:
+        """Drop targets whose whole bucket is older than the timeout; return how many were dropped."""
+        limit = int((now - self.timeout) // self.bucket_width)
+        dropped = 0
+        with self._lock:
+            for bucket in [bucket for bucket in self._wheel if bucket < limit]:
+                for icao in self._wheel.pop(bucket):
+                    self._remove(icao)
+                    dropped += 1
+        return dropped
+
+    def changes_since(self, generation: int) -> TrafficDelta:
+        """Targets added, updated or removed after generation."""
+        with self._lock:
+            if generation < self._history_floor:
+                # Too far behind to list removals; hand over everything
+                updated = [(icao, self._records[slot]) for icao, slot in self._slot_of.items()]
+                return TrafficDelta(self.generation, updated, [], True)
+            updated = []
+            for icao, changed in reversed(self._changed.items()):
+                if changed <= generation:
+                    break
+                updated.append((icao, self._records[self._slot_of[icao]]))
+            removed = []
+            for icao, changed in reversed(self._removed.items()):
+                if changed <= generation:
+                    break
+                removed.append(icao)
+            return TrafficDelta(self.generation, updated, removed, False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """New dict of icao -> latest record."""
+        with self._lock:
+            records = self._records
+            return {icao: records[slot] for icao, slot in self._slot_of.items()}
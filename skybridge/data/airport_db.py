@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Bumped whenever the table layout changes; older files are rejected
+FORMAT_VERSION = 1
+
+DATABASE_SUFFIXES = ('.sqlite', '.db')
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE airports (
+    icao TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    min_lat REAL NOT NULL,
+    min_lon REAL NOT NULL,
+    max_lat REAL NOT NULL,
+    max_lon REAL NOT NULL,
+    layout BLOB NOT NULL
+);
+CREATE INDEX airports_lat ON airports (min_lat, max_lat);
+"""
+
+
+class AirportSummary(NamedTuple):
+    """One airport of the database without its layout."""
+    icao: str
+    name: str
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+
+def layout_bounds(layout: Dict[str, Any]) -> Optional[Tuple[float, float, float, float]]:
+    """(min_lat, min_lon, max_lat, max_lon) of every coordinate in a layout, or None if it has none."""
+    coords = []
+    for runway in layout.get('runways', []):
+        coords.extend((runway['threshold1_coords'], runway['threshold2_coords']))
+    for taxiway in layout.get('taxiways', []):
+        for segment in taxiway.get('segments', []):
+            coords.extend((segment['start'], segment['end']))
+    for key in ('parking_positions', 'holding_points'):
+        coords.extend(item['coords'] for item in layout.get(key, []))
+    if not coords:
+        return None
+    lats = [coord[0] for coord in coords]
+    lons = [coord[1] for coord in coords]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+def is_airport_database(path: str) -> bool:
+    return path.lower().endswith(DATABASE_SUFFIXES)
+
+
+def write_airport_database(path: str, layouts: Iterable[Dict[str, Any]], source: str = '') -> int:
+    """
+    Write airport layouts (the OSMAirportExtractor format, keyed by their
+    'icao') to a new database at path and return how many were stored.
+    Layouts without an ICAO code or without any coordinates are skipped.
+
+    The database is built in a temporary file next to path and moved over
+    it when complete, so tools reading the old database are never handed a
+    half-written one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    count = 0
+    try:
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.executescript(_SCHEMA)
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('format_version', str(FORMAT_VERSION)),
+                ('source', source),
+                ('built', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+            ])
+            for layout in layouts:
+                icao = (layout.get('icao') or '').upper()
+                bounds = layout_bounds(layout)
+                if not icao or bounds is None:
+                    continue
+                blob = zlib.compress(json.dumps(layout, separators=(',', ':')).encode('utf-8'), 9)
+                connection.execute("INSERT OR REPLACE INTO airports VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   (icao, layout.get('name', ''), *bounds, blob))
+                count += 1
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+class AirportDatabase:
+    """
+    Read access to an airport database written by write_airport_database:
+    every aerodrome of a region, each stored as its compressed layout JSON.
+
+    Opening the database reads nothing but its header, and a layout is only
+    decompressed when asked for by ICAO code, so loading any airport takes
+    milliseconds and no network.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError as e:
+            self._connection.close()
+            raise ValueError(f"{path} is not an airport database: {e}")
+        if meta.get('format_version') != str(FORMAT_VERSION):
+            self._connection.close()
+            raise ValueError(f"{path} has airport database format {meta.get('format_version')}, "
+                             f"expected {FORMAT_VERSION}")
+        self.source = meta.get('source', '')
+        self.built = meta.get('built', '')
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'AirportDatabase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM airports").fetchone()[0]
+
+    def __contains__(self, icao: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM airports WHERE icao = ?",
+                                        (icao.upper(),)).fetchone() is not None
+
+    def icaos(self) -> List[str]:
+        return [row[0] for row in self._connection.execute("SELECT icao FROM airports ORDER BY icao")]
+
+    def get(self, icao: str) -> Optional[Dict[str, Any]]:
+        """Layout of one airport, or None if the database does not have it."""
+        row = self._connection.execute("SELECT layout FROM airports WHERE icao = ?",
+                                       (icao.upper(),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def summary(self, icao: str) -> Optional[AirportSummary]:
+        row = self._connection.execute(
+            "SELECT icao, name, min_lat, min_lon, max_lat, max_lon FROM airports WHERE icao = ?",
+            (icao.upper(),)).fetchone()
+        return AirportSummary(*row) if row is not None else None
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[AirportSummary]:
+        """Airports whose bounds overlap the box, by ICAO code."""
+        rows = self._connection.execute(
+            "SELECT icao, name, min_lat, min_lon, max_lat, max_lon FROM airports "
+            "WHERE min_lat <= ? AND max_lat >= ? AND min_lon <= ? AND max_lon >= ? ORDER BY icao",
+            (max_lat, min_lat, max_lon, min_lon))
+        return [AirportSummary(*row) for row in rows]
+
+
+def load_layout(path: str, icao: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Airport layout from a layout JSON file, or from an airport database
+    when path is one (then icao is required).
+
+    Raises:
+        KeyError: if the database has no airport icao
+        ValueError: if path is a database and no icao was given
+    """
+    if not is_airport_database(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    if not icao:
+        raise ValueError("an ICAO code is needed to load from an airport database")
+    with AirportDatabase(path) as database:
+        layout = database.get(icao)
+    if layout is None:
+        raise KeyError(f"{icao.upper()} is not in {path}")
+    return layout
@@ -0,0 +1,299 @@
+import os
+import queue
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from data.udp_parser import AIRCRAFT, ATTITUDE, GPS, TRAFFIC
+
+# A recording is a directory holding one <channel>.bin file per message
+# kind plus a sparse <channel>.idx time index next to it.
+#
+# <channel>.bin: a HEADER_SIZE byte header, then fixed-width little-endian
+# records, one per received message, in arrival order. Every record starts
+# with the receive time as a float64. The header names the record layout
+# (a struct format and its field names), so readers need no other schema.
+#
+# <channel>.idx: an INDEX_HEADER, then one (time, record number) entry for
+# every INDEX_STRIDE-th record, so a reader can find a time without
+# touching more than one stride of the data file.
+
+MAGIC = b'SKYREC\x00\x01'
+INDEX_MAGIC = b'SKYIDX\x00\x01'
+FORMAT_VERSION = 1
+HEADER_SIZE = 256
+INDEX_STRIDE = 1024  # records per index entry
+RECORDING_SUFFIX = '.skyrec'
+
+# magic, version, record size, channel, struct format, start time, field names
+_HEADER = struct.Struct('<8sHH16s32sd188s')  # HEADER_SIZE bytes
+# magic, version, stride
+INDEX_HEADER = struct.Struct('<8sHI')
+INDEX_ENTRY = struct.Struct('<dQ')
+
+# Buffered records are handed to the writer thread at this size or age
+FLUSH_BYTES = 64 * 1024
+FLUSH_INTERVAL = 1.0  # seconds
+# Blocks waiting for the writer thread; past this, samples are dropped instead of piling up in memory
+MAX_PENDING_BLOCKS = 256
+
+
+class Channel(NamedTuple):
+    """Record layout of one message kind."""
+    name: str
+    format: str  # struct format, starting with '<d' for the receive time
+    fields: Tuple[str, ...]
+
+
+CHANNELS: Dict[str, Channel] = {
+    GPS: Channel(GPS, '<dddfff', ('time', 'longitude', 'latitude', 'altitude', 'track', 'ground_speed')),
+    ATTITUDE: Channel(ATTITUDE, '<dfff', ('time', 'true_heading', 'pitch', 'roll')),
+    TRAFFIC: Channel(TRAFFIC, '<d8sddffBff16s',
+                     ('time', 'icao_address', 'latitude', 'longitude', 'altitude_ft', 'vertical_speed_ft_min',
+                      'airborne_flag', 'heading_true', 'velocity_knots', 'callsign')),
+    AIRCRAFT: Channel(AIRCRAFT, '<d16s16s16s16s16s16s',
+                      ('time', 'id', 'type_id', 'registration', 'callsign', 'icao24', 'FlightNumber')),
+}
+
+
+def pack_header(channel: Channel, start_time: float) -> bytes:
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, struct.calcsize(channel.format),
+                          channel.name.encode('ascii'), channel.format.encode('ascii'), start_time,
+                          ','.join(channel.fields).encode('ascii'))
+    return header.ljust(HEADER_SIZE, b'\x00')
+
+
+def unpack_header(data: bytes) -> Tuple[Channel, float, int]:
+    """(channel, start time, record size) from the first HEADER_SIZE bytes of a channel file."""
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated recording header")
+    magic, version, record_size, name, record_format, start_time, fields = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a flight recording channel file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported recording format version {version}")
+    channel = Channel(name.rstrip(b'\x00').decode('ascii'), record_format.rstrip(b'\x00').decode('ascii'),
+                      tuple(fields.rstrip(b'\x00').decode('ascii').split(',')))
+    if struct.calcsize(channel.format) != record_size:
+        raise ValueError("record size does not match the record format")
+    return channel, start_time, record_size
+
+
+def _text(value: str) -> bytes:
+    return value.encode('ascii', 'replace')
+
+
+class _ChannelWriter:
+    """Files of one channel; used by the writer thread only."""
+
+    def __init__(self, directory: str, channel: Channel, start_time: float):
+        self.record_size = struct.calcsize(channel.format)
+        self.data = open(os.path.join(directory, channel.name + '.bin'), 'wb')
+        self.data.write(pack_header(channel, start_time))
+        self.index = open(os.path.join(directory, channel.name + '.idx'), 'wb')
+        self.index.write(INDEX_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, INDEX_STRIDE))
+        self.records = 0
+
+    def write(self, block: bytes) -> None:
+        self.data.write(block)
+        size = self.record_size
+        count = len(block) // size
+        # Index entries for the records of this block that fall on a stride boundary
+        first = -self.records % INDEX_STRIDE
+        for number in range(first, count, INDEX_STRIDE):
+            (record_time,) = struct.unpack_from('<d', block, number * size)
+            self.index.write(INDEX_ENTRY.pack(record_time, self.records + number))
+        self.records += count
+
+    def flush(self) -> None:
+        self.data.flush()
+        self.index.flush()
+
+    def close(self) -> None:
+        self.data.close()
+        self.index.close()
+
+
+class FlightRecorder:
+    """
+    Records every parsed message into a binary recording directory.
+
+    record() and record_batch() are meant for the ingest loop: each sample
+    is packed with a precompiled struct into an in-memory buffer for its
+    channel, which costs about a microsecond. Buffers are handed to a
+    background writer thread once they reach flush_bytes or are older than
+    flush_interval seconds, so the loop never waits for the disk. If the
+    writer falls far behind, samples are dropped and counted rather than
+    buffered without bound.
+
+    close() (from the loop thread, or any thread once recording has
+    stopped) flushes what is left and waits for the writer to finish. As
+    that wait is on the disk, the loop should instead call finish(), which
+    only hands the rest to the writer, and leave wait() to another thread.
+    """
+
+    def __init__(self, directory: str, flush_bytes: int = FLUSH_BYTES, flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.start_time = time.time()
+        self.stats: Dict[str, int] = {
+            'samples': 0,   # records packed
+            'bytes': 0,     # record bytes handed to the writer
+            'flushes': 0,   # blocks handed to the writer
+            'dropped': 0,   # samples lost because the writer fell behind
+            'skipped': 0,   # invalid messages (None records, values the format cannot hold), not recorded
+        }
+        self._structs = {kind: struct.Struct(channel.format) for kind, channel in CHANNELS.items()}
+        self._buffers: Dict[str, bytearray] = {kind: bytearray() for kind in CHANNELS}
+        self._buffered = 0
+        self._last_flush = self.start_time
+        self._queue: 'queue.Queue[Optional[Tuple[str, bytes]]]' = queue.Queue(MAX_PENDING_BLOCKS)
+        self._closed = False
+        self._stop_lock = threading.Lock()
+        self._stopping = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._writers = {kind: _ChannelWriter(directory, channel, self.start_time)
+                         for kind, channel in CHANNELS.items()}
+        self._thread = threading.Thread(target=self._write_loop, name="flight-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, kind: str, record: Any, receive_time: float) -> None:
+        """Buffer one parsed message (kind, record as returned by DatagramParser.parse)."""
+        if record is None:
+            self.stats['skipped'] += 1
+            return
+        buffer = self._buffers.get(kind)
+        if buffer is None:
+            return
+        try:
+            if kind == GPS:
+                packed = self._structs[GPS].pack(receive_time, record.longitude, record.latitude, record.altitude,
+                                                 record.track, record.ground_speed)
+            elif kind == TRAFFIC:
+                packed = self._structs[TRAFFIC].pack(
+                    receive_time, _text(record.icao_address), record.latitude, record.longitude, record.altitude_ft,
+                    record.vertical_speed_ft_min, record.airborne_flag, record.heading_true, record.velocity_knots,
+                    _text(record.callsign))
+            elif kind == ATTITUDE:
+                packed = self._structs[ATTITUDE].pack(receive_time, record.true_heading, record.pitch, record.roll)
+            else:
+                packed = self._structs[AIRCRAFT].pack(
+                    receive_time, _text(record.id), _text(record.type_id), _text(record.registration),
+                    _text(record.callsign), _text(record.icao24), _text(record.FlightNumber))
+        except (struct.error, OverflowError):
+            # e.g. a value beyond the range of a float32 field; one bad sample must not stop the batch
+            self.stats['skipped'] += 1
+            return
+        buffer += packed
+        self.stats['samples'] += 1
+        self._buffered += len(packed)
+        if self._buffered >= self.flush_bytes or receive_time - self._last_flush >= self.flush_interval:
+            self.flush(receive_time)
+
+    def record_batch(self, messages: List[Tuple[str, Any]], receive_time: float) -> None:
+        """Buffer every message of a parsed batch with the batch's receive time."""
+        for kind, record in messages:
+            self.record(kind, record, receive_time)
+
+    def flush_if_due(self, now: float) -> None:
+        """Hand buffered records to the writer if they are older than flush_interval."""
+        if self._buffered and now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        """Hand every buffered record to the writer thread."""
+        self._last_flush = time.time() if now is None else now
+        if not self._buffered or self._closed:
+            return
+        for kind, buffer in self._buffers.items():
+            if not buffer:
+                continue
+            block = bytes(buffer)
+            buffer.clear()
+            try:
+                self._queue.put_nowait((kind, block))
+            except queue.Full:
+                self.stats['dropped'] += len(block) // self._structs[kind].size
+                continue
+            self.stats['bytes'] += len(block)
+            self.stats['flushes'] += 1
+        self._buffered = 0
+
+    def _write_loop(self) -> None:
+        writers = self._writers
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                kind, block = item
+                writers[kind].write(block)
+                if self._queue.empty():
+                    for writer in writers.values():
+                        writer.flush()
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    def finish(self) -> None:
+        """Hand everything buffered to the writer and stop recording; does not wait for the disk."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+
+    def wait(self) -> None:
+        """
+        Wait until the writer has written everything handed to it and closed
+        the files; call after finish(), from any thread but the ingest loop.
+        """
+        with self._stop_lock:
+            if not self._stopping:
+                self._stopping = True
+                # Blocks while the writer is behind, which is why this is not for the loop
+                self._queue.put(None)
+        self._thread.join()
+
+    def close(self) -> None:
+        """Write out everything buffered and close the files."""
+        self.finish()
+        self.wait()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+def write_recording(directory: str, blocks: Dict[str, bytes], start_time: float) -> None:
+    """
+    Write a complete recording at once from already packed records: for each
+    kind, the records of its channel (CHANNELS format) back to back in time
+    order. Channels without records get empty files, as with FlightRecorder.
+
+    The recording is assembled in a temporary directory next to directory
+    and renamed into place, so a half-written one never carries its name.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix='.' + os.path.basename(directory) + '.', dir=parent)
+    try:
+        for kind, channel in CHANNELS.items():
+            writer = _ChannelWriter(tmp_path, channel, start_time)
+            try:
+                writer.write(blocks.get(kind, b''))
+            finally:
+                writer.close()
+        os.rename(tmp_path, directory)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def new_recording_path(directory: str = "output_recorder") -> str:
+    """Path for a new recording in directory, named after the current local time."""
+    return os.path.join(directory, f"flight_{time.strftime('%Y%m%d-%H%M%S')}{RECORDING_SUFFIX}")
@@ -0,0 +1,251 @@
+import bisect
+import glob
+import heapq
+import mmap
+import os
+import struct
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from data.flight_recorder import HEADER_SIZE, INDEX_ENTRY, INDEX_HEADER, INDEX_MAGIC, unpack_header
+
+try:
+    import numpy as np
+except ImportError:  # records()/column() need numpy; seeking and iteration do not
+    np = None
+
+# struct format codes and the NumPy types they are stored as
+_NUMPY_TYPES = {'d': '<f8', 'f': '<f4', 'q': '<i8', 'Q': '<u8', 'i': '<i4', 'I': '<u4',
+                'h': '<i2', 'H': '<u2', 'b': 'i1', 'B': 'u1'}
+
+
+def _parse_format(record_format: str) -> List[str]:
+    """Per-field struct codes of a little-endian record format, e.g. '<d8sf' -> ['d', '8s', 'f']."""
+    codes = []
+    count = ''
+    for char in record_format.lstrip('<'):
+        if char.isdigit():
+            count += char
+        elif char == 's':
+            codes.append(f"{count or 1}s")
+            count = ''
+        else:
+            codes.extend([char] * int(count or 1))
+            count = ''
+    return codes
+
+
+class _Times:
+    """Receive times of a channel as a read-only sequence, for bisect."""
+
+    def __init__(self, buffer: mmap.mmap, record_size: int, count: int):
+        self._buffer = buffer
+        self._record_size = record_size
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, number: int) -> float:
+        return struct.unpack_from('<d', self._buffer, HEADER_SIZE + number * self._record_size)[0]
+
+
+class ChannelReader:
+    """
+    One channel file of a recording, memory-mapped read-only.
+
+    Nothing is read at open beyond the header and the small time index;
+    records are decoded only as they are asked for. records() and
+    column() return NumPy views straight onto the mapped file, with no
+    copy. A record cut short at the end of the file (a recording still
+    being written, or one that was interrupted) is left out.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.channel, self.start_time, self.record_size = unpack_header(self._buffer[:HEADER_SIZE])
+        except ValueError:
+            self._buffer.close()
+            raise
+        self.name = self.channel.name
+        self.fields = self.channel.fields
+        self._struct = struct.Struct(self.channel.format)
+        self._codes = _parse_format(self.channel.format)
+        self._text_fields = [i for i, code in enumerate(self._codes) if code.endswith('s')]
+        self.Record = namedtuple(f"{self.name.capitalize()}Record", self.fields)
+        self._count = max(0, (len(self._buffer) - HEADER_SIZE) // self.record_size)
+        self._times = _Times(self._buffer, self.record_size, self._count)
+        self._index = self._load_index(os.path.splitext(path)[0] + '.idx')
+        self._dtype = None
+
+    def _load_index(self, path: str) -> List[Tuple[float, int]]:
+        """(time, record number) entries of the sparse index; empty if it is missing or damaged."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return []
+        if len(data) < INDEX_HEADER.size or INDEX_HEADER.unpack_from(data)[0] != INDEX_MAGIC:
+            return []
+        entries = []
+        for offset in range(INDEX_HEADER.size, len(data) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size):
+            record_time, number = INDEX_ENTRY.unpack_from(data, offset)
+            if number >= self._count:
+                break
+            entries.append((record_time, number))
+        return entries
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def first_time(self) -> Optional[float]:
+        return self._times[0] if self._count else None
+
+    @property
+    def last_time(self) -> Optional[float]:
+        return self._times[self._count - 1] if self._count else None
+
+    def time_at(self, number: int) -> float:
+        return self._times[number]
+
+    def seek(self, when: float) -> int:
+        """
+        Number of the first record received at or after when (len(self) if
+        none was). A binary search over the index narrows the search to one
+        stride, then another over that stride's records.
+        """
+        low, high = 0, self._count
+        if self._index:
+            entry = bisect.bisect_right(self._index, (when, -1)) - 1
+            if entry >= 0:
+                low = self._index[entry][1]
+            if entry + 1 < len(self._index):
+                high = self._index[entry + 1][1] + 1
+        return bisect.bisect_left(self._times, when, low, high)
+
+    def _decode(self, values: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        if not self._text_fields:
+            return self.Record(*values)
+        values = list(values)
+        for i in self._text_fields:
+            values[i] = values[i].rstrip(b'\x00').decode('ascii', 'replace')
+        return self.Record(*values)
+
+    def __getitem__(self, number: int) -> Tuple[Any, ...]:
+        if number < 0:
+            number += self._count
+        if not 0 <= number < self._count:
+            raise IndexError(number)
+        return self._decode(self._struct.unpack_from(self._buffer, HEADER_SIZE + number * self.record_size))
+
+    def iter_records(self, start_time: Optional[float] = None,
+                     end_time: Optional[float] = None) -> Iterator[Tuple[Any, ...]]:
+        """Records received from start_time up to (not including) end_time, decoded one at a time."""
+        first = self.seek(start_time) if start_time is not None else 0
+        last = self.seek(end_time) if end_time is not None else self._count
+        view = memoryview(self._buffer)[HEADER_SIZE + first * self.record_size:
+                                         HEADER_SIZE + last * self.record_size]
+        try:
+            for values in self._struct.iter_unpack(view):
+                yield self._decode(values)
+        finally:
+            view.release()
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        return self.iter_records()
+
+    @property
+    def dtype(self):
+        """NumPy structured type of one record, laid out exactly as in the file."""
+        if np is None:
+            raise ImportError("numpy is required for record views")
+        if self._dtype is None:
+            types = [f"S{code[:-1]}" if code.endswith('s') else _NUMPY_TYPES[code] for code in self._codes]
+            self._dtype = np.dtype(list(zip(self.fields, types)))
+        return self._dtype
+
+    def records(self, start: int = 0, stop: Optional[int] = None):
+        """Records start..stop as a NumPy structured array viewing the mapped file (no copy)."""
+        stop = self._count if stop is None else min(stop, self._count)
+        start = min(max(start, 0), stop)
+        return np.frombuffer(self._buffer, dtype=self.dtype, count=stop - start,
+                             offset=HEADER_SIZE + start * self.record_size)
+
+    def column(self, field: str, start: int = 0, stop: Optional[int] = None):
+        """One field of records start..stop as a NumPy view onto the mapped file (no copy)."""
+        return self.records(start, stop)[field]
+
+    def close(self) -> None:
+        """Unmap the file. If NumPy views of it are still alive, it is unmapped once they are gone."""
+        try:
+            self._buffer.close()
+        except BufferError:
+            pass
+
+
+class FlightRecording:
+    """
+    A recording written by FlightRecorder, opened for reading.
+
+    Opening maps each channel file and reads its header and index only, so
+    multi-hour recordings open in milliseconds. Channels are looked up by
+    message kind (recording['gps']); channels the recording does not have
+    are simply absent. The recording is read as it was when opened.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.channels: Dict[str, ChannelReader] = {}
+        for channel_path in sorted(glob.glob(os.path.join(path, '*.bin'))):
+            reader = ChannelReader(channel_path)
+            self.channels[reader.name] = reader
+
+    def __enter__(self) -> 'FlightRecording':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for reader in self.channels.values():
+            reader.close()
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in self.channels
+
+    def __getitem__(self, kind: str) -> ChannelReader:
+        return self.channels[kind]
+
+    def get(self, kind: str) -> Optional[ChannelReader]:
+        return self.channels.get(kind)
+
+    @property
+    def start_time(self) -> Optional[float]:
+        times = [reader.first_time for reader in self.channels.values() if len(reader)]
+        return min(times) if times else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        times = [reader.last_time for reader in self.channels.values() if len(reader)]
+        return max(times) if times else None
+
+    @property
+    def duration(self) -> float:
+        start, end = self.start_time, self.end_time
+        return end - start if start is not None else 0.0
+
+    def iter_messages(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                      kinds: Optional[Tuple[str, ...]] = None) -> Iterator[Tuple[str, Tuple[Any, ...]]]:
+        """(kind, record) of every channel (or of kinds) merged in receive-time order, lazily."""
+        readers = [reader for name, reader in self.channels.items() if kinds is None or name in kinds]
+        streams = [((record.time, number, reader.name, record)
+                    for record in reader.iter_records(start_time, end_time))
+                   for number, reader in enumerate(readers)]
+        for _, _, kind, record in heapq.merge(*streams):
+            yield kind, record
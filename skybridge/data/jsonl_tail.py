@@ -0,0 +1,219 @@
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+
+from utils.file_utils import atomic_write
+
+# How long a rotated-away file keeps being read after its last growth, to pick up
+# lines from a writer that still had it open when it was renamed
+ROTATION_GRACE = 2.0  # seconds
+# A last line without newline is taken after this long, provided it is valid JSON
+PARTIAL_LINE_TIMEOUT = 1.0  # seconds
+
+FileId = Tuple[int, int]  # (st_dev, st_ino)
+
+
+def _file_id(st: os.stat_result) -> FileId:
+    return (st.st_dev, st.st_ino)
+
+
+class _Cursor:
+    """Read position in one physical file."""
+
+    def __init__(self, file_id: Optional[FileId] = None, offset: int = 0):
+        self.file_id = file_id
+        self.offset = offset
+        self.partial_size = 0       # bytes after offset with no newline yet
+        self.partial_since = 0.0    # when partial_size was first seen
+        self.last_growth = time.monotonic()
+
+
+class JsonlTailReader:
+    """
+    Incremental reader for a JSONL file another process appends to.
+
+    Only bytes after the remembered offset are read, and a last line without
+    its newline is left in the file until the writer finishes it. The offset
+    is keyed to the file's identity (device, inode), so a file that was
+    replaced or truncated behind our back is read again from the start.
+
+    Compaction never truncates: once everything has been read and the file
+    has grown past compact_threshold bytes, it is renamed to <path>.consumed.
+    A writer that opens by name starts a new file; one that still has the old
+    file open keeps appending to the renamed one, which is read until it has
+    been quiet for rotation_grace seconds and only then deleted.
+
+    The read positions are saved to checkpoint_path (atomically, after every
+    read that consumed something) so a restart picks up exactly where the
+    previous run stopped.
+    """
+
+    def __init__(self, path: str, checkpoint_path: Optional[str] = None,
+                 compact_threshold: Optional[int] = None,
+                 rotation_grace: float = ROTATION_GRACE,
+                 partial_line_timeout: float = PARTIAL_LINE_TIMEOUT):
+        self.path = path
+        self.rotated_path = path + '.consumed'
+        self.checkpoint_path = checkpoint_path or path + '.checkpoint'
+        self.compact_threshold = compact_threshold  # None disables compaction
+        self.rotation_grace = rotation_grace
+        self.partial_line_timeout = partial_line_timeout
+        self.current = _Cursor()
+        self.rotated: Optional[_Cursor] = None
+        self._load_checkpoint()
+
+    def read_lines(self) -> List[bytes]:
+        """Return the complete, non-empty lines appended since the previous call."""
+        lines: List[bytes] = []
+        current_lines: List[bytes] = []
+        changed = False
+        if self.rotated is not None:
+            changed |= self._read(self.rotated_path, self.rotated, lines)
+        changed |= self._read(self.path, self.current, current_lines)
+        if self.rotated is not None:
+            # Read the rotated file again: if the writer moved on to the new file it has
+            # closed the old one, so whatever it added there comes before current_lines
+            changed |= self._read(self.rotated_path, self.rotated, lines)
+            if self._rotated_drained():
+                self._remove_rotated()
+                changed = True
+        lines.extend(current_lines)
+        if self._should_compact():
+            changed |= self._compact(lines)
+        if changed:
+            self._save_checkpoint()
+        return lines
+
+    def _read(self, path: str, cursor: _Cursor, lines: List[bytes]) -> bool:
+        """Append complete lines of path after cursor to lines; return True if the cursor moved."""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return False
+        with f:
+            st = os.fstat(f.fileno())
+            moved = False
+            file_id = _file_id(st)
+            if file_id != cursor.file_id or st.st_size < cursor.offset:
+                # A different file, or truncated by someone else: start over
+                cursor.file_id = file_id
+                cursor.offset = 0
+                cursor.partial_size = 0
+                moved = True
+            pending = st.st_size - cursor.offset
+            if pending <= 0:
+                return moved
+            f.seek(cursor.offset)
+            data = f.read(pending)
+        now = time.monotonic()
+        cursor.last_growth = now
+        end = data.rfind(b'\n') + 1
+        tail = data[end:]
+        if tail:
+            if len(tail) != cursor.partial_size:
+                cursor.partial_size = len(tail)
+                cursor.partial_since = now
+            elif now - cursor.partial_since >= self.partial_line_timeout and self._is_json(tail):
+                # Writer left the last line without a newline; a trailing newline arriving
+                # later just reads as an empty line
+                end = len(data)
+                cursor.partial_size = 0
+        else:
+            cursor.partial_size = 0
+        if end == 0:
+            return moved
+        cursor.offset += end
+        lines.extend(line for line in data[:end].splitlines() if line.strip())
+        return True
+
+    @staticmethod
+    def _is_json(data: bytes) -> bool:
+        try:
+            json.loads(data)
+            return True
+        except ValueError:
+            return False
+
+    def _rotated_drained(self) -> bool:
+        cursor = self.rotated
+        return (cursor.partial_size == 0 and
+                time.monotonic() - cursor.last_growth >= self.rotation_grace)
+
+    def _remove_rotated(self) -> None:
+        try:
+            os.unlink(self.rotated_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Still open elsewhere (Windows); keep reading it and try again later
+            print(f"Error removing {self.rotated_path}: {e}")
+            return
+        self.rotated = None
+
+    def _should_compact(self) -> bool:
+        return (self.compact_threshold is not None and
+                self.rotated is None and
+                self.current.file_id is not None and
+                self.current.partial_size == 0 and
+                self.current.offset > self.compact_threshold)
+
+    def _compact(self, lines: List[bytes]) -> bool:
+        """Move the consumed file aside and keep reading it until its writers are done."""
+        try:
+            os.replace(self.path, self.rotated_path)
+        except OSError:
+            # e.g. the writer has it open on Windows; compact on a later read
+            return False
+        rotated = self.current
+        self.current = _Cursor()
+        self.rotated = rotated
+        # Anything written between our last read and the rename is in the rotated file
+        self._read(self.rotated_path, self.rotated, lines)
+        self.rotated.last_growth = time.monotonic()
+        return True
+
+    def _load_checkpoint(self) -> None:
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error reading checkpoint {self.checkpoint_path}: {e}")
+            return
+
+        def cursor_from(key: str) -> Optional[_Cursor]:
+            entry = checkpoint.get(key)
+            if not entry:
+                return None
+            return _Cursor((entry['dev'], entry['ino']), entry['offset'])
+
+        current = cursor_from('current')
+        rotated = cursor_from('rotated')
+        if current is not None:
+            self.current = current
+        try:
+            rotated_id = _file_id(os.stat(self.rotated_path))
+        except FileNotFoundError:
+            return
+        if rotated is not None and rotated.file_id == rotated_id:
+            self.rotated = rotated
+        elif current is not None and current.file_id == rotated_id:
+            # Stopped between the rename and saving the checkpoint
+            self.rotated = current
+            self.current = _Cursor()
+        else:
+            self.rotated = _Cursor(rotated_id, 0)
+
+    def _save_checkpoint(self) -> None:
+        def entry(cursor: Optional[_Cursor]):
+            if cursor is None or cursor.file_id is None:
+                return None
+            return {'dev': cursor.file_id[0], 'ino': cursor.file_id[1], 'offset': cursor.offset}
+
+        checkpoint = {'current': entry(self.current), 'rotated': entry(self.rotated)}
+        try:
+            atomic_write(self.checkpoint_path, json.dumps(checkpoint).encode('utf-8'))
+        except OSError as e:
+            print(f"Error saving checkpoint {self.checkpoint_path}: {e}")
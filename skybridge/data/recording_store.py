@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import time
+from typing import List, NamedTuple, Optional
+
+# Bumped whenever the table layout changes; older stores are rejected
+FORMAT_VERSION = 1
+
+INDEX_NAME = 'index.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS recordings (
+    name TEXT PRIMARY KEY,
+    sha256 TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    icao_address TEXT NOT NULL,
+    callsign TEXT NOT NULL,
+    converted TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recordings_time ON recordings (start_time, end_time);
+"""
+
+
+class StoredRecording(NamedTuple):
+    """One recording of a store, as listed in its index."""
+    name: str  # directory name of the recording inside the store
+    sha256: str  # of the file it was converted from
+    source: str
+    samples: int
+    start_time: Optional[float]
+    end_time: Optional[float]
+    icao_address: str
+    callsign: str
+    converted: str
+
+
+class RecordingStore:
+    """
+    A directory of flight recordings (.skyrec directories, see
+    flight_recorder) with an SQLite index of what they were made from and
+    the time span they cover.
+
+    The index is keyed by the SHA-256 of the source file, so a converter can
+    tell a file it has already converted from a new one whatever it is
+    called, and recordings can be found by time without opening them.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._connection = sqlite3.connect(os.path.join(directory, INDEX_NAME))
+        try:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute("INSERT OR IGNORE INTO meta VALUES ('format_version', ?)",
+                                     (str(FORMAT_VERSION),))
+            self._connection.commit()
+            version = self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'format_version'").fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            self._connection.close()
+            raise ValueError(f"{directory} is not a recording store: {e}")
+        if version != str(FORMAT_VERSION):
+            self._connection.close()
+            raise ValueError(f"{directory} has recording store format {version}, expected {FORMAT_VERSION}")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> 'RecordingStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def find_hash(self, sha256: str) -> Optional[StoredRecording]:
+        """The recording converted from a file with this content, if there is one."""
+        row = self._connection.execute("SELECT * FROM recordings WHERE sha256 = ?", (sha256,)).fetchone()
+        return StoredRecording(*row) if row is not None else None
+
+    def add(self, name: str, sha256: str, source: str, samples: int, start_time: Optional[float],
+            end_time: Optional[float], icao_address: str = '', callsign: str = '') -> None:
+        """Index a recording that has been written to path(name)."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, sha256, source, samples, start_time, end_time, icao_address, callsign,
+             time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())))
+        self._connection.commit()
+
+    def recordings(self) -> List[StoredRecording]:
+        rows = self._connection.execute("SELECT * FROM recordings ORDER BY start_time, name")
+        return [StoredRecording(*row) for row in rows]
+
+    def between(self, start_time: float, end_time: float) -> List[StoredRecording]:
+        """Recordings that overlap the time span, earliest first."""
+        rows = self._connection.execute(
+            "SELECT * FROM recordings WHERE start_time <= ? AND end_time >= ? ORDER BY start_time, name",
+            (end_time, start_time))
+        return [StoredRecording(*row) for row in rows]
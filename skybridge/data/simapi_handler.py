@@ -4,6 +4,10 @@ import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from data.jsonl_tail import JsonlTailReader
+from data.simapi_input_writer import SimAPIInputWriter
+from data.simapi_payload import SimAPIPayloadBuilder
+
 class SimAPIHandler:
     """Handles SimAPI file I/O operations"""
     
@@ -21,92 +25,111 @@ class SimAPIHandler:
         
         # Create SimAPI directory if it doesn't exist
         os.makedirs(self.base_path, exist_ok=True)
+
+        # Reads only what was appended since the last call; with clearing enabled the
+        # consumed file is rotated away instead of truncated, so no appended line is lost
+        self.output_reader = JsonlTailReader(
+            self.output_path,
+            compact_threshold=0 if clear_output_after_read else None
+        )
+        # Skips unchanged payloads and replaces the file atomically
+        self.input_writer = SimAPIInputWriter(self.input_path)
+        self.payload_builder = SimAPIPayloadBuilder()
     
     def write_input_data(self, data: Dict[str, Any]):
-        """Write data to the SimAPI input file"""
+        """Write data to the SimAPI input file if it differs from what was last written"""
+        try:
+            return self.input_writer.write(data)
+        except Exception as e:
+            print(f"Error writing SimAPI input: {e}")
+            return False
+
+    def write_input_state(self,
+                          aircraft_state,
+                          radio_state: Dict[str, Any],
+                          transponder_state: Dict[str, Any]) -> bool:
+        """Build the SimAPI input payload from the numeric aircraft state and write it if it changed"""
         try:
-            with open(self.input_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            return True
+            payload = self.payload_builder.build(aircraft_state, radio_state, transponder_state)
+            return self.input_writer.write_bytes(payload)
         except Exception as e:
             print(f"Error writing SimAPI input: {e}")
             return False
+
+    def get_write_stats(self) -> Dict[str, Any]:
+        """Counters of SimAPI input writes, skipped writes and bytes written"""
+        return self.input_writer.get_stats()
     
     def read_output_data(self) -> Optional[list]:
-        """Read and process all SimAPI output requests, then clear the file if enabled."""
-        if not os.path.exists(self.output_path):
-            return None
+        """Read and process the SimAPI output requests appended since the last call."""
         requests = []
         try:
-            with open(self.output_path, 'r') as f:
-                for line in f:
-                    try:
-                        data = json.loads(line.strip())
-                        setvar = data.get('setvar')
-                        req = None
-                        if setvar == 'COM_RADIO_SET_HZ':
-                            req = {
-                                'setvar': setvar,
-                                'radio': '1',
-                                'value': data['value']
-                            }
-                        elif setvar == 'COM2_RADIO_SET_HZ':
-                            req = {
-                                'setvar': setvar,
-                                'radio': '2',
-                                'value': data['value']
-                            }
-                        elif setvar == 'COM_STBY_RADIO_SET_HZ':
-                            req = {
-                                'setvar': setvar,
-                                'radio': '1',
-                                'value': data['value'],
-                                'is_standby': True
-                            }
-                        elif setvar == 'COM2_STBY_RADIO_SET_HZ':
-                            req = {
-                                'setvar': setvar,
-                                'radio': '2',
-                                'value': data['value'],
-                                'is_standby': True
-                            }
-                        elif setvar == 'COM_RADIO_SWAP':
-                            req = {
-                                'setvar': setvar,
-                                'radio': '1'
-                            }
-                        elif setvar == 'COM2_RADIO_SWAP':
-                            req = {
-                                'setvar': setvar,
-                                'radio': '2'
-                            }
-                        elif setvar == 'XPNDR_SET':
-                            req = {
-                                'setvar': setvar,
-                                'value': int(data['value'])
-                            }
-                        elif setvar == 'AUDIO_PANEL_VOLUME_SET':
-                            req = {
-                                'setvar': setvar,
-                                'value': int(data['value'])
-                            }
-                        elif setvar == 'COM1_VOLUME_SET':
-                            req = {
-                                'setvar': setvar,
-                                'value': int(data['value'])
-                            }
-                        elif setvar == 'COM2_VOLUME_SET':
-                            req = {
-                                'setvar': setvar,
-                                'value': int(data['value'])
-                            }
-                        if req is not None:
-                            requests.append(req)
-                    except json.JSONDecodeError:
-                        continue
-            # Clear the output file after reading if enabled
-            if self.clear_output_after_read:
-                open(self.output_path, 'w').close()
+            for line in self.output_reader.read_lines():
+                try:
+                    data = json.loads(line)
+                    setvar = data.get('setvar')
+                    req = None
+                    if setvar == 'COM_RADIO_SET_HZ':
+                        req = {
+                            'setvar': setvar,
+                            'radio': '1',
+                            'value': data['value']
+                        }
+                    elif setvar == 'COM2_RADIO_SET_HZ':
+                        req = {
+                            'setvar': setvar,
+                            'radio': '2',
+                            'value': data['value']
+                        }
+                    elif setvar == 'COM_STBY_RADIO_SET_HZ':
+                        req = {
+                            'setvar': setvar,
+                            'radio': '1',
+                            'value': data['value'],
+                            'is_standby': True
+                        }
+                    elif setvar == 'COM2_STBY_RADIO_SET_HZ':
+                        req = {
+                            'setvar': setvar,
+                            'radio': '2',
+                            'value': data['value'],
+                            'is_standby': True
+                        }
+                    elif setvar == 'COM_RADIO_SWAP':
+                        req = {
+                            'setvar': setvar,
+                            'radio': '1'
+                        }
+                    elif setvar == 'COM2_RADIO_SWAP':
+                        req = {
+                            'setvar': setvar,
+                            'radio': '2'
+                        }
+                    elif setvar == 'XPNDR_SET':
+                        req = {
+                            'setvar': setvar,
+                            'value': int(data['value'])
+                        }
+                    elif setvar == 'AUDIO_PANEL_VOLUME_SET':
+                        req = {
+                            'setvar': setvar,
+                            'value': int(data['value'])
+                        }
+                    elif setvar == 'COM1_VOLUME_SET':
+                        req = {
+                            'setvar': setvar,
+                            'value': int(data['value'])
+                        }
+                    elif setvar == 'COM2_VOLUME_SET':
+                        req = {
+                            'setvar': setvar,
+                            'value': int(data['value'])
+                        }
+                    if req is not None:
+                        requests.append(req)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # Malformed line; the rest of the batch is already consumed, so keep going
+                    continue
             if requests:
                 return requests
             return None
@@ -118,7 +141,7 @@ class SimAPIHandler:
                           aircraft_state: Dict[str, Any],
                           radio_state: Dict[str, Any],
                           transponder_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Create the complete SimAPI input data structure"""
+        """Create the complete SimAPI input data structure from AircraftState.to_dict() and the radio/transponder variables"""
         # Calculate wheel RPM based on ground state
         is_on_ground = aircraft_state['on_ground']
         wheel_rpm = 0
@@ -130,8 +153,7 @@ class SimAPIHandler:
         # Calculate airspeeds
         ground_speed_kts = int(aircraft_state['ground_speed'] * 1.94384)  # Convert m/s to knots
         # Convert altitude from meters to feet
-        altitude_m = float(aircraft_state['altitude'].split()[0])
-        altitude_ft = int(altitude_m * 3.28084)
+        altitude_ft = int(aircraft_state['altitude_m'] * 3.28084)
         
         # Calculate indicated airspeed (IAS)
         # For now, we'll use ground speed as a base, but this should be replaced with actual IAS from the simulator
@@ -142,7 +164,8 @@ class SimAPIHandler:
         true_airspeed = int(indicated_airspeed * (1 + (altitude_ft/1000) * 0.02))
 
         # Get magnetic heading and variation
-        magnetic_heading = int(float(aircraft_state['heading'].strip('°'))) - aircraft_state['magvar']
+        heading_true = int(aircraft_state['heading_deg'])
+        magnetic_heading = heading_true - aircraft_state['magvar']
         magnetic_heading = magnetic_heading % 360  # Normalize to 0-360 range
 
         # Calculate indicated altitude based on pressure
@@ -166,7 +189,7 @@ class SimAPIHandler:
                     "PLANE ALT ABOVE GROUND MINUS CG": 0 if aircraft_state['on_ground'] else altitude_ft,
                     "PLANE ALTITUDE": altitude_ft,
                     "PLANE BANK DEGREES": int(aircraft_state['bank']),
-                    "PLANE HEADING DEGREES TRUE": int(float(aircraft_state['heading'].strip('°'))),
+                    "PLANE HEADING DEGREES TRUE": heading_true,
                     "PLANE LATITUDE": aircraft_state['latitude'],
                     "PLANE LONGITUDE": aircraft_state['longitude'],
                     "PLANE PITCH DEGREES": int(aircraft_state['pitch']),
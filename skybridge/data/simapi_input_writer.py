@@ -0,0 +1,82 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from utils.file_utils import atomic_write
+
+# Rewrite an unchanged payload after this long anyway, so readers that watch
+# the file's modification time still see the adapter as alive
+HEARTBEAT_INTERVAL = 5.0  # seconds
+
+
+def encode_payload(data: Dict[str, Any]) -> bytes:
+    """Serialize a SimAPI payload the way SimAPIInputWriter writes it (compact JSON, UTF-8)."""
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+class SimAPIInputWriter:
+    """
+    Writes simAPI_input.json only when its content changes.
+
+    Payloads are serialized compactly and hashed; a payload identical to the
+    last one written is skipped unless heartbeat_interval seconds have passed.
+    Every write goes to a temporary file that replaces simAPI_input.json in
+    one step, so a reader never sees a half-written JSON document.
+    """
+
+    def __init__(self, path: str, heartbeat_interval: Optional[float] = HEARTBEAT_INTERVAL):
+        self.path = path
+        self.heartbeat_interval = heartbeat_interval  # None: never rewrite an unchanged payload
+        self._last_digest: Optional[bytes] = None
+        self._last_write = 0.0
+        self.stats = {
+            'writes': 0,
+            'skipped': 0,
+            'heartbeats': 0,
+            'failures': 0,
+            'bytes_written': 0,
+            'bytes_skipped': 0,
+        }
+
+    def write(self, data: Dict[str, Any]) -> bool:
+        """Write a payload dict; return False only if writing failed."""
+        return self.write_bytes(encode_payload(data))
+
+    def write_bytes(self, payload: bytes) -> bool:
+        """Write an already serialized payload; return False only if writing failed."""
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        now = time.monotonic()
+        heartbeat = False
+        if digest == self._last_digest:
+            if self.heartbeat_interval is None or now - self._last_write < self.heartbeat_interval:
+                self.stats['skipped'] += 1
+                self.stats['bytes_skipped'] += len(payload)
+                return True
+            heartbeat = True
+        try:
+            atomic_write(self.path, payload)
+        except OSError as e:
+            self.stats['failures'] += 1
+            # Forget the last payload so the next call retries even if nothing changed
+            self._last_digest = None
+            print(f"Error writing SimAPI input: {e}")
+            return False
+        self._last_digest = digest
+        self._last_write = now
+        self.stats['writes'] += 1
+        self.stats['bytes_written'] += len(payload)
+        if heartbeat:
+            self.stats['heartbeats'] += 1
+        return True
+
+    def invalidate(self) -> None:
+        """Make the next write happen even if its payload is unchanged."""
+        self._last_digest = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the write counters plus the share of writes avoided."""
+        stats = dict(self.stats)
+        attempts = stats['writes'] + stats['skipped']
+        stats['skip_ratio'] = stats['skipped'] / attempts if attempts else 0.0
+        return stats
@@ -0,0 +1,176 @@
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
+
+# Marks a variable whose value is filled in on every build
+_DYNAMIC = object()
+
+# Same keys, order and constants as SimAPIHandler.create_simapi_data
+_VARIABLES: Tuple[Tuple[str, Any], ...] = (
+    # Aircraft state
+    ("AIRSPEED INDICATED", _DYNAMIC),
+    ("AIRSPEED TRUE", _DYNAMIC),
+    ("ENGINE TYPE", _DYNAMIC),
+    ("INDICATED ALTITUDE", _DYNAMIC),
+    ("MAGNETIC COMPASS", _DYNAMIC),
+    ("MAGVAR", _DYNAMIC),
+    ("PLANE ALT ABOVE GROUND MINUS CG", _DYNAMIC),
+    ("PLANE ALTITUDE", _DYNAMIC),
+    ("PLANE BANK DEGREES", _DYNAMIC),
+    ("PLANE HEADING DEGREES TRUE", _DYNAMIC),
+    ("PLANE LATITUDE", _DYNAMIC),
+    ("PLANE LONGITUDE", _DYNAMIC),
+    ("PLANE PITCH DEGREES", _DYNAMIC),
+    ("SEA LEVEL PRESSURE", _DYNAMIC),
+    ("SIM ON GROUND", _DYNAMIC),
+    ("TOTAL WEIGHT", _DYNAMIC),
+    ("VERTICAL SPEED", _DYNAMIC),
+    ("WHEEL RPM:1", _DYNAMIC),
+
+    # Additional aircraft state
+    ("TYPICAL DESCENT RATE", _DYNAMIC),
+    ("AMBIENT WIND DIRECTION", _DYNAMIC),
+    ("AMBIENT WIND VELOCITY", _DYNAMIC),
+    ("LOCAL TIME", _DYNAMIC),
+    ("ZULU TIME", _DYNAMIC),
+
+    # Electrical and circuit states
+    ("ELECTRICAL MASTER BATTERY:0", _DYNAMIC),
+    ("CIRCUIT COM ON:1", _DYNAMIC),
+    ("CIRCUIT COM ON:2", _DYNAMIC),
+
+    # Additional variables from SayIntentions.AI example
+    ("TITLE", "Aerofly FS4"),
+    ("ATC MODEL", "ATCCOM.AC_MODEL A320.0.text"),
+    ("PLANE TOUCHDOWN LATITUDE", 0),
+    ("PLANE TOUCHDOWN LONGITUDE", 0),
+    ("PLANE TOUCHDOWN NORMAL VELOCITY", 0),
+    ("INTERCOM SYSTEM ACTIVE", 0),
+    ("AUDIO PANEL VOLUME", 75),
+    ("COM VOLUME:1", 46),
+    ("COM VOLUME:2", 81),
+    ("WING SPAN", 36),
+    ("ZULU DAY OF YEAR", _DYNAMIC),
+)
+
+_SIM_METADATA: Dict[str, str] = {
+    "exe": "aerofly_fs_4.exe",
+    "simapi_version": "1.0",
+    "name": "Aerofly",
+    "version": "1.0",
+    "adapter_version": "1.0",
+}
+
+
+def _encode(value: Any) -> str:
+    """JSON text of one value; plain ints and finite floats skip json.dumps."""
+    kind = type(value)
+    if kind is int:
+        return int.__repr__(value)
+    if kind is float and value - value == 0.0:
+        return float.__repr__(value)
+    return json.dumps(value)
+
+
+def _escape(text: str) -> str:
+    """Protect literal text that goes into the %-format template."""
+    return text.replace('%', '%%')
+
+
+def _compile_template() -> str:
+    """
+    Build the payload as one %-format string: constants are encoded once,
+    every dynamic variable is a %s slot, and a final %s takes the radio and
+    transponder variables.
+    """
+    variables = []
+    for key, value in _VARIABLES:
+        encoded = '%s' if value is _DYNAMIC else _escape(json.dumps(value))
+        variables.append(_escape(json.dumps(key)) + ':' + encoded)
+    metadata = ''.join(',' + json.dumps(key) + ':' + json.dumps(value) for key, value in _SIM_METADATA.items())
+    return '{"sim":{"variables":{' + ','.join(variables) + '%s}' + _escape(metadata) + '}}'
+
+
+class SimAPIPayloadBuilder:
+    """
+    Builds the SimAPI input payload as bytes from the numeric aircraft state.
+
+    The output is byte for byte what encode_payload(create_simapi_data(...))
+    produces, but the constant part of the document is encoded only once,
+    values are read straight off the AircraftState instead of a dict copy,
+    and the day of year is computed once per day.
+    """
+
+    def __init__(self):
+        self._template = _compile_template()
+        self._keys: Dict[str, str] = {}  # encoded '"KEY":' for radio/transponder variables
+        self._day_of_year = 0
+        self._day_expires = 0.0  # time.time() of the next local midnight
+
+    def _get_day_of_year(self) -> int:
+        now = time.time()
+        if now >= self._day_expires:
+            today = datetime.fromtimestamp(now)
+            self._day_of_year = today.timetuple().tm_yday
+            midnight = datetime(today.year, today.month, today.day) + timedelta(days=1)
+            self._day_expires = midnight.timestamp()
+        return self._day_of_year
+
+    def _encode_variables(self, variables: Dict[str, Any]) -> str:
+        keys = self._keys
+        parts = []
+        for key, value in variables.items():
+            encoded_key = keys.get(key)
+            if encoded_key is None:
+                encoded_key = keys[key] = json.dumps(key) + ':'
+            parts.append(encoded_key + _encode(value))
+        return ''.join(',' + part for part in parts)
+
+    def build(self, aircraft_state, radio_state: Dict[str, Any], transponder_state: Dict[str, Any]) -> bytes:
+        """Return the complete SimAPI input document for an AircraftState plus radio/transponder variables."""
+        ground_speed = aircraft_state.ground_speed
+        on_ground = aircraft_state.on_ground
+
+        # Same derivations as create_simapi_data
+        wheel_rpm = int(ground_speed * 10) if on_ground and ground_speed > 0.1 else 0
+        ground_speed_kts = int(ground_speed * 1.94384)
+        altitude_ft = int(aircraft_state.altitude_m * 3.28084)
+        true_airspeed = int(ground_speed_kts * (1 + (altitude_ft / 1000) * 0.02))
+        heading_true = int(aircraft_state.heading_deg)
+        magvar = aircraft_state.magvar
+        magnetic_heading = (heading_true - magvar) % 360
+        sea_level_pressure = aircraft_state.sea_level_pressure
+        indicated_altitude = altitude_ft + int((29.92 - sea_level_pressure / 100.0) * 1000)
+
+        values = (
+            str(ground_speed_kts),
+            str(true_airspeed),
+            _encode(aircraft_state.engine_type),
+            str(indicated_altitude),
+            _encode(magnetic_heading),
+            _encode(magvar),
+            '0' if on_ground else str(altitude_ft),
+            str(altitude_ft),
+            str(int(aircraft_state.bank)),
+            str(heading_true),
+            _encode(aircraft_state.latitude),
+            _encode(aircraft_state.longitude),
+            str(int(aircraft_state.pitch)),
+            _encode(sea_level_pressure),
+            '1' if on_ground else '0',
+            _encode(aircraft_state.total_weight),
+            _encode(aircraft_state.vertical_speed),
+            str(wheel_rpm),
+            _encode(aircraft_state.typical_descent_rate),
+            _encode(aircraft_state.ambient_wind_direction),
+            _encode(aircraft_state.ambient_wind_velocity),
+            _encode(aircraft_state.local_time),
+            _encode(aircraft_state.zulu_time),
+            '1' if aircraft_state.electrical_master_battery else '0',
+            '1' if aircraft_state.circuit_com1 else '0',
+            '1' if aircraft_state.circuit_com2 else '0',
+            str(self._get_day_of_year()),
+            self._encode_variables(radio_state) + self._encode_variables(transponder_state),
+        )
+        return (self._template % values).encode('utf-8')
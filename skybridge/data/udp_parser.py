@@ -0,0 +1,245 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+# Simulator name the Aerofly FS 4 UDP stream puts after every message prefix
+DEFAULT_SIMULATOR_NAME = "Aerofly FS 4"
+
+# Message kinds returned by DatagramParser.parse
+GPS = 'gps'
+ATTITUDE = 'attitude'
+AIRCRAFT = 'aircraft'
+TRAFFIC = 'traffic'
+
+
+@dataclass
+class GPSData:
+    """Dataclass to store GPS data received from the flight simulator."""
+    longitude: float
+    latitude: float
+    altitude: float
+    track: float
+    ground_speed: float
+
+@dataclass
+class AttitudeData:
+    """Dataclass to store attitude data received from the flight simulator."""
+    true_heading: float
+    pitch: float
+    roll: float
+
+@dataclass
+class AircraftData:
+    """Dataclass to store airplane data received from the network."""
+
+    id: str # Unique identifier for this particular aircraft instance
+    type_id: str # ID of the plane model from a predefined list/table
+    registration: str # Official registration number assigned to the airplane by its national aviation authority
+    callsign: str # Assigned radio call sign used by air traffic control and pilots for identification purposes
+    icao24: str # International Civil Aviation Organization's unique four-character identifier for this aircraft
+    FlightNumber: str
+
+@dataclass
+class AirTrafficData:
+    """Dataclass to store traffic data received from the network."""
+    icao_address: str
+    latitude: float
+    longitude: float
+    altitude_ft: float
+    vertical_speed_ft_min: float
+    airborne_flag: int
+    heading_true: float
+    velocity_knots: float
+    callsign: str
+
+
+# Identifier fields (ICAO address, callsign, registration...) as the legacy patterns accept them
+_IDENTIFIER = re.compile(rb'[A-Za-z0-9\-_]+\Z')
+
+
+def _legacy_patterns(simulator_name: str) -> Dict[str, 're.Pattern']:
+    """Compile the original regex patterns once, used as validating fallbacks."""
+    sim = re.escape(simulator_name).encode('utf-8')
+    ident = rb'([A-Za-z0-9\-_]+)'
+    number = rb'([-\d.]+)'
+    return {
+        GPS: re.compile(rb'XGPS' + sim + rb',' + rb','.join([number] * 5)),
+        ATTITUDE: re.compile(rb'XATT' + sim + rb',' + rb','.join([number] * 3)),
+        AIRCRAFT: re.compile(rb'XAIRCRAFT' + sim + rb',' + rb','.join([ident] * 6)),
+        TRAFFIC: re.compile(rb'XTRAFFIC' + sim + rb',' + ident + rb',' + rb','.join([number] * 4)
+                            + rb',([01]),' + number + rb',' + number + rb',' + ident),
+    }
+
+
+def _is_identifier(field: bytes) -> bool:
+    """bytes.isalnum is ASCII-only and much cheaper than the regex, which is only needed for '-' and '_'."""
+    return field.isalnum() or _IDENTIFIER.match(field) is not None
+
+
+# Characters the legacy number pattern ([-\d.]+) is made of
+_NUMBER_CHARS = b'-.0123456789'
+
+
+def _check_number_chars(*fields: bytes) -> None:
+    """
+    Reject number fields the legacy pattern would not take. float() alone
+    also accepts '1e5', '+1', ' 1' and '1_0'; such datagrams go to the
+    fallback instead, so they get exactly the legacy result.
+    """
+    if b''.join(fields).translate(None, _NUMBER_CHARS):
+        raise ValueError("unexpected character in number field")
+
+
+def _check_finite(total: float) -> None:
+    """Reject nan/inf fields; a single sum is nan or inf if any of its terms is."""
+    if total - total != 0.0:
+        raise ValueError("non-finite field")
+
+
+def _is_menu_state(longitude: float, latitude: float, altitude: float, track: float, ground_speed: float) -> bool:
+    """Aerofly FS 4 streams 0,0,0,90,0 while sitting in the menu."""
+    return (longitude == 0.0 and latitude == 0.0 and
+            altitude == 0.0 and track == 90.0 and ground_speed == 0.0)
+
+
+class DatagramParser:
+    """
+    Split-based parser for the Aerofly FS 4 UDP datagrams.
+
+    Messages are dispatched on their first four bytes, split once on b','
+    and the fields converted straight from bytes; only identifier fields are
+    decoded to str. Datagrams the fast path cannot take (wrong field count,
+    odd characters in an identifier, trailing garbage) go through the
+    precompiled legacy patterns, so everything the old regex parser accepted
+    is still accepted.
+
+    XAIRCRAFT has no fast path: it is six identifiers and no numbers, which
+    the precompiled pattern matches at least as fast as splitting and
+    checking each field, and it arrives far less often than the others.
+    """
+
+    def __init__(self, simulator_name: str = DEFAULT_SIMULATOR_NAME):
+        self.simulator_name = simulator_name
+        sim = simulator_name.encode('utf-8')
+        self._patterns = _legacy_patterns(simulator_name)
+        # first four bytes -> (kind, full first field, field count, fast decoder or None, fallback decoder)
+        self._dispatch: Dict[bytes, Tuple[str, bytes, int, Callable, Callable]] = {
+            b'XGPS': (GPS, b'XGPS' + sim, 6, self._decode_gps, self._fallback_gps),
+            b'XATT': (ATTITUDE, b'XATT' + sim, 4, self._decode_attitude, self._fallback_attitude),
+            b'XAIR': (AIRCRAFT, b'XAIRCRAFT' + sim, 7, None, self._fallback_aircraft),
+            b'XTRA': (TRAFFIC, b'XTRAFFIC' + sim, 10, self._decode_traffic, self._fallback_traffic),
+        }
+
+    def parse(self, data: bytes) -> Optional[Tuple[str, Any]]:
+        """
+        Parse a single datagram.
+
+        Returns:
+            None for datagrams that are not simulator messages, otherwise a
+            (kind, record) tuple. The record is None when the message type was
+            recognised but the payload was invalid (or, for GPS, the menu state).
+        """
+        entry = self._dispatch.get(data[:4])
+        if entry is None:
+            return None
+        kind, header, field_count, decode, fallback = entry
+        if decode is not None:
+            fields = data.split(b',')
+            if len(fields) >= field_count and fields[0] == header:
+                try:
+                    return kind, decode(fields)
+                except ValueError:
+                    pass
+        return kind, fallback(data)
+
+    def parse_batch(self, datagrams: List[bytes]) -> List[Tuple[str, Any]]:
+        """Parse a list of datagrams, dropping the ones that are not simulator messages."""
+        parse = self.parse
+        results = []
+        for data in datagrams:
+            parsed = parse(data)
+            if parsed is not None:
+                results.append(parsed)
+        return results
+
+    # Fast path: fields are the result of data.split(b',')
+
+    @staticmethod
+    def _decode_gps(fields: List[bytes]) -> Optional[GPSData]:
+        _check_number_chars(fields[1], fields[2], fields[3], fields[4], fields[5])
+        longitude, latitude, altitude, track, ground_speed = (
+            float(fields[1]), float(fields[2]), float(fields[3]), float(fields[4]), float(fields[5]))
+        _check_finite(longitude + latitude + altitude + track + ground_speed)
+        if _is_menu_state(longitude, latitude, altitude, track, ground_speed):
+            return None
+        return GPSData(longitude, latitude, altitude, track, ground_speed)
+
+    @staticmethod
+    def _decode_attitude(fields: List[bytes]) -> AttitudeData:
+        _check_number_chars(fields[1], fields[2], fields[3])
+        true_heading, pitch, roll = float(fields[1]), float(fields[2]), float(fields[3])
+        _check_finite(true_heading + pitch + roll)
+        return AttitudeData(true_heading, pitch, roll)
+
+    @staticmethod
+    def _decode_traffic(fields: List[bytes]) -> AirTrafficData:
+        icao, callsign, airborne = fields[1], fields[9], fields[6]
+        if not _is_identifier(icao) or not _is_identifier(callsign) or airborne not in (b'0', b'1'):
+            raise ValueError(fields)
+        _check_number_chars(fields[2], fields[3], fields[4], fields[5], fields[7], fields[8])
+        latitude, longitude, altitude_ft, vertical_speed, heading, velocity = (
+            float(fields[2]), float(fields[3]), float(fields[4]),
+            float(fields[5]), float(fields[7]), float(fields[8]))
+        _check_finite(latitude + longitude + altitude_ft + vertical_speed + heading + velocity)
+        # Positional on purpose: keyword construction is measurably slower at traffic rates
+        return AirTrafficData(icao.decode('ascii'), latitude, longitude, altitude_ft, vertical_speed,
+                              1 if airborne == b'1' else 0, heading, velocity, callsign.decode('ascii'))
+
+    # Fallback path: the original patterns, compiled once per parser
+
+    def _fallback_gps(self, data: bytes) -> Optional[GPSData]:
+        match = self._patterns[GPS].match(data)
+        if not match:
+            return None
+        try:
+            values = [float(group) for group in match.groups()]
+        except ValueError:
+            return None
+        if _is_menu_state(*values):
+            return None
+        return GPSData(*values)
+
+    def _fallback_attitude(self, data: bytes) -> Optional[AttitudeData]:
+        match = self._patterns[ATTITUDE].match(data)
+        if not match:
+            return None
+        try:
+            return AttitudeData(*[float(group) for group in match.groups()])
+        except ValueError:
+            return None
+
+    def _fallback_aircraft(self, data: bytes) -> Optional[AircraftData]:
+        match = self._patterns[AIRCRAFT].match(data)
+        if not match:
+            return None
+        return AircraftData(*[group.decode('ascii') for group in match.groups()])
+
+    def _fallback_traffic(self, data: bytes) -> Optional[AirTrafficData]:
+        match = self._patterns[TRAFFIC].match(data)
+        if not match:
+            return None
+        groups = match.groups()
+        try:
+            return AirTrafficData(
+                icao_address=groups[0].decode('ascii'),
+                latitude=float(groups[1]),
+                longitude=float(groups[2]),
+                altitude_ft=float(groups[3]),
+                vertical_speed_ft_min=float(groups[4]),
+                airborne_flag=int(groups[5]),
+                heading_true=float(groups[6]),
+                velocity_knots=float(groups[7]),
+                callsign=groups[8].decode('ascii')
+            )
+        except ValueError:
+            return None
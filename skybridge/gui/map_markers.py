@@ -0,0 +1,328 @@
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from tkintermapview import osm_to_decimal
+
+from core.traffic_store import TrafficDelta
+from utils.spatial_index import Box, GridIndex
+
+# Changes smaller than these are not redrawn
+POSITION_THRESHOLD = 1e-5  # degrees, about a metre
+HEADING_THRESHOLD = 1.0  # degrees
+# Number of passes the frame-time readout averages over
+FRAME_TIME_WINDOW = 60
+
+# Level of detail by map zoom
+LABEL_MIN_ZOOM = 9  # labels from this zoom up
+CLUSTER_MAX_ZOOM = 6  # clusters at this zoom and below, bare icons in between
+CLUSTER_CELL_PIXELS = 64  # approximate screen size of one cluster cell
+DETAIL_FULL = 'full'
+DETAIL_ICONS = 'icons'
+DETAIL_CLUSTERS = 'clusters'
+
+# Extra area around the viewport that still gets markers, as a fraction of its size
+VIEWPORT_MARGIN = 0.1
+TRAFFIC_INDEX_CELL = 0.5  # degrees
+
+
+class FrameTimer:
+    """Rolling timing of a repeated piece of work (e.g. one map update pass)."""
+
+    def __init__(self, window: int = FRAME_TIME_WINDOW):
+        self.samples: 'deque[float]' = deque(maxlen=window)
+        self._start = 0.0
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+
+    def stop(self) -> float:
+        """Record the time since start(); return it in seconds."""
+        elapsed = time.perf_counter() - self._start
+        self.samples.append(elapsed)
+        return elapsed
+
+    def summary(self) -> Dict[str, float]:
+        """Last, average and maximum pass time over the window, in milliseconds."""
+        if not self.samples:
+            return {'last': 0.0, 'avg': 0.0, 'max': 0.0}
+        return {
+            'last': self.samples[-1] * 1000,
+            'avg': sum(self.samples) / len(self.samples) * 1000,
+            'max': max(self.samples) * 1000,
+        }
+
+    def format(self) -> str:
+        stats = self.summary()
+        return f"{stats['last']:.1f} ms (avg {stats['avg']:.1f}, max {stats['max']:.1f})"
+
+
+class _Marker:
+    """A map marker plus the values it was last drawn with."""
+    __slots__ = ('marker', 'latitude', 'longitude', 'heading', 'label')
+
+    def __init__(self, marker, latitude: float, longitude: float, heading: float, label: str):
+        self.marker = marker
+        self.latitude = latitude
+        self.longitude = longitude
+        self.heading = heading
+        self.label = label
+
+
+def traffic_label(record) -> str:
+    """Text shown next to a traffic marker."""
+    return f"{record.callsign} {int(record.altitude_ft)}'"
+
+
+def move_marker(marker, latitude: float, longitude: float, text: Optional[str]) -> None:
+    """
+    Move a marker and change its text by updating its canvas items in place.
+
+    set_position, set_text and draw() all end in map_widget.manage_z_order(),
+    six canvas lifts over every marker, so moving n markers that way costs
+    O(n * markers). This leaves the stacking alone: call manage_z_order()
+    once after a pass that moved markers. Only a marker whose items have to
+    be created still goes through draw().
+    """
+    map_widget = marker.map_widget
+    canvas = map_widget.canvas
+    if text is None and marker.canvas_text is not None:
+        # draw() deletes the text item but keeps its id, so the label would never be created again
+        canvas.delete(marker.canvas_text)
+        marker.canvas_text = None
+    marker.position = (latitude, longitude)
+    marker.text = text
+    x, y = marker.get_canvas_pos(marker.position)
+    if not (-50 < x < map_widget.width + 50 and 0 < y < map_widget.height + 70):
+        # Off the canvas: draw() would only delete the items
+        for item in (marker.polygon, marker.big_circle, marker.canvas_text, marker.canvas_icon, marker.canvas_image):
+            if item is not None:
+                canvas.delete(item)
+        marker.polygon = marker.big_circle = marker.canvas_text = marker.canvas_icon = marker.canvas_image = None
+        return
+    drawn = marker.canvas_icon if marker.icon is not None else marker.polygon
+    if drawn is None or (text is not None and marker.canvas_text is None) or marker.image is not None:
+        marker.draw()
+        return
+    if marker.icon is not None:
+        canvas.coords(marker.canvas_icon, x, y)
+    else:
+        canvas.coords(marker.polygon, x - 14, y - 23, x, y, x + 14, y - 23)
+        canvas.coords(marker.big_circle, x - 14, y - 45, x + 14, y - 17)
+    if marker.canvas_text is not None:
+        canvas.coords(marker.canvas_text, x, y + marker.text_y_offset)
+        canvas.itemconfig(marker.canvas_text, text=text)
+
+
+class TrafficMarkerManager:
+    """
+    Keeps map markers for the traffic inside the visible part of the map,
+    updated from TrafficStore deltas.
+
+    Every target's latest record is kept in a grid index, but markers exist
+    only for targets inside the viewport (plus a margin), so drawing cost
+    follows the visible targets rather than all of them. The level of
+    detail depends on the zoom: full markers with labels when zoomed in,
+    icons without labels further out, and one counted marker per cluster
+    below cluster_max_zoom.
+
+    Existing markers are moved in place instead of being deleted and
+    recreated, and only when the target moved, turned or changed its label
+    by more than the thresholds. Removed markers are taken off the canvas
+    together, with a single idle-task flush at the end of the pass instead
+    of one full canvas update per marker. Moved markers are restacked once
+    per pass rather than once each.
+    """
+
+    def __init__(self, map_widget, icon_for: Callable[[float], Any],
+                 position_threshold: float = POSITION_THRESHOLD,
+                 heading_threshold: float = HEADING_THRESHOLD,
+                 label_min_zoom: float = LABEL_MIN_ZOOM,
+                 cluster_max_zoom: float = CLUSTER_MAX_ZOOM):
+        self.map_widget = map_widget
+        self.icon_for = icon_for  # heading in degrees -> PhotoImage, ideally shared (see SpriteCache)
+        self.position_threshold = position_threshold
+        self.heading_threshold = heading_threshold
+        self.label_min_zoom = label_min_zoom
+        self.cluster_max_zoom = cluster_max_zoom
+        self.generation = 0  # TrafficStore generation the markers reflect
+        self.records: Dict[str, Any] = {}  # every known target, visible or not
+        self.index = GridIndex(TRAFFIC_INDEX_CELL)  # lon/lat of every known target
+        self.markers: Dict[str, _Marker] = {}  # visible targets drawn individually
+        self.clusters: Dict[Tuple[int, int], _Marker] = {}  # cluster cell -> marker
+        self.mode = DETAIL_FULL
+        self.timer = FrameTimer()
+        self.stats = {'created': 0, 'moved': 0, 'turned': 0, 'unchanged': 0, 'removed': 0,
+                      'visible': 0, 'total': 0}
+
+    def __len__(self) -> int:
+        return len(self.markers) + len(self.clusters)
+
+    def apply(self, delta: TrafficDelta, viewport: Optional[Box] = None, zoom: Optional[float] = None) -> None:
+        """
+        Bring the markers up to date with a TrafficStore delta.
+
+        viewport is (west, south, east, north) in degrees; None draws every
+        target. zoom picks the level of detail; None means full detail.
+        """
+        self.timer.start()
+        changed = self._absorb(delta)
+        mode = self._detail_for(zoom)
+        if mode != self.mode:
+            self._remove_all()
+            self.mode = mode
+            changed = None  # everything visible has to be drawn again
+        visible = self._visible(viewport)
+        moved = self.stats['moved']
+        removed_any = False
+        if mode == DETAIL_CLUSTERS:
+            removed_any = self._draw_clusters(visible, zoom)
+        else:
+            for icao in [icao for icao in self.markers if icao not in visible]:
+                self._remove(self.markers.pop(icao).marker)
+                removed_any = True
+            show_label = mode == DETAIL_FULL
+            for icao in visible:
+                if changed is None or icao in changed or icao not in self.markers:
+                    self._update(icao, self.records[icao], show_label)
+        if self.stats['moved'] != moved:
+            self.map_widget.manage_z_order()
+        if removed_any:
+            self.map_widget.canvas.update_idletasks()
+        self.generation = delta.generation
+        self.stats['visible'] = len(visible)
+        self.stats['total'] = len(self.records)
+        self.timer.stop()
+
+    def _absorb(self, delta: TrafficDelta) -> Set[str]:
+        """Apply a delta to the record table and index; return the changed ICAO addresses."""
+        removed = list(delta.removed)
+        if delta.full:
+            current = {icao for icao, _ in delta.updated}
+            removed.extend(icao for icao in self.records if icao not in current)
+        for icao in removed:
+            self.records.pop(icao, None)
+            self.index.remove(icao)
+        changed = set()
+        for icao, record in delta.updated:
+            self.records[icao] = record
+            self.index.insert(icao, record.longitude, record.latitude)
+            changed.add(icao)
+        return changed
+
+    def _detail_for(self, zoom: Optional[float]) -> str:
+        if zoom is None or zoom >= self.label_min_zoom:
+            return DETAIL_FULL
+        if zoom > self.cluster_max_zoom:
+            return DETAIL_ICONS
+        return DETAIL_CLUSTERS
+
+    def _visible(self, viewport: Optional[Box]) -> Set[str]:
+        if viewport is None:
+            return set(self.records)
+        west, south, east, north = viewport
+        margin_x = (east - west) * VIEWPORT_MARGIN
+        margin_y = (north - south) * VIEWPORT_MARGIN
+        return self.index.query(west - margin_x, south - margin_y, east + margin_x, north + margin_y)
+
+    def _update(self, icao: str, record, show_label: bool) -> None:
+        latitude, longitude, heading = record.latitude, record.longitude, record.heading_true
+        label = traffic_label(record) if show_label else None
+        entry = self.markers.get(icao)
+        if entry is None:
+            marker = self.map_widget.set_marker(
+                latitude, longitude,
+                icon=self.icon_for(heading),
+                icon_anchor="center",
+                text=label
+            )
+            self.markers[icao] = _Marker(marker, latitude, longitude, heading, label)
+            self.stats['created'] += 1
+            return
+
+        threshold = self.position_threshold
+        moved = (abs(latitude - entry.latitude) > threshold or
+                 abs(longitude - entry.longitude) > threshold or
+                 label != entry.label)
+        turned = abs((heading - entry.heading + 180.0) % 360.0 - 180.0) > self.heading_threshold
+        if turned:
+            icon = self.icon_for(heading)
+            if icon is not entry.marker.icon:
+                # Swaps the image on the existing canvas item, no redraw needed
+                entry.marker.change_icon(icon)
+                self.stats['turned'] += 1
+            entry.heading = heading
+        if moved:
+            move_marker(entry.marker, latitude, longitude, label)
+            entry.latitude, entry.longitude, entry.label = latitude, longitude, label
+            self.stats['moved'] += 1
+        if not (moved or turned):
+            self.stats['unchanged'] += 1
+
+    def _draw_clusters(self, visible: Set[str], zoom: float) -> bool:
+        """Draw one marker per occupied cluster cell; return True if any marker was removed."""
+        # Cells about CLUSTER_CELL_PIXELS wide on screen at this zoom (256 px tiles)
+        cell = 360.0 / (2 ** zoom) * CLUSTER_CELL_PIXELS / 256.0
+        members: Dict[Tuple[int, int], List[Any]] = {}
+        for icao in visible:
+            record = self.records[icao]
+            key = (math.floor(record.longitude / cell), math.floor(record.latitude / cell))
+            members.setdefault(key, []).append(record)
+
+        removed_any = False
+        for key in [key for key in self.clusters if key not in members]:
+            self._remove(self.clusters.pop(key).marker)
+            removed_any = True
+        for key, records in members.items():
+            latitude = sum(record.latitude for record in records) / len(records)
+            longitude = sum(record.longitude for record in records) / len(records)
+            label = str(len(records)) if len(records) > 1 else None
+            entry = self.clusters.get(key)
+            if entry is None:
+                marker = self.map_widget.set_marker(latitude, longitude, text=label)
+                self.clusters[key] = _Marker(marker, latitude, longitude, 0.0, label)
+                self.stats['created'] += 1
+            elif (label != entry.label or
+                  abs(latitude - entry.latitude) > self.position_threshold or
+                  abs(longitude - entry.longitude) > self.position_threshold):
+                move_marker(entry.marker, latitude, longitude, label)
+                entry.latitude, entry.longitude, entry.label = latitude, longitude, label
+                self.stats['moved'] += 1
+            else:
+                self.stats['unchanged'] += 1
+        return removed_any
+
+    def _remove(self, marker) -> None:
+        """Like marker.delete(), minus the full canvas.update() it does for every marker."""
+        if marker in self.map_widget.canvas_marker_list:
+            self.map_widget.canvas_marker_list.remove(marker)
+        canvas = self.map_widget.canvas
+        for item in (marker.polygon, marker.big_circle, marker.canvas_text, marker.canvas_icon, marker.canvas_image):
+            if item is not None:
+                canvas.delete(item)
+        marker.polygon = marker.big_circle = marker.canvas_text = marker.canvas_icon = marker.canvas_image = None
+        marker.deleted = True
+        self.stats['removed'] += 1
+
+    def _remove_all(self) -> None:
+        for entry in list(self.markers.values()) + list(self.clusters.values()):
+            self._remove(entry.marker)
+        self.markers.clear()
+        self.clusters.clear()
+
+    def clear(self) -> None:
+        """Remove every marker and forget all targets."""
+        self._remove_all()
+        self.records.clear()
+        self.index.clear()
+        self.generation = 0
+        self.map_widget.canvas.update_idletasks()
+
+
+def map_viewport(map_widget) -> Tuple[Box, float]:
+    """Visible area of a TkinterMapView as ((west, south, east, north), zoom)."""
+    zoom = round(map_widget.zoom)
+    north, west = osm_to_decimal(*map_widget.upper_left_tile_pos, zoom)
+    south, east = osm_to_decimal(*map_widget.lower_right_tile_pos, zoom)
+    return (west, south, east, north), map_widget.zoom
@@ -1,15 +1,19 @@
 import tkinter as tk
 from tkinter import ttk
-import threading
-import time
 import os
+from typing import Optional
 
-from core.aircraft_state import AircraftStateManager
+from core.aircraft_state import AircraftStateManager, AircraftStateView
+from core.file_watcher import FileWatcher
+from core.ingest import IngestCore
 from core.radio_manager import RadioManager
 from core.transponder_manager import TransponderManager
 from data.simapi_handler import SimAPIHandler
+from gui.tk_bridge import TkBridge
 from tools.rewinger import UDPReceiver
 
+SIMAPI_UPDATE_INTERVAL = 0.75  # seconds, as per SimAPI docs
+
 class RadioDisplay:
     def __init__(self, root):
         self.root = root
@@ -25,13 +29,23 @@ class RadioDisplay:
             os.path.join(os.getcwd(), 'SayIntentionsAI')
         )
         
+        # One event loop owns UDP receive and the SimAPI cycle; results reach Tk through the bridge
+        self.ingest = IngestCore()
+        self.ingest.start()
+        self.bridge = TkBridge(root)
+        self.ingest.subscribe('simapi', self.bridge.wrap(self.on_simapi_cycle))
+        
         # Initialize UDP receiver
-        self.sim_udp_receiver = UDPReceiver()
+        self.sim_udp_receiver = UDPReceiver(ingest=self.ingest)
         self.sim_udp_receiver.start_receiving()
         
-        # SimAPI update thread
+        # SimAPI update job on the ingest loop
         self.running = False
-        self.update_thread = None
+        self.simapi_job = None
+        self.last_gps_seq = -1  # frame.gps_seq last applied to the aircraft state
+        
+        # Commands from SayIntentions.AI are picked up as soon as they are appended
+        self.output_watcher = FileWatcher(self.ingest, self.simapi_handler.output_path, self.read_simapi_output)
         
         # Continuous adjustment variables
         self.adjustment_running = False
@@ -184,7 +198,7 @@ class RadioDisplay:
             ttk.Label(aircraft_frame, text=f"{field.title()}:").grid(row=row, column=0, padx=5, pady=2, sticky=tk.W)
             self.aircraft_entries[field] = ttk.Entry(aircraft_frame, width=20)
             self.aircraft_entries[field].grid(row=row, column=1, padx=5, pady=2, sticky=tk.W)
-            self.aircraft_entries[field].insert(0, getattr(self.aircraft_state.state, field))
+            self.aircraft_entries[field].insert(0, getattr(self.aircraft_state.view(), field))
             row += 1
             
         # Add a separator
@@ -192,11 +206,11 @@ class RadioDisplay:
         row += 1
         
         # Second row: read-only fields (position, altitude, heading)
-        for field in ['position', 'altitude', 'heading']:
+        for field in AircraftStateView.FIELDS:
             ttk.Label(aircraft_frame, text=f"{field.title()}:").grid(row=row, column=0, padx=5, pady=2, sticky=tk.W)
             self.aircraft_entries[field] = ttk.Entry(aircraft_frame, width=20, state='readonly')
             self.aircraft_entries[field].grid(row=row, column=1, padx=5, pady=2, sticky=tk.W)
-            self.aircraft_entries[field].insert(0, getattr(self.aircraft_state.state, field))
+            self.aircraft_entries[field].insert(0, getattr(self.aircraft_state.view(), field))
             row += 1
             
         # Transponder Section
@@ -283,40 +297,57 @@ class RadioDisplay:
         self.auto_apply_changes = not self.auto_apply_changes
         self.auto_apply_button.config(text=f"Auto-Apply: {'ON' if self.auto_apply_changes else 'OFF'}")
     
+    def change_on_loop(self, change, show=None):
+        """
+        Run change() on the ingest loop, where the SimAPI cycle reads the
+        aircraft, radio and transponder state, then show(result) on the Tk
+        thread.
+        """
+        def apply():
+            result = change()
+            if show is not None:
+                self.bridge.post(show, result)
+        self.ingest.call_soon(apply)
+    
+    def show_standby_frequency(self, radio_num: int, freq: float):
+        label = self.standby_label1 if radio_num == 1 else self.standby_label2
+        label.config(text=f"{freq:.3f}")
+    
+    def show_active_frequency(self, radio_num: int, freq: float):
+        label = self.active_label1 if radio_num == 1 else self.active_label2
+        label.config(text=f"{freq:.3f}")
+    
+    def show_transponder_code(self, code: int):
+        self.transponder_label.config(text=f"{code:04d}")
+    
     def adjust_frequency(self, radio_num: int, adjustment_type: str, direction: int):
         """Adjust the frequency for the specified radio"""
-        new_freq = self.radio_manager.adjust_frequency(radio_num, adjustment_type, direction)
-        if radio_num == 1:
-            self.standby_label1.config(text=f"{new_freq:.3f}")
-        else:
-            self.standby_label2.config(text=f"{new_freq:.3f}")
+        self.change_on_loop(lambda: self.radio_manager.adjust_frequency(radio_num, adjustment_type, direction),
+                            lambda new_freq: self.show_standby_frequency(radio_num, new_freq))
     
     def swap_frequencies(self, radio_num: int):
         """Swap active and standby frequencies for the specified radio"""
-        active, standby = self.radio_manager.swap_frequencies(radio_num)
-        if radio_num == 1:
-            self.active_label1.config(text=f"{active:.3f}")
-            self.standby_label1.config(text=f"{standby:.3f}")
-        else:
-            self.active_label2.config(text=f"{active:.3f}")
-            self.standby_label2.config(text=f"{standby:.3f}")
+        def show(frequencies):
+            self.show_active_frequency(radio_num, frequencies[0])
+            self.show_standby_frequency(radio_num, frequencies[1])
+        self.change_on_loop(lambda: self.radio_manager.swap_frequencies(radio_num), show)
     
     def adjust_transponder(self, direction: int):
         """Adjust the transponder code"""
-        new_code = self.transponder_manager.adjust_code(direction)
-        self.transponder_label.config(text=f"{new_code:04d}")
+        self.change_on_loop(lambda: self.transponder_manager.adjust_code(direction), self.show_transponder_code)
     
     def update_transponder_mode(self):
         """Update the transponder mode based on radio button selection"""
         mode = int(self.mode_var.get())
-        self.transponder_manager.set_mode(mode)
+        self.change_on_loop(lambda: self.transponder_manager.set_mode(mode))
         self.ident_button.config(state='normal' if mode == 3 else 'disabled')
     
     def toggle_ident(self):
         """Toggle the IDENT state"""
-        ident = self.transponder_manager.toggle_ident()
-        if ident:
-            self.root.after(18000, lambda: self.transponder_manager.toggle_ident())
+        def show(ident):
+            if ident:
+                self.root.after(18000, lambda: self.change_on_loop(self.transponder_manager.toggle_ident))
+        self.change_on_loop(self.transponder_manager.toggle_ident, show)
     
     def toggle_reception(self):
         """Toggle the reception of SimAPI data"""
@@ -330,57 +361,72 @@ class RadioDisplay:
         self.running = True
         self.start_button.config(text="Stop SimAPI")
         
-        # Start update thread
-        self.update_thread = threading.Thread(target=self.update_simapi_loop)
-        self.update_thread.daemon = True
-        self.update_thread.start()
+        # Run the SimAPI cycle on the ingest loop
+        self.simapi_job = self.ingest.add_periodic(SIMAPI_UPDATE_INTERVAL, self.update_simapi_cycle, "SimAPI update")
+        self.output_watcher.start()
     
     def stop_reception(self):
         """Stop receiving simulator data and SimAPI integration"""
         self.running = False
         self.start_button.config(text="Start SimAPI")
+        if self.simapi_job:
+            self.simapi_job.cancel()
+            self.simapi_job = None
+        self.output_watcher.stop()
+        print(f"SimAPI input write stats: {self.simapi_handler.get_write_stats()}")
+    
+    def update_simapi_cycle(self):
+        """Update SimAPI data and read output requests; runs on the ingest loop, never touches Tk"""
+        # Get latest simulator data
+        frame = self.sim_udp_receiver.get_frame()
+        display = None
+        if frame.gps and frame.gps_seq != self.last_gps_seq:
+            self.last_gps_seq = frame.gps_seq
+            # Update aircraft state; the strings are formatted on the Tk thread when shown
+            self.aircraft_state.update_from_gps(frame.gps, frame.attitude)
+            display = self.aircraft_state.view()
+        
+        # Always update SimAPI data, regardless of GPS data
+        self.write_simapi_input()
+        
+        # Check for SimAPI output requests the watcher has not delivered yet
+        self.ingest.publish('simapi', display, self._read_output_requests())
     
-    def update_simapi_loop(self):
-        """Update SimAPI data and handle output requests"""
-        while self.running:
-            try:
-                # Get latest simulator data
-                data = self.sim_udp_receiver.get_latest_data()
-                if data and data.get('gps'):
-                    # Update aircraft state
-                    self.aircraft_state.update_from_gps(data['gps'], data.get('attitude'))
-                    
-                    # Update aircraft info display
-                    state = self.aircraft_state.get_state()
-                    for field in ['position', 'altitude', 'heading']:
-                        self.aircraft_entries[field].config(state='normal')
-                        self.aircraft_entries[field].delete(0, tk.END)
-                        self.aircraft_entries[field].insert(0, getattr(state, field))
-                        self.aircraft_entries[field].config(state='readonly')
-                
-                # Always update SimAPI data, regardless of GPS data
-                state = self.aircraft_state.get_state()
-                simapi_data = self.simapi_handler.create_simapi_data(
-                    state.__dict__,
-                    self.radio_manager.get_radio_state(),
-                    self.transponder_manager.get_transponder_state()
-                )
-                self.simapi_handler.write_input_data(simapi_data)
-                
-                # Check for SimAPI output requests
-                output_data = self.simapi_handler.read_output_data()
-                if output_data:
-                    if isinstance(output_data, list):
-                        for request in output_data:
-                            self.handle_simapi_output(request)
-                    else:
-                        self.handle_simapi_output(output_data)
-                
-                time.sleep(0.75)  # Update every 750ms as per SimAPI docs
-                
-            except Exception as e:
-                print(f"Error in SimAPI update loop: {e}")
-                time.sleep(1)  # Wait a bit longer on error
+    def read_simapi_output(self):
+        """Deliver output requests as soon as the output file changes; runs on the ingest loop"""
+        requests = self._read_output_requests()
+        if requests:
+            self.ingest.publish('simapi', None, requests)
+    
+    def _read_output_requests(self) -> list:
+        output_data = self.simapi_handler.read_output_data()
+        if output_data and not isinstance(output_data, list):
+            output_data = [output_data]
+        return output_data or []
+    
+    def write_simapi_input(self):
+        """Write the current state to the SimAPI input file; runs on the ingest loop"""
+        self.simapi_handler.write_input_state(
+            self.aircraft_state.get_state(),
+            self.radio_manager.get_radio_state(),
+            self.transponder_manager.get_transponder_state()
+        )
+    
+    def on_simapi_cycle(self, display: Optional[AircraftStateView], requests: list):
+        """Show the result of a SimAPI cycle; runs on the Tk thread via the bridge"""
+        # Update aircraft info display
+        if display is not None:
+            for field in AircraftStateView.FIELDS:
+                self.aircraft_entries[field].config(state='normal')
+                self.aircraft_entries[field].delete(0, tk.END)
+                self.aircraft_entries[field].insert(0, getattr(display, field))
+                self.aircraft_entries[field].config(state='readonly')
+        
+        for request in requests:
+            self.handle_simapi_output(request)
+        if requests:
+            # Write the applied changes right away instead of waiting for the next cycle
+            self.ingest.call_soon(self.write_simapi_input)
     
     def handle_simapi_output(self, output_data: dict):
         """Handle SimAPI output data and update the display accordingly"""
@@ -398,11 +444,8 @@ class RadioDisplay:
                 'description': f"Set COM{radio_num} active frequency to {new_freq:.3f} MHz"
             }
             if self.auto_apply_changes:
-                self.radio_manager.set_active_frequency(radio_num, new_freq)
-                if radio_num == 1:
-                    self.active_label1.config(text=f"{new_freq:.3f}")
-                else:
-                    self.active_label2.config(text=f"{new_freq:.3f}")
+                self.change_on_loop(lambda: self.radio_manager.set_active_frequency(radio_num, new_freq))
+                self.show_active_frequency(radio_num, new_freq)
         elif setvar in ['COM_STBY_RADIO_SET_HZ', 'COM2_STBY_RADIO_SET_HZ']:
             new_freq = float(output_data['value']) / 1000000
             radio_num = int(output_data['radio'])
@@ -413,12 +456,9 @@ class RadioDisplay:
                 'description': f"Set COM{radio_num} standby frequency to {new_freq:.3f} MHz"
             }
             if self.auto_apply_changes:
-                if radio_num == 1:
-                    self.radio_manager.standby_freq_1 = new_freq
-                    self.standby_label1.config(text=f"{new_freq:.3f}")
-                else:
-                    self.radio_manager.standby_freq_2 = new_freq
-                    self.standby_label2.config(text=f"{new_freq:.3f}")
+                attribute = 'standby_freq_1' if radio_num == 1 else 'standby_freq_2'
+                self.change_on_loop(lambda: setattr(self.radio_manager, attribute, new_freq))
+                self.show_standby_frequency(radio_num, new_freq)
         elif setvar in ['COM_RADIO_SWAP', 'COM2_RADIO_SWAP']:
             radio_num = int(output_data['radio'])
             change = {
@@ -436,8 +476,8 @@ class RadioDisplay:
                 'description': f"Set transponder code to {new_code:04d}"
             }
             if self.auto_apply_changes:
-                self.transponder_manager.code = new_code
-                self.transponder_label.config(text=f"{new_code:04d}")
+                self.change_on_loop(lambda: setattr(self.transponder_manager, 'code', new_code))
+                self.show_transponder_code(new_code)
         elif setvar == 'AUDIO_PANEL_VOLUME_SET':
             volume = int(output_data['value'])
             change = {
@@ -506,20 +546,13 @@ class RadioDisplay:
 
     def set_transponder_digit(self, digit: int):
         """Set a digit in the transponder code"""
-        current_code = self.transponder_manager.code
-        # Shift current code left by one digit and add new digit
-        new_code = ((current_code * 10) + digit) % 10000
-        self.transponder_manager.code = new_code
-        self.transponder_label.config(text=f"{new_code:04d}")
-        
-        # Update SimAPI data immediately
-        state = self.aircraft_state.get_state()
-        simapi_data = self.simapi_handler.create_simapi_data(
-            state.__dict__,
-            self.radio_manager.get_radio_state(),
-            self.transponder_manager.get_transponder_state()
-        )
-        self.simapi_handler.write_input_data(simapi_data)
+        def change():
+            # Shift current code left by one digit and add new digit
+            self.transponder_manager.code = ((self.transponder_manager.code * 10) + digit) % 10000
+            # Update SimAPI data immediately
+            self.write_simapi_input()
+            return self.transponder_manager.code
+        self.change_on_loop(change, self.show_transponder_code)
 
     def create_aircraft_config_section(self):
         """Create the aircraft configuration section"""
@@ -619,7 +652,7 @@ class RadioDisplay:
         """Update engine type"""
         try:
             engine_type = int(self.engine_type_var.get())
-            self.aircraft_state.set_engine_type(engine_type)
+            self.change_on_loop(lambda: self.aircraft_state.set_engine_type(engine_type))
         except ValueError:
             pass
 
@@ -627,7 +660,7 @@ class RadioDisplay:
         """Update aircraft weight"""
         try:
             weight = int(self.weight_var.get())
-            self.aircraft_state.set_total_weight(weight)
+            self.change_on_loop(lambda: self.aircraft_state.set_total_weight(weight))
         except ValueError:
             pass
 
@@ -637,7 +670,7 @@ class RadioDisplay:
             pressure = float(self.pressure_var.get())
             # Convert from inHg to inHg*100 (e.g., 29.92 -> 2992)
             pressure_int = int(pressure * 100)
-            self.aircraft_state.set_sea_level_pressure(pressure_int)
+            self.change_on_loop(lambda: self.aircraft_state.set_sea_level_pressure(pressure_int))
         except ValueError:
             pass
 
@@ -645,24 +678,21 @@ class RadioDisplay:
         """Update typical descent rate"""
         try:
             rate = int(self.descent_var.get())
-            self.aircraft_state.set_typical_descent_rate(rate)
+            self.change_on_loop(lambda: self.aircraft_state.set_typical_descent_rate(rate))
         except ValueError:
             pass
 
     def update_electrical(self):
         """Update electrical system state"""
-        self.aircraft_state.set_electrical_state(
-            self.master_var.get(),
-            self.com1_var.get(),
-            self.com2_var.get()
-        )
+        master, com1, com2 = self.master_var.get(), self.com1_var.get(), self.com2_var.get()
+        self.change_on_loop(lambda: self.aircraft_state.set_electrical_state(master, com1, com2))
 
     def update_wind(self):
         """Update wind data"""
         try:
             direction = int(self.wind_dir_var.get())
             velocity = int(self.wind_vel_var.get())
-            self.aircraft_state.set_wind_data(direction, velocity)
+            self.change_on_loop(lambda: self.aircraft_state.set_wind_data(direction, velocity))
         except ValueError:
             pass
 
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Any, Dict
+
+from PIL import ImageTk
+
+# Headings are rounded to multiples of this before rotating
+SPRITE_HEADING_STEP = 5.0  # degrees
+# Rotated images kept at most (the full 360° at 5° steps is 72)
+SPRITE_CACHE_SIZE = 128
+
+
+class SpriteCache:
+    """
+    Rotated copies of one icon, shared by every marker that shows it.
+
+    Headings are quantized to step-degree buckets; each bucket's image is
+    rotated and turned into a PhotoImage once, on first use (or up front
+    with warm()). At most max_size images are kept, least recently used
+    first out. An evicted image stays valid for markers still showing it.
+    """
+
+    def __init__(self, image, step: float = SPRITE_HEADING_STEP, max_size: int = SPRITE_CACHE_SIZE):
+        self.image = image  # PIL image, drawn pointing north
+        self.step = step
+        self.max_size = max_size
+        self.buckets = max(1, int(round(360.0 / step)))
+        self._sprites: 'OrderedDict[int, Any]' = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def bucket(self, heading: float) -> int:
+        """Bucket number of a heading in degrees."""
+        return int(round(heading / self.step)) % self.buckets
+
+    def get(self, heading: float):
+        """PhotoImage of the icon rotated to heading (clockwise, 0 = north up)."""
+        bucket = self.bucket(heading)
+        sprites = self._sprites
+        sprite = sprites.get(bucket)
+        if sprite is not None:
+            sprites.move_to_end(bucket)
+            self.stats['hits'] += 1
+            return sprite
+        self.stats['misses'] += 1
+        sprite = self._render(bucket)
+        sprites[bucket] = sprite
+        if len(sprites) > self.max_size:
+            sprites.popitem(last=False)
+            self.stats['evictions'] += 1
+        return sprite
+
+    def _render(self, bucket: int):
+        # PIL rotates counter-clockwise
+        return ImageTk.PhotoImage(self.image.rotate(-bucket * self.step))
+
+    def warm(self) -> None:
+        """Render every bucket now (up to max_size) so later lookups never rotate."""
+        for bucket in range(min(self.buckets, self.max_size)):
+            if bucket not in self._sprites:
+                self._sprites[bucket] = self._render(bucket)
+
+    def clear(self) -> None:
+        self._sprites.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus the current size and hit rate."""
+        stats: Dict[str, Any] = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['size'] = len(self._sprites)
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
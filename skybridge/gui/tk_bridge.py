@@ -0,0 +1,49 @@
+import queue
+from typing import Callable
+
+# How often the Tk thread drains the bridge queue
+BRIDGE_POLL_INTERVAL = 20  # milliseconds
+
+
+class TkBridge:
+    """
+    Thread-safe hand-off from worker threads (the ingest loop) to the Tk thread.
+
+    Tk widgets may only be touched from the thread running mainloop(). Calls
+    posted here are queued and run by the Tk thread on its next poll, in the
+    order they were posted.
+    """
+
+    def __init__(self, root, poll_interval: int = BRIDGE_POLL_INTERVAL):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._after_id = self.root.after(self.poll_interval, self._drain)
+
+    def post(self, callback: Callable, *args) -> None:
+        """Queue callback(*args) to run on the Tk thread. Safe to call from any thread."""
+        self._queue.put((callback, args))
+
+    def wrap(self, callback: Callable) -> Callable:
+        """Return a function that, called from any thread, runs callback on the Tk thread."""
+        def posted(*args):
+            self.post(callback, *args)
+        return posted
+
+    def _drain(self) -> None:
+        try:
+            while True:
+                callback, args = self._queue.get_nowait()
+                try:
+                    callback(*args)
+                except Exception as e:
+                    print(f"Error in Tk callback: {e}")
+        except queue.Empty:
+            pass
+        self._after_id = self.root.after(self.poll_interval, self._drain)
+
+    def close(self) -> None:
+        """Stop draining; queued calls are discarded."""
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
@@ -8,6 +8,11 @@ from tkinter import ttk, filedialog, scrolledtext
 import threading
 import time
 import socket
+from itertools import accumulate
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.replay import MAX_RATE, MIN_RATE, ReplayScheduler
 from read_my_csv import extract_gps_from_csv
 import random
 import string
@@ -24,6 +29,9 @@ class GPSDataSenderApp:
         self.status = tk.StringVar(value="Ready")
         self.sending_active = False
         self.send_thread = None
+        self.scheduler = None
+        self.rate = tk.DoubleVar(value=1.0)
+        self.max_throughput = tk.BooleanVar(value=False)
         
         # Aircraft metadata variables
         self.icao_address = tk.StringVar(value="")
@@ -60,6 +68,18 @@ class GPSDataSenderApp:
         ttk.Radiobutton(mode_frame, text="Traffic Mode", variable=self.mode, value="traffic").pack(side=tk.LEFT, padx=20, pady=5)
         ttk.Radiobutton(mode_frame, text="GPS Mode", variable=self.mode, value="gps").pack(side=tk.LEFT, padx=20, pady=5)
         
+        # Playback rate section; the rate can be changed while sending
+        rate_frame = ttk.LabelFrame(main_frame, text="Playback Rate", padding="5")
+        rate_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        rate_box = ttk.Spinbox(rate_frame, textvariable=self.rate, values=(0.5, 1, 2, 5, 10, 20, 50), width=6,
+                               command=self.apply_rate)
+        rate_box.pack(side=tk.LEFT, padx=5, pady=5)
+        rate_box.bind("<Return>", lambda event: self.apply_rate())
+        ttk.Label(rate_frame, text="x").pack(side=tk.LEFT, pady=5)
+        ttk.Checkbutton(rate_frame, text="Max throughput (load test)",
+                        variable=self.max_throughput).pack(side=tk.LEFT, padx=20, pady=5)
+        
         # UDP Settings section
         udp_frame = ttk.LabelFrame(main_frame, text="UDP Settings", padding="5")
         udp_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -148,6 +168,10 @@ class GPSDataSenderApp:
             self.log(f"Error: File '{self.file_path.get()}' not found.")
             return
             
+        if self.get_rate() is None:
+            self.log(f"Error: Playback rate must be between {MIN_RATE:g} and {MAX_RATE:g}.")
+            return
+            
         # Disable start button, enable stop button
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
@@ -158,8 +182,24 @@ class GPSDataSenderApp:
         self.send_thread.daemon = True
         self.send_thread.start()
         
+    def get_rate(self):
+        """Playback rate from the rate box, or None if it is not a valid rate"""
+        try:
+            rate = float(self.rate.get())
+        except (tk.TclError, ValueError):
+            return None
+        return rate if MIN_RATE <= rate <= MAX_RATE else None
+        
+    def apply_rate(self):
+        rate = self.get_rate()
+        if rate is not None and self.scheduler is not None:
+            self.scheduler.set_rate(rate)
+            self.log(f"Playback rate set to {rate:g}x")
+        
     def stop_sending(self):
         self.sending_active = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
         self.status.set("Stopped")
         self.log("Sending stopped by user")
         self.start_button.config(state=tk.NORMAL)
@@ -228,40 +268,44 @@ class GPSDataSenderApp:
                 sock.sendto(bytes(aircraft_info, "utf-8"), (self.udp_ip.get(), self.udp_port.get()))
                 self.log(f"Sent aircraft info: {aircraft_info}")
             
-            # Main sending loop
-            line_count = 0
+            # Datagrams are formatted up front so building them costs nothing between deadlines
             aircraft_info = (
                     f"XAIRCRAFT{simulator_name},{self.aircraft_id.get()},{icao_address},{self.aircraft_type.get()},"
                     f"{self.registration.get()},{callsign},{self.flight_number.get()}"
                 )
             print(aircraft_info)
+            traffic_mode = self.mode.get().lower() == "traffic"
+            datagrams = []
             for i in gps_att_time_data:
-                if not self.sending_active:
-                    break
-                    
-                # Update UI from thread
-                self.root.after(0, lambda count=line_count: self.status.set(f"Sending: line {count}"))
-                
-                if self.mode.get().lower() == "traffic":
+                if traffic_mode:
                     # XTRAFFIC<simulator_name>,<icao_address>,<latitude>,<longitude>,<altitude_ft>,<vertical_speed_ft/min>,<airborne_flag>,<heading_true>,<velocity_knots>,<callsign>
                     message = f"XTRAFFIC{simulator_name},{icao_address},{i[1]},{i[0]},{i[2]},0.0,{airborne_flag},{i[5]},{i[4]},{callsign}"
-                    sock.sendto(bytes(message, "utf-8"), (self.udp_ip.get(), self.udp_port.get()))
+                    datagrams.append((bytes(message, "utf-8"),))
                 else:  # GPS mode
                     # XGPS<simulator_name>,<longitude>,<latitude>,<altitude_msl>,<track_true_north>,<groundspeed_m/s>
                     message = f"XGPS{simulator_name},{i[0]},{i[1]},{i[2]},{i[3]},{i[4]}"
                     message2 = f"XATT{simulator_name},{i[5]},{i[6]},{i[7]}"
-                    #message3 = f"XTRAFFIC{simulator_name},{icao_address},{i[1]},{i[0]},{i[2]},0.0,{airborne_flag},{i[5]},{i[4]},{callsign}"
-                    sock.sendto(bytes(aircraft_info, "utf-8"), (self.udp_ip.get(), self.udp_port.get()))
-                    sock.sendto(bytes(message, "utf-8"), (self.udp_ip.get(), self.udp_port.get()))
-                    sock.sendto(bytes(message2, "utf-8"), (self.udp_ip.get(), self.udp_port.get()))
-                
-                line_count += 1
-                self.root.after(0, lambda msg=f"Line {line_count}: {message}": self.log(msg))
-                #self.root.after(0, lambda msg=f"Line {line_count}: {message2}": self.log(msg))
-                self.root.after(0, lambda msg=f"Line {line_count}: {aircraft_info}": self.log(msg))
-                
-                # Wait for the next data point
-                time.sleep(float(i[8]))
+                    datagrams.append((bytes(aircraft_info, "utf-8"), bytes(message, "utf-8"), bytes(message2, "utf-8")))
+            # Each row's time_delta is the gap since the previous row; the schedule needs offsets from the start
+            times = list(accumulate(float(i[8]) for i in gps_att_time_data))
+            address = (self.udp_ip.get(), self.udp_port.get())
+            
+            def send(number):
+                for datagram in datagrams[number]:
+                    sock.sendto(datagram, address)
+            
+            def progress(number):
+                # Once a second rather than every line, so the log does not slow the replay down
+                message = datagrams[number][-2 if len(datagrams[number]) > 1 else 0].decode("utf-8")
+                self.root.after(0, lambda count=number + 1: self.status.set(f"Sending: line {count}/{len(datagrams)}"))
+                self.root.after(0, lambda msg=f"Line {number + 1}: {message}": self.log(msg))
+            
+            self.scheduler = ReplayScheduler(times, send, self.get_rate(), self.max_throughput.get(), progress=progress)
+            if not self.sending_active:  # stopped while the file was being read
+                self.scheduler.stop()
+            stats = self.scheduler.run()
+            line_count = stats.sent
+            self.root.after(0, lambda report=stats.report(): self.log(f"Timing: {report}"))
                 
             # Finalize
             if self.sending_active:  # Only if not stopped by user
@@ -277,6 +321,7 @@ class GPSDataSenderApp:
             self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
             self.root.after(0, lambda: self.stop_button.config(state=tk.DISABLED))
             self.sending_active = False
+            self.scheduler = None
 
 def main():
     root = tk.Tk()
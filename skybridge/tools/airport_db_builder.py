@@ -0,0 +1,227 @@
+"""
+Build an offline airport database from a saved OSM extract.
+
+Reads a regional extract (an Overpass JSON dump or an OSM XML file,
+optionally gzipped) in two passes (ways and relations, then the nodes
+they use), finds every aerodrome with an ICAO code,
+splits the runways, taxiways, parking positions and holding points among
+them and writes one layout per airport (the same format as
+osm_airport_extractor) to an airport database. The airport visualizer and
+Rewinger open that database and load any airport from it by ICAO code.
+
+Usage:
+    python airport_db_builder.py <extract.osm|extract.json> <airports.sqlite>
+"""
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.airport_db import write_airport_database
+from tools.osm_airport_extractor import Node, OSMAirportExtractor, Way
+from utils.spatial_index import GridIndex
+
+# Aerodromes mapped as a single node get a square this many degrees either side
+AERODROME_NODE_HALF_SIZE = 0.03  # about 3 km
+AERODROME_INDEX_CELL = 0.05  # degrees
+
+FEATURE_WAY_TYPES = ('runway', 'taxiway')
+FEATURE_NODE_TYPES = ('parking_position', 'holding_position')
+
+Ring = List[Tuple[float, float]]  # (lat, lon) points of a closed outline
+
+
+class Aerodrome:
+    """An aerodrome of the extract and the features found inside it."""
+
+    def __init__(self, icao: str, name: str, rings: List[Ring], bbox: Tuple[float, float, float, float]):
+        self.icao = icao
+        self.name = name
+        self.rings = rings  # empty for an aerodrome mapped as a node: bbox only
+        self.bbox = bbox  # min_lat, min_lon, max_lat, max_lon
+        self.ways: List[Way] = []
+        self.nodes: List[Node] = []
+
+    def contains(self, lat: float, lon: float) -> bool:
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        if not self.rings:
+            return True
+        # Even-odd rule over all rings, so inner rings cut holes
+        inside = False
+        for ring in self.rings:
+            for (lat1, lon1), (lat2, lon2) in zip(ring, ring[1:] + ring[:1]):
+                if (lon1 > lon) != (lon2 > lon) and lat < lat1 + (lon - lon1) * (lat2 - lat1) / (lon2 - lon1):
+                    inside = not inside
+        return inside
+
+
+def _ring(extractor: OSMAirportExtractor, node_ids: Sequence[int]) -> Optional[Ring]:
+    nodes = extractor.nodes
+    if len(node_ids) < 3 or any(node_id not in nodes for node_id in node_ids):
+        return None
+    return [(nodes[node_id].lat, nodes[node_id].lon) for node_id in node_ids]
+
+
+def _join_ways(ways: List[Sequence[int]]) -> List[List[int]]:
+    """
+    Closed node id loops made by joining ways end to end (reversing them as
+    needed), the way multipolygon outlines are split over several ways.
+    Ways that do not close a loop are dropped.
+    """
+    loops = []
+    open_ways: Dict[int, List[int]] = {}
+    ends: Dict[int, List[int]] = {}  # end node id -> numbers of open ways ending there
+    for number, node_ids in enumerate(ways):
+        if len(node_ids) < 2:
+            continue
+        if node_ids[0] == node_ids[-1]:
+            loops.append(list(node_ids))
+            continue
+        open_ways[number] = list(node_ids)
+        ends.setdefault(node_ids[0], []).append(number)
+        ends.setdefault(node_ids[-1], []).append(number)
+
+    while open_ways:
+        number, loop = open_ways.popitem()
+        for end in (loop[0], loop[-1]):
+            ends[end].remove(number)
+        while loop[0] != loop[-1]:
+            candidates = ends.get(loop[-1])
+            if not candidates:
+                break
+            number = candidates.pop()
+            way = open_ways.pop(number)
+            other_end = way[-1] if way[0] == loop[-1] else way[0]
+            ends[other_end].remove(number)
+            loop.extend(way[1:] if way[0] == loop[-1] else way[-2::-1])
+        if loop[0] == loop[-1]:
+            loops.append(loop)
+    return loops
+
+
+def _aerodrome(icao: str, tags: Dict[str, str], rings: List[Ring]) -> Optional[Aerodrome]:
+    points = [point for ring in rings for point in ring]
+    if not points:
+        return None
+    bbox = (min(p[0] for p in points), min(p[1] for p in points),
+            max(p[0] for p in points), max(p[1] for p in points))
+    return Aerodrome(icao, tags.get('name', ''), rings, bbox)
+
+
+def find_aerodromes(extractor: OSMAirportExtractor, relations: List[Dict[str, Any]]) -> List[Aerodrome]:
+    """Aerodromes with an ICAO code, mapped as a closed way, a multipolygon relation or a node."""
+    aerodromes = []
+    for way in extractor.ways.values():
+        icao = way.tags.get('icao', '').strip().upper()
+        if way.tags.get('aeroway') == 'aerodrome' and icao:
+            ring = _ring(extractor, way.nodes)
+            aerodrome = _aerodrome(icao, way.tags, [ring] if ring else [])
+            if aerodrome is not None:
+                aerodromes.append(aerodrome)
+    for relation in relations:
+        tags = relation.get('tags', {})
+        icao = tags.get('icao', '').strip().upper()
+        if not icao:
+            continue
+        # Outlines are often split over several member ways; join them per role
+        by_role: Dict[str, List[Sequence[int]]] = {'outer': [], 'inner': []}
+        for member in relation.get('members', []):
+            way = extractor.ways.get(member['ref']) if member['type'] == 'way' else None
+            if way is not None:
+                by_role['inner' if member.get('role') == 'inner' else 'outer'].append(way.nodes)
+        rings = []
+        for member_ways in by_role.values():
+            for loop in _join_ways(member_ways):
+                ring = _ring(extractor, loop)
+                if ring:
+                    rings.append(ring)
+        aerodrome = _aerodrome(icao, tags, rings)
+        if aerodrome is not None:
+            aerodromes.append(aerodrome)
+    for node in extractor.nodes.tagged():
+        icao = node.tags.get('icao', '').strip().upper()
+        if node.tags.get('aeroway') == 'aerodrome' and icao:
+            size = AERODROME_NODE_HALF_SIZE
+            aerodromes.append(Aerodrome(icao, node.tags.get('name', ''), [],
+                                        (node.lat - size, node.lon - size, node.lat + size, node.lon + size)))
+    # A polygon beats a node for the same airport
+    by_icao: Dict[str, Aerodrome] = {}
+    for aerodrome in aerodromes:
+        if aerodrome.icao not in by_icao or (aerodrome.rings and not by_icao[aerodrome.icao].rings):
+            by_icao[aerodrome.icao] = aerodrome
+    return list(by_icao.values())
+
+
+def split_airports(extractor: OSMAirportExtractor, relations: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Layout of every aerodrome, built from the features that lie inside it."""
+    aerodromes = find_aerodromes(extractor, relations)
+    grid = GridIndex(AERODROME_INDEX_CELL)
+    for number, aerodrome in enumerate(aerodromes):
+        min_lat, min_lon, max_lat, max_lon = aerodrome.bbox
+        grid.insert(number, min_lon, min_lat, max_lon, max_lat)
+
+    def owner(lat: float, lon: float) -> Optional[Aerodrome]:
+        for number in grid.query(lon, lat, lon, lat):
+            if aerodromes[number].contains(lat, lon):
+                return aerodromes[number]
+        return None
+
+    nodes = extractor.nodes
+    for way in extractor.ways.values():
+        if way.tags.get('aeroway') not in FEATURE_WAY_TYPES or len(way.nodes) < 2:
+            continue
+        if any(node_id not in nodes for node_id in way.nodes):
+            continue  # cut off at the edge of the extract
+        middle = nodes[way.nodes[len(way.nodes) // 2]]
+        aerodrome = owner(middle.lat, middle.lon)
+        if aerodrome is not None:
+            aerodrome.ways.append(way)
+    for node in nodes.tagged():
+        if node.tags.get('aeroway') in FEATURE_NODE_TYPES:
+            aerodrome = owner(node.lat, node.lon)
+            if aerodrome is not None:
+                aerodrome.nodes.append(node)
+
+    for aerodrome in aerodromes:
+        airport = OSMAirportExtractor()
+        airport.ways = {way.id: way for way in aerodrome.ways}
+        for node in aerodrome.nodes:
+            airport.nodes.add(node.id, node.lat, node.lon, node.tags)
+        for way in aerodrome.ways:
+            for node_id in way.nodes:
+                airport.nodes.add(node_id, *nodes.coords(node_id))
+        yield airport.build_layout(aerodrome.icao, aerodrome.name)
+
+
+def build_database(extract_path: str, database_path: str) -> int:
+    """Read the extract, split it into airports and write the database; return the airport count."""
+    extractor = OSMAirportExtractor()
+    start = time.perf_counter()
+    extractor.load_osm_file(extract_path)
+    read = time.perf_counter() - start
+    print(f"Read {len(extractor.nodes)} nodes and {len(extractor.ways)} ways in {read:.1f} s")
+
+    start = time.perf_counter()
+    count = write_airport_database(database_path, split_airports(extractor, extractor.relations),
+                                   source=os.path.basename(extract_path))
+    print(f"Wrote {count} airports to {database_path} in {time.perf_counter() - start:.1f} s")
+    return count
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python airport_db_builder.py <extract.osm|extract.json> <airports.sqlite>")
+        sys.exit(1)
+    try:
+        build_database(sys.argv[1], sys.argv[2])
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, simpledialog
 from tkintermapview import TkinterMapView
-import json
 from dataclasses import dataclass
 from typing import List, Tuple, Dict
 import math
 import os
 from utils.geo_utils import calculate_heading
+from data.airport_db import is_airport_database, load_layout
 
 @dataclass
 class Runway:
@@ -87,22 +87,29 @@ class AirportVisualizer:
         initial_dir = "airport_data" if os.path.exists("airport_data") else "."
         
         file_path = filedialog.askopenfilename(
-            title="Select Airport JSON File",
+            title="Select Airport JSON File or Database",
             initialdir=initial_dir,
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("Airport databases", "*.sqlite *.db"), ("All files", "*.*")]
         )
         
         if not file_path:
             print("No file selected. Exiting...")
             return ""
+
+        # A database holds many airports: ask which one
+        self.layout_icao = None
+        if is_airport_database(file_path):
+            self.layout_icao = simpledialog.askstring("Airport", "ICAO code:", parent=self.root)
+            if not self.layout_icao:
+                print("No airport selected. Exiting...")
+                return ""
             
         return file_path
         
     def load_airport_data(self):
         """Load the airport data from the selected file."""
         try:
-            with open(self.layout_file, 'r') as f:
-                self.layout = json.load(f)
+            self.layout = load_layout(self.layout_file, self.layout_icao)
         except Exception as e:
             tk.messagebox.showerror("Error", f"Failed to load airport data: {str(e)}")
             self.root.destroy()
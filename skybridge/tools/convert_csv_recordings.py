@@ -0,0 +1,240 @@
+"""
+Convert CSV flight logs of the old recorder into a recording store.
+
+The old Rewinger recorder wrote one CSV row per sample, holding the repr of
+GPSData and AttitudeData and the receive time, optionally preceded by an
+"ICAO","CALLSIGN" row (the format read_my_csv reads). Each file becomes a
+binary recording (see data/flight_recorder.py) in the store directory,
+indexed by the SHA-256 of the file, so files already converted are skipped
+whatever they are called. Files are converted in parallel, one process
+each.
+
+Usage:
+    python convert_csv_recordings.py <store_dir> <file.csv|directory> [...] [--jobs=N]
+"""
+import csv
+import hashlib
+import os
+import re
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.flight_recorder import CHANNELS, RECORDING_SUFFIX, write_recording
+from data.recording_store import RecordingStore
+from data.udp_parser import AIRCRAFT, ATTITUDE, GPS
+from tools.read_my_csv import is_numeric
+
+HASH_CHUNK = 1024 * 1024
+
+# One sample row: the GPSData and AttitudeData reprs, either of which may be
+# missing (attitude-only logs) or left as an empty field (csv.writer writes
+# None as nothing: "GPSData(...)",,time), then the receive time, possibly
+# still wrapped in the brackets and quotes of the oldest logs.
+_VALUE = rb'([^,)]*)'
+_ROW = re.compile(
+    rb'^(?:"?GPSData\(longitude=' + _VALUE + rb', latitude=' + _VALUE + rb', altitude=' + _VALUE +
+    rb', track=' + _VALUE + rb', ground_speed=' + _VALUE + rb'\)"?\s*,\s*|\s*,\s*)?'
+    rb'(?:"?AttitudeData\(true_heading=' + _VALUE + rb', pitch=' + _VALUE + rb', roll=' + _VALUE +
+    rb'\)"?\s*,\s*|\s*,\s*)?'
+    rb'[\["\']*([-+0-9.eE]+)',
+    re.MULTILINE)
+
+_GPS = struct.Struct(CHANNELS[GPS].format)
+_ATTITUDE = struct.Struct(CHANNELS[ATTITUDE].format)
+_AIRCRAFT = struct.Struct(CHANNELS[AIRCRAFT].format)
+
+
+class LegacyLog(NamedTuple):
+    """Packed records of one CSV log."""
+    icao_address: str
+    callsign: str
+    gps: List[bytes]
+    attitude: List[bytes]
+    skipped: int  # lines that are not a sample
+    start_time: Optional[float]
+    end_time: Optional[float]
+
+
+class ConversionResult(NamedTuple):
+    samples: int
+    skipped: int
+    size: int  # bytes of CSV read
+    seconds: float
+    start_time: Optional[float]
+    end_time: Optional[float]
+    icao_address: str
+    callsign: str
+
+
+def _identification(line: bytes) -> Optional[List[str]]:
+    """[icao, callsign] if line is the identification row rather than a sample."""
+    fields = next(csv.reader([line.decode('utf-8', 'replace')], skipinitialspace=True), [])
+    if len(fields) == 2 and not is_numeric(fields[0]) and not is_numeric(fields[1]):
+        return fields
+    return None
+
+
+def _time_ordered(records: List[bytes]) -> List[bytes]:
+    """Records sorted by their leading receive time (stable), for logs whose clock stepped back."""
+    times = [struct.unpack_from('<d', record)[0] for record in records]
+    if all(a <= b for a, b in zip(times, times[1:])):
+        return records
+    return [record for _, _, record in sorted(zip(times, range(len(records)), records))]
+
+
+def parse_legacy_csv(data: bytes) -> LegacyLog:
+    """
+    Samples of a whole CSV log, packed in the recording formats.
+
+    A single regular expression over the file picks out the nine numbers of
+    each row, instead of the csv module and a chain of splits per field.
+    """
+    icao_address = callsign = ''
+    position = 0
+    first_line = data.split(b'\n', 1)[0]
+    if not first_line.lstrip(b'"').startswith((b'GPSData(', b'AttitudeData(')):
+        identification = _identification(first_line)
+        if identification is not None:
+            icao_address, callsign = identification
+            position = len(first_line) + 1
+
+    gps_pack, attitude_pack = _GPS.pack, _ATTITUDE.pack
+    gps: List[bytes] = []
+    attitude: List[bytes] = []
+    times: List[float] = []
+    # Groups a row does not have come back empty
+    for longitude, latitude, altitude, track, ground_speed, true_heading, pitch, roll, stamp in \
+            _ROW.findall(data, position):
+        try:
+            receive_time = float(stamp)
+            gps_record = gps_pack(receive_time, float(longitude), float(latitude), float(altitude), float(track),
+                                  float(ground_speed)) if longitude else None
+            attitude_record = attitude_pack(receive_time, float(true_heading), float(pitch),
+                                            float(roll)) if true_heading else None
+        except (ValueError, OverflowError, struct.error):
+            continue
+        if gps_record is not None:
+            gps.append(gps_record)
+        if attitude_record is not None:
+            attitude.append(attitude_record)
+        if gps_record is not None or attitude_record is not None:
+            times.append(receive_time)
+    lines = data.count(b'\n', position) + (0 if data.endswith(b'\n') or position >= len(data) else 1)
+    start_time = min(times) if times else None
+    end_time = max(times) if times else None
+    return LegacyLog(icao_address, callsign, _time_ordered(gps), _time_ordered(attitude),
+                     max(0, lines - len(times)), start_time, end_time)
+
+
+def convert_file(source: str, recording_path: str) -> ConversionResult:
+    """Convert one CSV log into a recording at recording_path; runs in a worker process."""
+    start = time.perf_counter()
+    with open(source, 'rb') as f:
+        data = f.read()
+    log = parse_legacy_csv(data)
+    blocks = {GPS: b''.join(log.gps), ATTITUDE: b''.join(log.attitude)}
+    if log.icao_address and log.start_time is not None:
+        # The identification row becomes one aircraft message at the start
+        blocks[AIRCRAFT] = _AIRCRAFT.pack(log.start_time, b'', b'', b'', log.callsign.encode('ascii', 'replace'),
+                                          log.icao_address.encode('ascii', 'replace'), b'')
+    write_recording(recording_path, blocks, log.start_time if log.start_time is not None else 0.0)
+    return ConversionResult(max(len(log.gps), len(log.attitude)), log.skipped, len(data),
+                            time.perf_counter() - start, log.start_time, log.end_time,
+                            log.icao_address, log.callsign)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_csv_files(inputs: Iterable[str]) -> Iterator[str]:
+    """The given files, and the .csv files anywhere below the given directories."""
+    for path in inputs:
+        if os.path.isdir(path):
+            for directory, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    if name.lower().endswith('.csv'):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+
+def convert(store_dir: str, inputs: Iterable[str], jobs: Optional[int] = None) -> int:
+    """Convert every CSV log not yet in the store; return how many failed."""
+    failed = 0
+    with RecordingStore(store_dir) as store:
+        pending = {}
+        for source in find_csv_files(inputs):
+            try:
+                digest = file_hash(source)
+            except OSError as e:
+                print(f"{source}: {e.strerror}")
+                failed += 1
+                continue
+            done = store.find_hash(digest)
+            if done is not None or digest in pending:
+                print(f"{source}: already converted to {done.name if done else pending[digest][1]}")
+                continue
+            name = f"{os.path.splitext(os.path.basename(source))[0]}-{digest[:12]}{RECORDING_SUFFIX}"
+            if os.path.exists(store.path(name)):
+                shutil.rmtree(store.path(name))  # left from a conversion that was interrupted before indexing
+            pending[digest] = (source, name)
+        if not pending:
+            print("Nothing to convert")
+            return failed
+
+        start = time.perf_counter()
+        converted = samples = size = 0
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(convert_file, source, store.path(name)): (digest, source, name)
+                       for digest, (source, name) in pending.items()}
+            for future in as_completed(futures):
+                digest, source, name = futures[future]
+                try:
+                    result = future.result()
+                except (OSError, ValueError) as e:
+                    print(f"{source}: conversion failed: {e}")
+                    failed += 1
+                    continue
+                store.add(name, digest, os.path.abspath(source), result.samples, result.start_time,
+                          result.end_time, result.icao_address, result.callsign)
+                converted += 1
+                samples += result.samples
+                size += result.size
+                seconds = max(result.seconds, 1e-9)
+                print(f"{source}: {result.samples} samples ({result.skipped} lines skipped) in "
+                      f"{result.seconds * 1e3:.0f} ms, {result.samples / seconds:,.0f} samples/s, "
+                      f"{result.size / seconds / 2**20:.1f} MiB/s")
+        elapsed = time.perf_counter() - start
+        print(f"Converted {converted} files, {samples} samples, {size / 2**20:.1f} MiB "
+              f"in {elapsed:.1f} s ({size / max(elapsed, 1e-9) / 2**20:.1f} MiB/s)")
+    return failed
+
+
+def main():
+    jobs = None
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--jobs='):
+            jobs = int(arg.split('=', 1)[1])
+        else:
+            args.append(arg)
+    if len(args) < 2:
+        print("Usage: python convert_csv_recordings.py <store_dir> <file.csv|directory> [...] [--jobs=N]")
+        sys.exit(1)
+    if convert(args[0], args[1:], jobs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
 import os
+import sys
 import json
-import time
-import threading
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk
 
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ingest import IngestCore
+from gui.tk_bridge import TkBridge
+
+FILE_CHECK_INTERVAL = 0.5  # seconds
+
 class SimAPIMonitor:
     def __init__(self, root):
         self.root = root
@@ -34,9 +41,16 @@ class SimAPIMonitor:
         # Create control buttons
         self.create_control_buttons()
         
-        # Initialize monitoring
+        # Initialize monitoring; file checks run on the ingest loop, display updates on Tk
         self.running = False
-        self.update_thread = None
+        self.check_job = None
+        self.last_input_mtime = 0
+        self.last_output_mtime = 0
+        self.ingest = IngestCore()
+        self.ingest.start()
+        self.bridge = TkBridge(root)
+        self.ingest.subscribe('input', self.bridge.wrap(self.update_input_display))
+        self.ingest.subscribe('output', self.bridge.wrap(self.update_output_display))
         
     def create_path_display(self):
         path_frame = ttk.LabelFrame(self.main_frame, text="File Paths", padding="5")
@@ -121,14 +135,15 @@ class SimAPIMonitor:
         self.running = True
         self.start_button.config(text="Stop Monitoring")
         
-        # Start update thread
-        self.update_thread = threading.Thread(target=self.update_loop)
-        self.update_thread.daemon = True
-        self.update_thread.start()
+        # Start file checks on the ingest loop
+        self.check_job = self.ingest.add_periodic(FILE_CHECK_INTERVAL, self.check_files, "SimAPI file check")
         
     def stop_monitoring(self):
         self.running = False
         self.start_button.config(text="Start Monitoring")
+        if self.check_job:
+            self.check_job.cancel()
+            self.check_job = None
         
     def clear_display(self):
         self.input_text.config(state=tk.NORMAL)
@@ -139,42 +154,32 @@ class SimAPIMonitor:
         self.output_text.delete(1.0, tk.END)
         self.output_text.config(state=tk.DISABLED)
         
-    def update_loop(self):
-        last_input_mtime = 0
-        last_output_mtime = 0
-        
-        while self.running:
-            try:
-                # Check input file
-                if os.path.exists(self.input_path):
-                    current_mtime = os.path.getmtime(self.input_path)
-                    if current_mtime > last_input_mtime:
-                        last_input_mtime = current_mtime
-                        with open(self.input_path, 'r') as f:
-                            try:
-                                data = json.load(f)
-                                self.update_input_display(data)
-                            except json.JSONDecodeError as e:
-                                self.update_input_display({"error": f"Invalid JSON: {str(e)}"})
-                
-                # Check output file
-                if os.path.exists(self.output_path):
-                    current_mtime = os.path.getmtime(self.output_path)
-                    if current_mtime > last_output_mtime:
-                        last_output_mtime = current_mtime
-                        with open(self.output_path, 'r') as f:
-                            try:
-                                lines = f.readlines()
-                                if lines:
-                                    self.update_output_display(lines)
-                            except Exception as e:
-                                self.update_output_display([f"Error reading output file: {str(e)}"])
-                
-                time.sleep(0.5)  # Check every 500ms
-                
-            except Exception as e:
-                print(f"Error in update loop: {e}")
-                time.sleep(1)
+    def check_files(self):
+        """Publish the input/output files when their mtime changes; runs on the ingest loop"""
+        # Check input file
+        if os.path.exists(self.input_path):
+            current_mtime = os.path.getmtime(self.input_path)
+            if current_mtime > self.last_input_mtime:
+                self.last_input_mtime = current_mtime
+                with open(self.input_path, 'r') as f:
+                    try:
+                        data = json.load(f)
+                        self.ingest.publish('input', data)
+                    except json.JSONDecodeError as e:
+                        self.ingest.publish('input', {"error": f"Invalid JSON: {str(e)}"})
+        
+        # Check output file
+        if os.path.exists(self.output_path):
+            current_mtime = os.path.getmtime(self.output_path)
+            if current_mtime > self.last_output_mtime:
+                self.last_output_mtime = current_mtime
+                with open(self.output_path, 'r') as f:
+                    try:
+                        lines = f.readlines()
+                        if lines:
+                            self.ingest.publish('output', lines)
+                    except Exception as e:
+                        self.ingest.publish('output', [f"Error reading output file: {str(e)}"])
                 
     def update_input_display(self, data):
         self.input_text.config(state=tk.NORMAL)
@@ -1,8 +1,120 @@
 import requests
+import bisect
+import gzip
+import io
 import json
-from typing import Dict, List, Tuple, Optional
+import math
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, Optional, Union
 from dataclasses import dataclass
-from utils.geo_utils import haversine_distance, calculate_heading
+from utils.geo_utils import LocalProjection, haversine_distance, calculate_heading
+from utils.spatial_index import GridIndex
+
+# Nodes further than this from a point are not snapped to it
+NODE_SNAP_DISTANCE = 100.0  # meters (about what the old 0.001 degree default meant)
+NODE_INDEX_CELL = 50.0  # meters
+
+READ_CHUNK = 1 << 16  # bytes read from an extract at a time
+
+def _open_extract(path: str):
+    """Open a saved extract for reading in binary mode, gunzipping *.gz files."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_osm_elements(source: Union[str, BinaryIO]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the elements of a saved OSM extract in the Overpass JSON shape
+    ({'type': 'node', 'id': ..., 'lat': ..., 'lon': ..., 'tags': {...}} and
+    so on), in file order.
+
+    source is a path (gzipped if it ends in .gz) or a binary stream, holding
+    an Overpass JSON dump or an OSM XML file; the format is told from the
+    first character. Both are read incrementally, so only the element being
+    parsed and one read chunk are held in memory, whatever the file size.
+    """
+    if isinstance(source, str):
+        with _open_extract(source) as f:
+            yield from iter_osm_elements(f)
+        return
+    stream = source if hasattr(source, 'peek') else io.BufferedReader(source)
+    if stream.peek(READ_CHUNK)[:READ_CHUNK].lstrip()[:1] == b'{':
+        yield from _iter_json_elements(stream)
+    else:
+        yield from _iter_xml_elements(stream)
+
+
+def _iter_json_elements(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Elements of an Overpass JSON dump, decoded one at a time from the "elements" array."""
+    text = io.TextIOWrapper(stream, encoding='utf-8')
+    try:
+        yield from _decode_elements(text)
+    finally:
+        text.detach()  # leave the caller's stream open
+
+
+def _decode_elements(text: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = -1
+    while position < 0:
+        chunk = text.read(READ_CHUNK)
+        if not chunk:
+            return
+        buffer += chunk
+        key = buffer.find('"elements"')
+        if key >= 0:
+            position = buffer.find('[', key)
+        if position < 0:
+            # Keep enough of the tail to find the key when it straddles two chunks
+            buffer = buffer[-READ_CHUNK:]
+    position += 1
+    while True:
+        # Skip separators; stop at the end of the array
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Element cut off at the end of the buffer: read on
+            chunk = text.read(READ_CHUNK)
+            if not chunk:
+                if buffer[position:].strip():
+                    raise
+                return
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield element
+        position = end
+
+
+def _iter_xml_elements(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Elements of an OSM XML file."""
+    context = ET.iterparse(stream, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event != 'end' or elem.tag not in ('node', 'way', 'relation'):
+            continue
+        element: Dict[str, Any] = {'type': elem.tag, 'id': int(elem.get('id'))}
+        tags = {tag.get('k'): tag.get('v') for tag in elem.iter('tag')}
+        if tags:
+            element['tags'] = tags
+        if elem.tag == 'node':
+            element['lat'] = float(elem.get('lat'))
+            element['lon'] = float(elem.get('lon'))
+        elif elem.tag == 'way':
+            element['nodes'] = [int(nd.get('ref')) for nd in elem.iter('nd')]
+        else:
+            element['members'] = [{'type': member.get('type'), 'ref': int(member.get('ref')),
+                                   'role': member.get('role', '')} for member in elem.iter('member')]
+        yield element
+        root.clear()
+
 
 @dataclass
 class Node:
@@ -14,14 +126,130 @@ class Node:
 @dataclass
 class Way:
     id: int
-    nodes: List[int]
+    nodes: Sequence[int]
     tags: Dict[str, str]
 
+
+class NodeStore:
+    """
+    Node coordinates in compact arrays, keyed by node id: 24 bytes per node
+    instead of a Node object and a tags dict each. Only the nodes that have
+    tags keep them. Looking a node up builds its Node on the fly.
+
+    Ids are kept sorted for binary search; OSM files list nodes in id
+    order, so appending normally keeps them sorted for free. Nodes added
+    out of order are sorted in on the next lookup.
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._lats = array('d')
+        self._lons = array('d')
+        self._tags: Dict[int, Dict[str, str]] = {}
+        self._sorted = True
+
+    def add(self, node_id: int, lat: float, lon: float, tags: Optional[Dict[str, str]] = None) -> None:
+        """Add a node; a node added again keeps its first coordinates."""
+        ids = self._ids
+        if ids and node_id <= ids[-1]:
+            self._sorted = False
+        ids.append(node_id)
+        self._lats.append(lat)
+        self._lons.append(lon)
+        if tags and node_id not in self._tags:
+            self._tags[node_id] = tags
+
+    def _sort(self) -> None:
+        """Sort by id, keeping the first of any duplicates."""
+        old_ids, old_lats, old_lons = self._ids, self._lats, self._lons
+        ids, lats, lons = array('q'), array('d'), array('d')
+        for i in sorted(range(len(old_ids)), key=old_ids.__getitem__):  # stable: first added wins
+            if ids and ids[-1] == old_ids[i]:
+                continue
+            ids.append(old_ids[i])
+            lats.append(old_lats[i])
+            lons.append(old_lons[i])
+        self._ids, self._lats, self._lons = ids, lats, lons
+        self._sorted = True
+
+    def _position(self, node_id: int) -> int:
+        if not self._sorted:
+            self._sort()
+        ids = self._ids
+        position = bisect.bisect_left(ids, node_id)
+        if position < len(ids) and ids[position] == node_id:
+            return position
+        return -1
+
+    def __len__(self) -> int:
+        if not self._sorted:
+            self._sort()
+        return len(self._ids)
+
+    def __contains__(self, node_id: int) -> bool:
+        return self._position(node_id) >= 0
+
+    def __getitem__(self, node_id: int) -> Node:
+        position = self._position(node_id)
+        if position < 0:
+            raise KeyError(node_id)
+        return Node(node_id, self._lats[position], self._lons[position], self._tags.get(node_id, {}))
+
+    def get(self, node_id: int) -> Optional[Node]:
+        return self[node_id] if node_id in self else None
+
+    def coords(self, node_id: int) -> Tuple[float, float]:
+        """(lat, lon) of a node without building its Node."""
+        position = self._position(node_id)
+        if position < 0:
+            raise KeyError(node_id)
+        return self._lats[position], self._lons[position]
+
+    def keys(self) -> Iterator[int]:
+        if not self._sorted:
+            self._sort()
+        return iter(self._ids)
+
+    def values(self) -> Iterator[Node]:
+        if not self._sorted:
+            self._sort()
+        for node_id, lat, lon in zip(self._ids, self._lats, self._lons):
+            yield Node(node_id, lat, lon, self._tags.get(node_id, {}))
+
+    def items(self) -> Iterator[Tuple[int, Node]]:
+        for node in self.values():
+            yield node.id, node
+
+    def tagged(self) -> Iterator[Node]:
+        """The nodes that have tags, without walking every node."""
+        for node_id, tags in self._tags.items():
+            lat, lon = self.coords(node_id)
+            yield Node(node_id, lat, lon, tags)
+
+    def retain(self, keep: Set[int]) -> None:
+        """Drop every node whose id is not in keep and that has no tags."""
+        if not self._sorted:
+            self._sort()
+        ids, lats, lons = array('q'), array('d'), array('d')
+        tags = self._tags
+        for node_id, lat, lon in zip(self._ids, self._lats, self._lons):
+            if node_id in keep or node_id in tags:
+                ids.append(node_id)
+                lats.append(lat)
+                lons.append(lon)
+        self._ids, self._lats, self._lons = ids, lats, lons
+
 class OSMAirportExtractor:
     def __init__(self, overpass_url: str = "https://overpass-api.de/api/interpreter"):
         self.overpass_url = overpass_url
-        self.nodes: Dict[int, Node] = {}
+        self.nodes = NodeStore()
         self.ways: Dict[int, Way] = {}
+        self.relations: List[Dict[str, Any]] = []  # aerodrome relations, as elements
+        # Grid over the nodes in local metres, built on the first nearest-node search
+        self._node_projection: Optional[LocalProjection] = None
+        self._node_index: Optional[GridIndex] = None
+        self._node_xy: Dict[int, Tuple[float, float]] = {}
+        self._node_bounds: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)  # min x, min y, max x, max y
         
     def _query_overpass(self, query: str) -> Dict:
         """Send a query to the Overpass API and return the response."""
@@ -29,22 +257,101 @@ class OSMAirportExtractor:
         response.raise_for_status()
         return response.json()
         
-    def _process_osm_data(self, data: Dict) -> None:
-        """Process the OSM data and store nodes and ways."""
+    def load_osm_file(self, path: str) -> None:
+        """
+        Process a saved OSM extract (see iter_osm_elements) instead of
+        querying Overpass. The file is read twice, so only the nodes the
+        layout needs are ever held (see _process_osm_data).
+        """
+        self._process_osm_data({'elements': iter_osm_elements(path)}, reread=lambda: iter_osm_elements(path))
+
+    def _process_osm_data(self, data: Dict,
+                          reread: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None) -> None:
+        """
+        Process the OSM data and store nodes, ways and aerodrome relations.
+
+        data['elements'] may be any iterable, such as iter_osm_elements on a
+        regional extract; elements are handled one at a time as they come.
+        Only what an airport layout can use is kept: ways tagged aeroway,
+        relations tagged aeroway=aerodrome and their untagged member ways
+        (the parts of multipolygon outlines), the tags of nodes tagged
+        aeroway, and the coordinates of nodes those ways reference or that
+        are tagged aeroway.
+
+        Nodes come before the ways that use them, so in a single pass every
+        node's coordinates are kept until the ways are known: peak memory
+        grows with the node count, 24 bytes per node in the NodeStore (about
+        2.4 GB for 100 million nodes). Given reread, a callable returning the
+        same elements again, the first pass skips nodes and a second one
+        reads only the nodes needed, so memory grows with the aeroway
+        features instead. Either way the node references of every untagged
+        way are held (8 bytes each) until the relations, which come last,
+        tell which of those ways are aerodrome outlines.
+        """
+        nodes = self.nodes
+        untagged: Dict[int, Way] = {}
         for element in data['elements']:
-            if element['type'] == 'node':
-                self.nodes[element['id']] = Node(
-                    id=element['id'],
-                    lat=element['lat'],
-                    lon=element['lon'],
-                    tags=element.get('tags', {})
-                )
-            elif element['type'] == 'way':
-                self.ways[element['id']] = Way(
-                    id=element['id'],
-                    nodes=element['nodes'],
-                    tags=element.get('tags', {})
-                )
+            kind = element['type']
+            if kind == 'node':
+                if reread is None:
+                    tags = element.get('tags')
+                    nodes.add(element['id'], element['lat'], element['lon'],
+                              tags if tags and 'aeroway' in tags else None)
+            elif kind == 'way':
+                tags = element.get('tags') or {}
+                if tags and 'aeroway' not in tags:
+                    continue
+                way = Way(id=element['id'], nodes=array('q', element['nodes']), tags=tags)
+                if tags:
+                    self.ways[way.id] = way
+                else:
+                    untagged[way.id] = way
+            elif kind == 'relation':
+                if (element.get('tags') or {}).get('aeroway') == 'aerodrome':
+                    self.relations.append(element)
+        for relation in self.relations:
+            for member in relation.get('members', ()):
+                if member['type'] == 'way' and member['ref'] in untagged:
+                    self.ways[member['ref']] = untagged[member['ref']]
+        del untagged
+
+        referenced: Set[int] = set()
+        for way in self.ways.values():
+            referenced.update(way.nodes)
+        if reread is None:
+            nodes.retain(referenced)
+        else:
+            for element in reread():
+                if element['type'] != 'node':
+                    continue
+                tags = element.get('tags')
+                aeroway = bool(tags) and 'aeroway' in tags
+                if aeroway or element['id'] in referenced:
+                    nodes.add(element['id'], element['lat'], element['lon'], tags if aeroway else None)
+        # The node index is rebuilt on the next nearest-node search
+        self._node_index = None
+
+    def _build_node_index(self) -> None:
+        """Project every node around the centre of the data and file it in a grid."""
+        self._node_xy = {}
+        if not self.nodes:
+            self._node_projection = None
+            self._node_index = None
+            return
+        coords = [(node.id, node.lat, node.lon) for node in self.nodes.values()]
+        lats = [lat for _, lat, _ in coords]
+        lons = [lon for _, _, lon in coords]
+        projection = LocalProjection((min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2)
+        index = GridIndex(NODE_INDEX_CELL)
+        for node_id, lat, lon in coords:
+            x, y = projection.to_local(lat, lon)
+            self._node_xy[node_id] = (x, y)
+            index.insert(node_id, x, y)
+        xs = [x for x, _ in self._node_xy.values()]
+        ys = [y for _, y in self._node_xy.values()]
+        self._node_bounds = (min(xs), min(ys), max(xs), max(ys))
+        self._node_projection = projection
+        self._node_index = index
                 
     def _calculate_way_length(self, way: Way) -> float:
         """Calculate the length of a way in meters."""
@@ -55,21 +362,57 @@ class OSMAirportExtractor:
             length += haversine_distance(node1.lat, node1.lon, node2.lat, node2.lon)
         return length
         
-    def _find_nearest_node(self, lat: float, lon: float, threshold: float = 0.001) -> Optional[Node]:
-        """Find the nearest node to the given coordinates."""
-        nearest = None
-        min_distance = float('inf')
-        
-        for node in self.nodes.values():
-            distance = haversine_distance(lat, lon, node.lat, node.lon)
-            if distance < min_distance:
-                min_distance = distance
-                nearest = node
-                
-        if min_distance <= threshold:
-            return nearest
-        return None
-        
+    def _find_nearest_node(self, lat: float, lon: float, threshold: float = NODE_SNAP_DISTANCE) -> Optional[Node]:
+        """Find the nearest node within threshold meters of the given coordinates."""
+        if self._node_index is None or len(self._node_index) != len(self.nodes):
+            self._build_node_index()
+        if self._node_index is None:
+            return None
+        x, y = self._node_projection.to_local(lat, lon)
+        node_id = self._nearest_node_id(x, y, threshold)
+        return self.nodes[node_id] if node_id is not None else None
+
+    def find_nearest_nodes(self, coords: Iterable[Tuple[float, float]],
+                           threshold: float = NODE_SNAP_DISTANCE) -> List[Optional[Node]]:
+        """
+        Find the nearest node to each (lat, lon) in coords, or None where no
+        node lies within threshold meters.
+        """
+        if self._node_index is None or len(self._node_index) != len(self.nodes):
+            self._build_node_index()
+        if self._node_index is None:
+            return [None for _ in coords]
+        to_local = self._node_projection.to_local
+        nodes = self.nodes
+        results: List[Optional[Node]] = []
+        for lat, lon in coords:
+            node_id = self._nearest_node_id(*to_local(lat, lon), threshold)
+            results.append(nodes[node_id] if node_id is not None else None)
+        return results
+
+    def _nearest_node_id(self, x: float, y: float, threshold: float) -> Optional[int]:
+        """Id of the nearest indexed node within threshold meters of (x, y), searching outward ring by ring."""
+        size = NODE_INDEX_CELL
+        min_x, min_y, max_x, max_y = self._node_bounds
+        # No node is farther than the far corner of the box around them all
+        farthest = max(abs(x - min_x), abs(x - max_x), abs(y - min_y), abs(y - max_y))
+        if math.isinf(threshold):
+            threshold = math.hypot(max(abs(x - min_x), abs(x - max_x)), max(abs(y - min_y), abs(y - max_y)))
+        rings = int(math.ceil(min(threshold, farthest) / size)) + 1
+        node_xy = self._node_xy
+        best: Optional[int] = None
+        best_distance_sq = threshold * threshold
+        for ring, members in self._node_index.cells_around(x, y, rings):
+            # Everything not yet seen is more than (ring - 1) cells away
+            if best is not None and ring > 0 and best_distance_sq <= ((ring - 1) * size) ** 2:
+                break
+            for node_id in members:
+                nx, ny = node_xy[node_id]
+                distance_sq = (nx - x) * (nx - x) + (ny - y) * (ny - y)
+                if distance_sq <= best_distance_sq:
+                    best, best_distance_sq = node_id, distance_sq
+        return best
+
     def extract_airport(self, icao: str) -> Dict:
         """Extract airport data from OSM."""
         # Query for the airport
@@ -87,7 +430,10 @@ class OSMAirportExtractor:
         
         data = self._query_overpass(query)
         self._process_osm_data(data)
-        
+        return self.build_layout(icao)
+
+    def build_layout(self, icao: str, name: Optional[str] = None) -> Dict:
+        """Airport layout dict from the nodes and ways processed so far."""
         # Extract runways
         runways = []
         for way in self.ways.values():
@@ -131,7 +477,7 @@ class OSMAirportExtractor:
         
         # Extract parking positions
         parking_positions = []
-        for node in self.nodes.values():
+        for node in self.nodes.tagged():
             if node.tags.get('aeroway') == 'parking_position':
                 parking_positions.append({
                     'name': node.tags.get('ref', ''),
@@ -144,7 +490,7 @@ class OSMAirportExtractor:
         
         # Extract holding points
         holding_points = []
-        for node in self.nodes.values():
+        for node in self.nodes.tagged():
             if node.tags.get('aeroway') == 'holding_position':
                 holding_points.append({
                     'name': node.tags.get('ref', ''),
@@ -153,7 +499,7 @@ class OSMAirportExtractor:
                 })
         
         return {
-            'name': self._find_airport_name(),
+            'name': name if name is not None else self._find_airport_name(),
             'icao': icao,
             'runways': runways,
             'taxiways': taxiways,
@@ -1,18 +1,32 @@
 import socket
-import threading
-import re
+import sys
 import tkinter as tk
 from tkintermapview import TkinterMapView
 from tkinter import font as tkfont
-from tkinter import filedialog
+from tkinter import filedialog, simpledialog
 from PIL import Image, ImageTk
 from typing import Optional, Dict, Any, Tuple, List
-from dataclasses import dataclass
 import time
-import csv
 import xml.etree.ElementTree as ET
+import json
 import os
 
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_buffer import Frame, FrameBuffer
+from data.airport_db import is_airport_database, load_layout
+from data.flight_recorder import FLUSH_INTERVAL, FlightRecorder, new_recording_path
+from core.ground_classifier import GroundClassifier, GroundEvent, describe
+from core.traffic_store import TrafficDelta, TrafficStore
+from core.ingest import IngestCore
+from gui.map_markers import FrameTimer, TrafficMarkerManager, map_viewport, move_marker
+from gui.sprite_cache import SpriteCache
+from data.udp_parser import (
+    DatagramParser, GPSData, AttitudeData, AircraftData, AirTrafficData,
+    GPS, ATTITUDE, AIRCRAFT, TRAFFIC
+)
+
 # Constants
 UDP_PORT = 49002
 WINDOW_SIZE = "1000x800"
@@ -21,259 +35,241 @@ CONTROL_FRAME_WIDTH = 200
 INFO_DISPLAY_SIZE = (24, 9)
 UPDATE_INTERVAL = 1000  # milliseconds
 RECEIVE_TIMEOUT = 5.0  # seconds
-
-
-@dataclass
-class GPSData:
-    """Dataclass to store GPS data received from the flight simulator."""
-    longitude: float
-    latitude: float
-    altitude: float
-    track: float
-    ground_speed: float
-
-@dataclass
-class AttitudeData:
-    """Dataclass to store attitude data received from the flight simulator."""
-    true_heading: float
-    pitch: float
-    roll: float
-@dataclass    
-class AircraftData:
-    """Dataclass to store airplane data received from the network."""
-
-    id: str # Unique identifier for this particular aircraft instance
-    type_id: str # ID of the plane model from a predefined list/table
-    registration: str # Official registration number assigned to the airplane by its national aviation authority
-    callsign: str # Assigned radio call sign used by air traffic control and pilots for identification purposes
-    icao24: str # International Civil Aviation Organization's unique four-character identifier for this aircraft
-    FlightNumber: str
-
-@dataclass
-class AirTrafficData:
-    """Dataclass to store traffic data received from the network."""
-    icao_address: str
-    latitude: float
-    longitude: float
-    altitude_ft: float
-    vertical_speed_ft_min: float
-    airborne_flag: int
-    heading_true: float
-    velocity_knots: float
-    callsign: str
-    
+RECEIVE_SLOT_SIZE = 2048  # bytes per preallocated datagram slot
+RECEIVE_BATCH_SIZE = 256  # datagrams drained per wakeup at most
+RECEIVE_SOCKET_BUFFER = 1 << 20  # SO_RCVBUF in bytes, None keeps the OS default
+TRAFFIC_TIMEOUT = 30.0  # seconds without an update before a target is dropped
+TRAFFIC_EXPIRY_INTERVAL = 1.0  # seconds
+AIRCRAFT_SPRITE_STEP = 2.0  # degrees per pre-rotated ownship icon
+TRAFFIC_SPRITE_STEP = 5.0  # degrees per pre-rotated traffic icon
 
 
 class UDPReceiver:
     """
     Class responsible for receiving and parsing UDP data from the flight simulator.
     """
-    def __init__(self, port: int = UDP_PORT):
+    def __init__(self, port: int = UDP_PORT, batch_size: int = RECEIVE_BATCH_SIZE,
+                 socket_buffer: Optional[int] = RECEIVE_SOCKET_BUFFER, ingest: Optional[IngestCore] = None,
+                 report_stats: bool = False):
         self.port = port
+        # Print the receive counters when stopping (for load tests and debugging)
+        self.report_stats = report_stats
         self.socket: Optional[socket.socket] = None
-        self.latest_gps_data: Optional[GPSData] = None
-        self.latest_attitude_data: Optional[AttitudeData] = None
-        self.latest_aircraft_data: Optional[AircraftData] = None
-        self.traffic_data: Dict[str, Tuple[AirTrafficData, float]] = {}  # Store traffic data with timestamp
+        # Written by the ingest loop only; readers take consistent frames via get_frame()
+        self.traffic = TrafficStore(TRAFFIC_TIMEOUT)
+        self.frames = FrameBuffer(self.traffic)
         self.running: bool = False
-        self.receive_thread: Optional[threading.Thread] = None
         self.last_receive_time: float = 0
-        self.log_to_csv: bool = False
         self.armed_for_recording: bool = False
-        self.csv_files = {}
-
+        # Binary recording of every parsed message; written on the ingest loop while set
+        self.recorder: Optional[FlightRecorder] = None
+        self.parser = DatagramParser()
+        # Optional ownship position classifier, fed every new GPS fix on the ingest loop
+        self.ground_classifier: Optional[GroundClassifier] = None
+        self._classified_gps_seq = -1
+
+        # Receiving runs on the ingest event loop; a private one is started if none is shared
+        self.ingest = ingest
+        self._owns_ingest = ingest is None
+        self._transport = None
+        self._expiry_job = None
+        self._recorder_job = None
+
+        # Datagrams drained per wakeup (the slot pool lives in the datagram protocol)
+        self.batch_size = batch_size
+        self.socket_buffer = socket_buffer
+        self.receive_stats: Dict[str, int] = {
+            'datagrams': 0,   # datagrams read from the socket
+            'batches': 0,     # wakeups that returned at least one datagram
+            'max_batch': 0,   # largest batch drained in one wakeup
+            'coalesced': 0,   # messages superseded by a newer one from the same source in the same batch
+            'dropped': 0,     # datagrams longer than RECEIVE_SLOT_SIZE (truncated by the kernel)
+        }
 
     def start_receiving(self) -> None:
-        """Initialize and start the UDP receiving thread."""
+        """Open the UDP socket and attach it to the ingest event loop."""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        self.socket.settimeout(0.5)  # Set a timeout for the socket
+        if self.socket_buffer:
+            # Bursty traffic feeds overflow the default buffer before the loop wakes up
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer)
+        self.socket.setblocking(False)
         self.socket.bind(('', self.port))
+        if self.ingest is None:
+            self.ingest = IngestCore()
+        self.ingest.start()
         self.running = True
-        self.receive_thread = threading.Thread(target=self._receive_data)
-        self.receive_thread.start()
-
-    def _receive_data(self) -> None:
-        """Continuously receive and parse UDP data while the thread is running."""
-        while self.running:
-            try:
-                data, _ = self.socket.recvfrom(1024)
-                self.last_receive_time = time.time()
-                message = data.decode('utf-8')
-                if message.startswith('XGPS'):
-                    self.latest_gps_data = self._parse_gps_data(message)
-                if message.startswith('XATT'):
-                    self.latest_attitude_data = self._parse_attitude_data(message)
-                if message.startswith('XAIRCRAFT'):
-                    self.latest_aircraft_data = self._parse_aircraft_data(message)
-                if message.startswith('XTRAFFIC'):
-                    traffic_data = self._parse_traffic_data(message)
-                    if traffic_data:
-                        # Store with current timestamp
-                        self.traffic_data[traffic_data.icao_address] = (traffic_data, time.time())
-                        
-                # Check if we need to start logging after arming
-                if self.armed_for_recording and (self.latest_gps_data or len(self.traffic_data) > 0):
-                    self.armed_for_recording = False
-                    self.log_to_csv = True
-                    print("Recording automatically started after arming")
-                    # Initialize CSV files
-                    timestamp = time.strftime("%Y%m%d-%H%M%S")
-                    self.csv_files = {
-                        'gps': open(f"output_GPS_DATA_{timestamp}.csv", "w", newline=''),
-                        'attitude': open(f"output_ATTITUDE_DATA_{timestamp}.csv", "w", newline=''),
-                        'traffic': open(f"output_TRAFFIC_DATA_{timestamp}.csv", "w", newline='')
-                    }
-                    # Write headers
-                    csv.writer(self.csv_files['gps']).writerow(['Timestamp', 'Latitude', 'Longitude', 'Altitude', 'Track', 'Ground_Speed'])
-                    csv.writer(self.csv_files['attitude']).writerow(['Timestamp', 'True_Heading', 'Pitch', 'Roll'])
-                    csv.writer(self.csv_files['traffic']).writerow(['Timestamp', 'ICAO', 'Latitude', 'Longitude', 'Altitude_ft', 'VS_ft_min', 'Airborne', 'Heading', 'Velocity_kts', 'Callsign'])
-            except socket.timeout:
-                # This is expected, just continue the loop
-                pass
-            except Exception as e:
-                print(f"Error receiving data: {e}")
-    @staticmethod
-    def _parse_gps_data(message: str) -> Optional[GPSData]:
-        """Parse GPS data from the received message."""
-        pattern = r'XGPSAerofly FS 4,([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+)'
-        match = re.match(pattern, message)
-        #print(match)
-        if match:
-            #print("Received GPS DATA")
-            latitude, longitude, altitude, track, ground_speed = map(float, match.groups())
-            
-            # Check for the specific "menu state" condition
-            if (latitude == 0.0 and longitude == 0.0 and 
-                altitude == 0.0 and track == 90.0 and ground_speed == 0.0):
-                # This is the menu state - return None instead
-                return None
-                
-            # Otherwise return the valid GPS data
-            return GPSData(*map(float, match.groups()))
-        
-        return None
-    @staticmethod
-    def _parse_attitude_data(message: str) -> Optional[AttitudeData]:
-        """Parse attitude data from the received message."""
-        pattern = r'XATTAerofly FS 4,([-\d.]+),([-\d.]+),([-\d.]+)'
-        match = re.match(pattern, message)
-        if match:
-            #print("Received ATTITUDE DATA")
-            return AttitudeData(*map(float, match.groups()))
-        return None
-    @staticmethod
-    def _parse_aircraft_data(message: str) -> Optional[AircraftData]:
-        """Parse Aircraft data from the received message."""
-        #print(message)
-        pattern = r'^XAIRCRAFTAerofly FS 4,([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+),([A-Za-z0-9\-_]+)'
-        match = re.match(pattern, message)
-        if match:
-            #print("Received Aircraft Data")
-            return AircraftData(*map(str, match.groups()))
-        return None
-    @staticmethod
-    def _parse_traffic_data(message: str) -> Optional[AirTrafficData]:
-        """Parse traffic data from the received message."""
-        pattern = r'^XTRAFFICAerofly FS 4,([A-Za-z0-9\-_]+),([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+),([01]),'\
-                r'([-\d.]+),([-\d.]+),([A-Za-z0-9\-_]+)'
-        match = re.match(pattern, message)
-        #print(message)
-        if match:
-            #print("Received TRAFFFIC DATA")
-            groups = match.groups()
-            #print(groups)
-            # Convert strings to appropriate data types
-            return AirTrafficData(
-                icao_address=str(groups[0]),
-                latitude=float(groups[1]),
-                longitude=float(groups[2]),
-                altitude_ft=float(groups[3]),
-                vertical_speed_ft_min=float(groups[4]),
-                airborne_flag=int(groups[5]),
-                heading_true=float(groups[6]),
-                velocity_knots=float(groups[7]),
-                callsign=str(groups[8])
-            )
+        self._transport = self.ingest.open_udp_endpoint(
+            self.socket, self._receive_batch, self.batch_size, RECEIVE_SLOT_SIZE, self.receive_stats)
+        self._expiry_job = self.ingest.add_periodic(TRAFFIC_EXPIRY_INTERVAL, self._expire_traffic, "traffic expiry")
+        self._recorder_job = self.ingest.add_periodic(FLUSH_INTERVAL, self._flush_recorder, "recorder flush")
+
+    def _receive_batch(self, batch: List[bytes]) -> None:
+        """Parse and apply a batch of datagrams; runs on the ingest loop."""
+        self.last_receive_time = time.time()
+        messages = self.parser.parse_batch(batch)
+        self._apply_batch(messages, self.last_receive_time)
+        frame = self.frames.publish(self.last_receive_time)
+        self.ingest.publish('udp', self)
+
+        classifier = self.ground_classifier
+        if classifier is not None and frame.gps and frame.gps_seq != self._classified_gps_seq:
+            self._classified_gps_seq = frame.gps_seq
+            on_ground = classifier.is_on_ground(frame.gps)
+            for event in classifier.update(frame.gps, self.last_receive_time, on_ground):
+                self.ingest.publish('ground', event)
+
+        # Check if we need to start recording after arming
+        if self.armed_for_recording and (frame.gps or frame.traffic_count > 0):
+            self.armed_for_recording = False
+            self.recorder = FlightRecorder(new_recording_path())
+            print(f"Recording automatically started after arming: {self.recorder.directory}")
+
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record_batch(messages, self.last_receive_time)
+
+    def _flush_recorder(self) -> None:
+        """Hand a quiet recorder's buffered samples to its writer; runs on the ingest loop."""
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.flush_if_due(time.time())
+
+    def _expire_traffic(self) -> None:
+        """Drop traffic not heard from for TRAFFIC_TIMEOUT seconds; runs on the ingest loop."""
+        if self.frames.expire_traffic(time.time()):
+            self.frames.publish()
+
+    def _apply_batch(self, messages: List[Tuple[str, Any]], receive_time: float) -> None:
+        """Apply a batch of parsed messages in arrival order, counting the ones superseded within the batch."""
+        seen = set()
+        for kind, record in messages:
+            key = record.icao_address if kind == TRAFFIC and record else kind
+            if key in seen:
+                self.receive_stats['coalesced'] += 1
+            else:
+                seen.add(key)
+            self._apply_message(kind, record, receive_time)
+
+    def _apply_message(self, kind: str, record: Any, receive_time: float) -> None:
+        """Store a parsed message; GPS/attitude/aircraft records replace the latest value even when None."""
+        if kind == TRAFFIC:
+            if record:
+                # Store with receive timestamp
+                self.frames.update_traffic(record.icao_address, record, receive_time)
+        else:
+            self.frames.set_latest(kind, record)
+
+    def get_receive_stats(self) -> Dict[str, Any]:
+        """Return receive counters, the effective socket buffer size and kernel drops where the OS reports them."""
+        stats: Dict[str, Any] = dict(self.receive_stats)
+        stats['socket_buffer'] = None
+        stats['kernel_drops'] = None
+        if self.socket and self.socket.fileno() != -1:
+            stats['socket_buffer'] = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            stats['kernel_drops'] = self._read_kernel_drops()
+        return stats
+
+    def _read_kernel_drops(self) -> Optional[int]:
+        """Datagrams the kernel dropped for this socket (buffer full); only Linux exposes this, in /proc/net/udp."""
+        try:
+            inode = str(os.fstat(self.socket.fileno()).st_ino)
+            with open("/proc/net/udp") as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    if fields[9] == inode:
+                        return int(fields[-1])
+        except (OSError, StopIteration, IndexError, ValueError):
+            pass
         return None
 
-    def set_csv_logging(self, enabled: bool) -> None:
-        """Enable or disable CSV logging."""
-        # If we're turning off logging, close any open files
-        if self.log_to_csv and not enabled:
-            for file in self.csv_files.values():
-                file.close()
-            self.csv_files = {}
-            
-        self.log_to_csv = enabled
+    def set_recording(self, enabled: bool) -> None:
+        """Start a new flight recording or stop the current one."""
         self.armed_for_recording = False
-        
-        # If we're turning on logging, initialize new CSV files
+        self._close_recorder()
         if enabled:
-            timestamp = time.strftime("%Y%m%d-%H%M%S")
-            self.csv_files = {
-                'gps': open(f"output_GPS_DATA_{timestamp}.csv", "w", newline=''),
-                'attitude': open(f"output_ATTITUDE_DATA_{timestamp}.csv", "w", newline=''),
-                'traffic': open(f"output_TRAFFIC_DATA_{timestamp}.csv", "w", newline='')
-            }
-            # Write headers
-            csv.writer(self.csv_files['gps']).writerow(['Timestamp', 'Latitude', 'Longitude', 'Altitude', 'Track', 'Ground_Speed'])
-            csv.writer(self.csv_files['attitude']).writerow(['Timestamp', 'True_Heading', 'Pitch', 'Roll'])
-            csv.writer(self.csv_files['traffic']).writerow(['Timestamp', 'ICAO', 'Latitude', 'Longitude', 'Altitude_ft', 'VS_ft_min', 'Airborne', 'Heading', 'Velocity_kts', 'Callsign'])
-        
-        status = "enabled" if enabled else "disabled"
-        print(f"CSV logging {status}")
+            self.recorder = FlightRecorder(new_recording_path())
+            print(f"Recording to {self.recorder.directory}")
+        else:
+            print("Recording stopped")
+
+    def _close_recorder(self) -> Optional[FlightRecorder]:
+        """
+        Detach the recorder and close it. The last records are handed to its
+        writer on the ingest loop, after any batch it is recording; waiting
+        for the writer runs on an executor thread, so a slow disk never holds
+        up receive. Returns the recorder, for callers that need to wait().
+        """
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return None
+        if self.ingest is not None and self.ingest.running:
+            self.ingest.call_soon(self._finish_recorder, recorder)
+        else:
+            recorder.close()
+        return recorder
+
+    def _finish_recorder(self, recorder: FlightRecorder) -> None:
+        recorder.finish()
+        self.ingest.loop.run_in_executor(None, recorder.wait)
         
     def arm_recording(self) -> None:
         """Arm the recording system to start when data is received."""
+        self._close_recorder()
         self.armed_for_recording = True
-        self.log_to_csv = False
         print("Recording armed and waiting for data")
 
+    def set_ground_classifier(self, classifier: Optional[GroundClassifier]) -> None:
+        """Classify ownship fixes against an airport; events are published on the 'ground' topic."""
+        self.ground_classifier = classifier
+
+    def get_frame(self) -> Frame:
+        """Return the latest consistent frame of received data; cheap and safe from any thread."""
+        return self.frames.current()
+
+    def traffic_changes_since(self, generation: int) -> TrafficDelta:
+        """Traffic added, updated or removed after generation (e.g. a frame's traffic_generation)."""
+        return self.traffic.changes_since(generation)
+
     def get_latest_data(self) -> Dict[str, Any]:
         """Return the latest received GPS and attitude data."""
-        # Clean outdated traffic data (older than 30 seconds)
-        current_time = time.time()
-        traffic_timeout = 30.0  # seconds
-        self.traffic_data = {
-            icao: (data, timestamp) 
-            for icao, (data, timestamp) in self.traffic_data.items() 
-            if current_time - timestamp < traffic_timeout
-        }
-        
-        # Only write to CSV if logging is enabled
-        if self.log_to_csv:
-            if self.latest_gps_data:
-                with open("output_recorder/output_GPS_DATA.csv", "a") as f:
-                    writer = csv.writer(f)
-                    writer.writerow([self.latest_gps_data, self.latest_attitude_data, time.time()])
-            
-            #if self.latest_attitude_data:
-            #    with open("output_recorder/output_ATTITUDE_DATA.csv", "a") as f:
-            #        writer = csv.writer(f)
-            #        writer.writerow([self.latest_attitude_data, time.time()])
-        
+        # One frame, so GPS, attitude and traffic all come from the same published batch
+        frame = self.frames.current()
         return {
-            'gps': self.latest_gps_data,
-            'attitude': self.latest_attitude_data,
-            'aircraft': self.latest_aircraft_data,
-            'traffic': {icao: data for icao, (data, _) in self.traffic_data.items()},
+            'gps': frame.gps,
+            'attitude': frame.attitude,
+            'aircraft': frame.aircraft,
+            'traffic_count': frame.traffic_count,  # targets themselves: traffic_changes_since()
+            'frame': frame,
             'connected': (time.time() - self.last_receive_time) < RECEIVE_TIMEOUT
         }
 
     def stop(self) -> None:
-        """Stop the UDP receiving thread and close the socket."""
+        """Detach from the ingest loop and close the socket."""
         self.running = False
-        if self.receive_thread:
-            self.receive_thread.join()
-        if self.socket:
+        if self._expiry_job:
+            self._expiry_job.cancel()
+            self._expiry_job = None
+        if self._recorder_job:
+            self._recorder_job.cancel()
+            self._recorder_job = None
+        # Finished on the loop before it stops, so the last batches are in the recording
+        recorder = self._close_recorder()
+        if self.socket and self.report_stats:
+            print(f"UDP receive stats: {self.get_receive_stats()}")
+        if self._transport:
+            # The transport owns the socket from here; it closes it on the loop thread, before the loop stops
+            self.ingest.close_udp_endpoint(self._transport)
+            self._transport = None
+        elif self.socket:
             self.socket.close()
-        
-        # Close any open CSV files
-        if self.csv_files:
-            for file in self.csv_files.values():
-                file.close()
+        if self._owns_ingest and self.ingest:
+            self.ingest.stop()
+            if recorder is not None:
+                # The loop has run finish(); the files are complete once this returns
+                recorder.wait()
 
 class AircraftTrackerApp:
     """
@@ -293,11 +289,17 @@ class AircraftTrackerApp:
         self.setup_ui()
         self.udp_receiver = UDPReceiver()
         self.udp_receiver.start_receiving()
+        self.udp_receiver.ingest.subscribe('ground', self.on_ground_event)
         self.setup_aircraft_marker()
-        # Dictionary to keep track of traffic markers
-        self.traffic_markers = {}
         # Setup a different icon for traffic
         self.traffic_image = Image.open("traffic_icon.png").resize((24, 24))
+        self.traffic_sprites = SpriteCache(self.traffic_image, TRAFFIC_SPRITE_STEP)
+        # Traffic markers are moved in place from traffic store deltas
+        self.traffic_markers = TrafficMarkerManager(self.map_widget, self.rotate_traffic_image)
+        # Frame source counters last drawn, so unchanged sources are not redrawn
+        self.shown_aircraft_seqs: Optional[Tuple[int, int, int]] = None
+        # Time spent in each map update pass, shown in the info panel
+        self.frame_timer = FrameTimer()
         self.update_aircraft_position()
         # Variables to track map center mode
         self.follow_aircraft = True
@@ -329,6 +331,9 @@ class AircraftTrackerApp:
         # Add flight plan controls
         self.setup_flightplan_controls()
 
+        # Add airport layout controls
+        self.setup_airport_controls()
+
         # Add map control toggle
         self.setup_map_control()
 
@@ -363,8 +368,8 @@ class AircraftTrackerApp:
             print(f"Follow mode disabled. Map center fixed at: {self.map_center}")
         else:
         # When re-enabling follow mode, if we have GPS data, immediately center on aircraft
-            if self.udp_receiver.latest_gps_data:
-                gps = self.udp_receiver.latest_gps_data
+            gps = self.udp_receiver.get_frame().gps
+            if gps:
                 self.map_widget.set_position(gps.latitude, gps.longitude)
                 print("Follow mode enabled. Centering on aircraft.")    
 
@@ -404,6 +409,56 @@ class AircraftTrackerApp:
         )
         self.flightplan_status.pack(pady=3)
 
+    def setup_airport_controls(self):
+        """Set up loading of an airport layout for ground position reports."""
+        airport_frame = tk.Frame(self.control_frame, relief=tk.GROOVE, bd=2)
+        airport_frame.pack(pady=5, padx=10, fill="x")
+
+        tk.Label(airport_frame, text="Airport", font=("Arial", 10, "bold")).pack(pady=(5,2))
+
+        self.load_airport_button = tk.Button(
+            airport_frame,
+            text="Load Airport JSON",
+            font=("Arial", 9),
+            command=self.load_airport_file,
+            width=15
+        )
+        self.load_airport_button.pack(pady=3, padx=10)
+
+        self.airport_status = tk.Label(
+            airport_frame,
+            text="No airport loaded",
+            font=("Arial", 9)
+        )
+        self.airport_status.pack(pady=3)
+
+    def load_airport_file(self):
+        """Open an airport layout (from osm_airport_extractor or an airport database) and classify the ownship position on it."""
+        initial_dir = "airport_data" if os.path.exists("airport_data") else "."
+        file_path = filedialog.askopenfilename(
+            title="Select Airport JSON File or Database",
+            initialdir=initial_dir,
+            filetypes=[("JSON files", "*.json"), ("Airport databases", "*.sqlite *.db"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        icao = None
+        if is_airport_database(file_path):
+            icao = simpledialog.askstring("Airport", "ICAO code:", parent=self.master)
+            if not icao:
+                return
+        try:
+            layout = load_layout(file_path, icao)
+            self.udp_receiver.set_ground_classifier(GroundClassifier.from_layout(layout))
+            self.airport_status.config(text=f"Loaded: {layout.get('icao') or os.path.basename(file_path)}", fg="green")
+        except Exception as e:
+            self.airport_status.config(text="Error loading airport", fg="red")
+            print(f"Error loading airport file: {e}")
+
+    def on_ground_event(self, event: GroundEvent):
+        """Report a ground position change; runs on the ingest loop."""
+        print(f"Ground: {event.text}")
+
     def load_kml_file(self):
         """Open a file dialog to select and load a KML file."""
         file_path = filedialog.askopenfilename(
@@ -553,7 +608,7 @@ class AircraftTrackerApp:
             fg="black",
             activebackground="#dddddd",
             relief=tk.RAISED,
-            command=self.toggle_csv_logging,
+            command=self.toggle_recording,
             width=15
         )
         self.record_button.pack(pady=3, padx=10)
@@ -603,8 +658,8 @@ class AircraftTrackerApp:
             # Disarm recording
             self.udp_receiver.armed_for_recording = False
 
-    def toggle_csv_logging(self):
-        """Toggle CSV logging on or off and update button appearance."""
+    def toggle_recording(self):
+        """Toggle flight recording on or off and update button appearance."""
         # Don't allow toggling if armed
         if self.armed_var.get():
             return
@@ -633,8 +688,7 @@ class AircraftTrackerApp:
             self.arm_button.config(state=tk.NORMAL)
             self.recording_status.config(text="Status: Ready", fg="black")
         
-        # Set CSV logging
-        self.udp_receiver.set_csv_logging(is_logging)
+        self.udp_receiver.set_recording(is_logging)
 
     def setup_map_selection(self):
         """Set up the map selection listbox."""
@@ -663,6 +717,7 @@ class AircraftTrackerApp:
     def setup_aircraft_marker(self):
         """Set up the aircraft marker image and related variables."""
         self.aircraft_image = Image.open("aircraft_icon.png").resize((32, 32))
+        self.aircraft_sprites = SpriteCache(self.aircraft_image, AIRCRAFT_SPRITE_STEP)
         self.rotated_image = ImageTk.PhotoImage(self.aircraft_image)
         self.aircraft_marker = None
         self.initial_position_set = False
@@ -672,31 +727,38 @@ class AircraftTrackerApp:
         Update the aircraft's position on the map and the information display.
         This method is called periodically to refresh the display.
         """
+        self.frame_timer.start()
         data = self.udp_receiver.get_latest_data()
+        frame: Frame = data['frame']
         
         # Check if we're connected to the simulator
         if data['connected']:
             self.connection_status.config(text="Connected", fg="green")
             
-            # Update traffic markers regardless of GPS data
-            if data['traffic']:
-                self.update_traffic_markers(data['traffic'])
-                
+            # Update traffic markers regardless of GPS data; only changed targets in view are touched
+            viewport, zoom = map_viewport(self.map_widget)
+            delta = self.udp_receiver.traffic_changes_since(self.traffic_markers.generation)
+            self.traffic_markers.apply(delta, viewport, zoom)
+            if delta.updated:
                 # If we haven't set an initial position and we have traffic,
                 # use the first traffic position to center the map
                 if not self.initial_position_set and self.follow_aircraft:
-                    first_traffic = next(iter(data['traffic'].values()))
+                    first_traffic = delta.updated[0][1]
                     self.map_widget.set_position(first_traffic.latitude, first_traffic.longitude)
                     self.map_widget.set_zoom(10)
                     self.initial_position_set = True
                     self.map_center = (first_traffic.latitude, first_traffic.longitude)
             # If we have GPS data, update the aircraft marker and info display
-            if data['gps'] and data['attitude']:
+            aircraft_seqs = (frame.gps_seq, frame.attitude_seq, frame.aircraft_seq)
+            if data['gps'] and data['attitude'] and aircraft_seqs != self.shown_aircraft_seqs:
+                self.shown_aircraft_seqs = aircraft_seqs
                 self.update_aircraft_marker(data)
                 self.update_info_display(data)
         else:
             self.connection_status.config(text="Disconnected", fg="red")
             self.clear_info_display()
+            # Redraw the aircraft as soon as we are connected again
+            self.shown_aircraft_seqs = None
             
             # Keep traffic markers even when disconnected (just don't add new ones)
             # But clean up aircraft marker
@@ -707,7 +769,7 @@ class AircraftTrackerApp:
         # Check if armed recording should automatically start
         if self.armed_var.get() and not self.udp_receiver.armed_for_recording:
             # The UDPReceiver has detected data and auto-started recording
-            if self.udp_receiver.log_to_csv:
+            if self.udp_receiver.recorder is not None:
                 self.armed_var.set(False)
                 self.record_var.set(True)
                 self.arm_button.config(
@@ -723,6 +785,7 @@ class AircraftTrackerApp:
                 )
                 self.recording_status.config(text="Status: Recording", fg="#ff3333")
             
+        self.frame_timer.stop()
         self.master.after(UPDATE_INTERVAL, self.update_aircraft_position)
 
     def clear_info_display(self):
@@ -731,40 +794,14 @@ class AircraftTrackerApp:
         self.info_display.insert(tk.END, "Waiting for aircraft data...\n")
         
         # Display traffic count if available
-        traffic_count = len(self.udp_receiver.traffic_data)
+        traffic_count = self.udp_receiver.get_frame().traffic_count
         if traffic_count > 0:
-            self.info_display.insert(tk.END, f"Traffic detected: {traffic_count} aircraft")
-
-    def update_traffic_markers(self, traffic_data):
-        """Update the traffic markers on the map."""
-        # Remove markers for traffic that's no longer present
-        for icao in list(self.traffic_markers.keys()):
-            if icao not in traffic_data:
-                self.traffic_markers[icao].delete()
-                del self.traffic_markers[icao]
-        
-        # Update existing markers and add new ones
-        for icao, data in traffic_data.items():
-            rotated_image = self.rotate_traffic_image(data.heading_true)
-            
-            if icao in self.traffic_markers:
-                # Update existing marker
-                self.traffic_markers[icao].delete()
-            
-            # Create new marker
-            altitude_text = f"{int(data.altitude_ft)}'"
-            marker_text = f"{data.callsign} {altitude_text}"
-            
-            self.traffic_markers[icao] = self.map_widget.set_marker(
-                data.latitude, data.longitude,
-                icon=rotated_image,
-                icon_anchor="center",
-                text=marker_text
-            )
+            self.info_display.insert(tk.END, f"Traffic detected: {traffic_count} aircraft\n")
+        self.info_display.insert(tk.END, f"Map update: {self.frame_timer.format()}")
 
     def rotate_traffic_image(self, angle: float) -> ImageTk.PhotoImage:
-        """Rotate the traffic icon image by the given angle."""
-        return ImageTk.PhotoImage(self.traffic_image.rotate(-angle))
+        """Traffic icon rotated to the given angle, shared from the sprite cache."""
+        return self.traffic_sprites.get(angle)
 
     def update_aircraft_marker(self, data: Dict[str, Any]):
         """Update just the aircraft marker with the latest data."""
@@ -779,24 +816,23 @@ class AircraftTrackerApp:
             self.map_center = (gps_data.latitude, gps_data.longitude)
         self.rotated_image = self.rotate_image(attitude_data.true_heading)
 
-        # Update or create the aircraft marker
-        if self.aircraft_marker:
-            self.aircraft_marker.delete()
-            
-        # Create marker with appropriate text
+        # Marker text depends on whether aircraft data is available
         if aircraft_data is not None:
-            self.aircraft_marker = self.map_widget.set_marker(
-                gps_data.latitude, gps_data.longitude,
-                icon=self.rotated_image,
-                icon_anchor="center",
-                text=aircraft_data.FlightNumber + " " + aircraft_data.callsign
-            )
+            marker_text = aircraft_data.FlightNumber + " " + aircraft_data.callsign
+        else:
+            marker_text = "Aerofly FS 4"
+
+        # Move the existing marker in place, or create it the first time
+        if self.aircraft_marker:
+            if self.aircraft_marker.icon is not self.rotated_image:
+                self.aircraft_marker.change_icon(self.rotated_image)
+            move_marker(self.aircraft_marker, gps_data.latitude, gps_data.longitude, marker_text)
         else:
             self.aircraft_marker = self.map_widget.set_marker(
                 gps_data.latitude, gps_data.longitude,
                 icon=self.rotated_image,
                 icon_anchor="center",
-                text="Aerofly FS 4"
+                text=marker_text
             )
         
         # Center map on aircraft if follow mode is enabled
@@ -831,18 +867,25 @@ class AircraftTrackerApp:
         info_text += f"{'True Heading:':<15}{attitude_data.true_heading:>8.2f}°\n"
         info_text += f"{'Pitch:':<15}{attitude_data.pitch:>8.2f}°\n"
         info_text += f"{'Roll:':<15}{attitude_data.roll:>8.2f}°\n"
+        classifier = self.udp_receiver.ground_classifier
+        if classifier is not None:
+            info_text += f"Ground: {describe(classifier.position) if classifier.position else '-'}\n"
         
         # Add traffic count
-        traffic_count = len(data['traffic'])
+        traffic_count = data['traffic_count']
         info_text += "=" * 24 + "\n"
         info_text += f"Traffic Count: {traffic_count}\n"
+        info_text += f"Traffic in view: {self.traffic_markers.stats['visible']}\n"
+        info_text += f"Map update: {self.frame_timer.format()}\n"
+        sprite_stats = self.traffic_sprites.get_stats()
+        info_text += f"Sprites: {sprite_stats['size']} ({sprite_stats['hit_rate']:.0%} hit)\n"
 
         self.info_display.delete(1.0, tk.END)
         self.info_display.insert(tk.END, info_text)
 
     def rotate_image(self, angle: float) -> ImageTk.PhotoImage:
-        """Rotate the aircraft icon image by the given angle."""
-        return ImageTk.PhotoImage(self.aircraft_image.rotate(-angle))
+        """Aircraft icon rotated to the given angle, shared from the sprite cache."""
+        return self.aircraft_sprites.get(angle)
 
     def change_map(self):
         """Change the map tile server based on the user's selection."""
@@ -1,9 +1,14 @@
 # Copyright (c) 2025 Emanuele Bettoni
 # This software is released under the MIT License.
 # https://opensource.org/licenses/MIT
-import time
+import os
 import socket
 import sys
+from itertools import accumulate
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.replay import MAX_RATE, MIN_RATE, ReplayScheduler
 from read_my_csv import extract_gps_from_csv
 
 class GPSData:
@@ -29,13 +34,15 @@ class AircraftData:
     icao24: str # International Civil Aviation Organization's unique four-character identifier for this aircraft
     FlightNumber: str
 
-def send_data(csv_filename, mode="traffic"):
+def send_data(csv_filename, mode="traffic", rate=1.0, max_throughput=False):
     """
     Read GPS data from specified CSV file and send it via UDP
     
     Args:
         csv_filename (str): Path to the CSV file containing GPS data
         mode (str): Mode of operation - 'traffic' or 'gps'
+        rate (float): Playback rate, 0.5 to 50 times the recorded speed
+        max_throughput (bool): Send as fast as possible instead, for load testing
     """
     UDP_IP = "127.0.0.1"
     UDP_PORT = 49002
@@ -47,13 +54,15 @@ def send_data(csv_filename, mode="traffic"):
     print("UDP target port:", UDP_PORT)
     print(f"Reading GPS data from: {csv_filename}")
     print(f"Mode: {mode}")
+    print("Rate: max throughput" if max_throughput else f"Rate: {rate:g}x")
 
-    line_count = 0
     try:
         gps_att_time_data, icao_address, callsign = extract_gps_from_csv(csv_filename)
         
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) # UDP
         
+        # Datagrams are formatted up front so building them costs nothing between deadlines
+        datagrams = []
         for i in gps_att_time_data:
             #gps_att_time_data:
             # 0- longitude,
@@ -67,20 +76,33 @@ def send_data(csv_filename, mode="traffic"):
             # 8- time_delta])
             
             if mode.lower() == "traffic":
-                #print(icao_address)
                 # XTRAFFIC<simulator_name>,<icao_address>,<latitude>,<longitude>,<altitude_ft>,<vertical_speed_ft/min>,<airborne_flag>,<heading_true>,<velocity_knots>,<callsign>
                 message = f"XTRAFFIC{simulator_name},{icao_address},{i[1]},{i[0]},{i[2]},0.0,{airborne_flag},{i[5]},{i[4]},{callsign}"
-                sock.sendto(bytes(message, "utf-8"), (UDP_IP, UDP_PORT))
+                datagrams.append((bytes(message, "utf-8"),))
             else:  # GPS mode
                 # XGPS<simulator_name>,<longitude>,<latitude>,<altitude_msl>,<track_true_north>,<groundspeed_m/s>
                 message = f"XGPS{simulator_name},{i[0]},{i[1]},{i[2]},{i[3]},{i[4]}"
                 message2 = f"XATT{simulator_name},{i[5]},{i[6]},{i[7]}"
-                sock.sendto(bytes(message, "utf-8"), (UDP_IP, UDP_PORT))
-                sock.sendto(bytes(message2, "utf-8"), (UDP_IP, UDP_PORT))
-            #sock.sendto(bytes(message, "utf-8"), (UDP_IP, UDP_PORT))
-            line_count = line_count + 1
-            print(line_count, message, i[8])
-            time.sleep(float(i[8]))
+                datagrams.append((bytes(message, "utf-8"), bytes(message2, "utf-8")))
+        # Each row's time_delta is the gap since the previous row; the schedule needs offsets from the start
+        times = list(accumulate(float(i[8]) for i in gps_att_time_data))
+        address = (UDP_IP, UDP_PORT)
+
+        def send(number):
+            for datagram in datagrams[number]:
+                sock.sendto(datagram, address)
+
+        def progress(number):
+            print(f"{number + 1}/{len(datagrams)} {datagrams[number][0].decode('utf-8')}")
+
+        scheduler = ReplayScheduler(times, send, rate, max_throughput, progress=progress)
+        try:
+            stats = scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            stats = scheduler.stats
+            print("Stopped")
+        print(stats.report())
         
         print(f"Finished sending all data points from {csv_filename}")
             
@@ -94,9 +116,10 @@ def send_data(csv_filename, mode="traffic"):
 def main():
     # Check if filename was provided as command line argument
     if len(sys.argv) < 2:
-        print("Usage: python send_GPS_data.py <csv_filename> [mode]")
+        print("Usage: python send_GPS_data.py <csv_filename> [mode] [rate]")
         print("       mode: 'traffic' (default) or 'gps'")
-        print("Example: python send_GPS_data.py output_GPS_DATA.csv gps")
+        print(f"       rate: playback rate {MIN_RATE:g} to {MAX_RATE:g} (default 1), or 'max' to send as fast as possible")
+        print("Example: python send_GPS_data.py output_GPS_DATA.csv gps 10")
         sys.exit(1)
     
     # Get the filename from command line argument
@@ -110,8 +133,22 @@ def main():
             print("Invalid mode. Use 'traffic' or 'gps'.")
             sys.exit(1)
     
+    rate = 1.0
+    max_throughput = False
+    if len(sys.argv) > 3:
+        if sys.argv[3].lower() == "max":
+            max_throughput = True
+        else:
+            try:
+                rate = float(sys.argv[3].rstrip("xX"))
+            except ValueError:
+                rate = 0.0
+            if not MIN_RATE <= rate <= MAX_RATE:
+                print(f"Invalid rate. Use a number from {MIN_RATE:g} to {MAX_RATE:g} or 'max'.")
+                sys.exit(1)
+    
     # Process and send the data
-    send_data(csv_filename, mode)
+    send_data(csv_filename, mode, rate, max_throughput)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
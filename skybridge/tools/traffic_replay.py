@@ -0,0 +1,107 @@
+"""
+Replay recorded flights as many XTRAFFIC targets at once, for load testing.
+
+Each input (a .skyrec recording, or a CSV log of the old recorder) is
+flown by --copies targets, copy k starting k * --time-shift seconds later
+and moved --spread meters along a grid, each with its own ICAO address
+and callsign. All targets are merged into one time-ordered stream sent
+over a single UDP socket, so thousands of concurrent targets exercise
+Rewinger's receiver, traffic store and map the same way every run.
+
+Usage:
+    python traffic_replay.py <recording.skyrec|log.csv> [...] [--copies=N] [--time-shift=S] [--spread=M]
+                             [--rate=R|--rate=max] [--host=127.0.0.1] [--port=49002] [--simulator=NAME]
+"""
+import os
+import socket
+import struct
+import sys
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.replay import MAX_RATE, MIN_RATE
+from core.traffic_replay import TrafficReplay, TrafficTrack, fleet
+from data.flight_recorder import CHANNELS
+from data.flight_recording import FlightRecording
+from data.udp_parser import DEFAULT_SIMULATOR_NAME, GPS
+from tools.convert_csv_recordings import parse_legacy_csv
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 49002
+
+
+def load_track(path: str) -> TrafficTrack:
+    """Ownship GPS samples of a recording directory or a CSV log of the old recorder."""
+    if os.path.isdir(path):
+        with FlightRecording(path) as recording:
+            if GPS not in recording:
+                return TrafficTrack([])
+            return TrafficTrack(recording[GPS].iter_records())
+    with open(path, 'rb') as f:
+        log = parse_legacy_csv(f.read())
+    return TrafficTrack(struct.iter_unpack(CHANNELS[GPS].format, b''.join(log.gps)))
+
+
+def main():
+    options = {'copies': '1', 'time-shift': '0', 'spread': '0', 'rate': '1', 'host': DEFAULT_HOST,
+               'port': str(DEFAULT_PORT), 'simulator': DEFAULT_SIMULATOR_NAME}
+    paths: List[str] = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--') and '=' in arg:
+            key, value = arg[2:].split('=', 1)
+            if key not in options:
+                print(f"Unknown option --{key}")
+                sys.exit(1)
+            options[key] = value
+        else:
+            paths.append(arg)
+    if not paths:
+        print(__doc__.split("Usage:")[1].strip())
+        sys.exit(1)
+
+    max_throughput = options['rate'].lower() == 'max'
+    try:
+        copies = int(options['copies'])
+        time_shift = float(options['time-shift'])
+        spread = float(options['spread'])
+        address = (options['host'], int(options['port']))
+        rate = 1.0 if max_throughput else float(options['rate'].rstrip('xX'))
+    except ValueError as e:
+        print(f"Invalid option: {e}")
+        sys.exit(1)
+    if copies < 1 or not MIN_RATE <= rate <= MAX_RATE:
+        print(f"--copies must be at least 1 and --rate from {MIN_RATE:g} to {MAX_RATE:g} or 'max'")
+        sys.exit(1)
+
+    tracks = []
+    for path in paths:
+        try:
+            track = load_track(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}")
+            sys.exit(1)
+        print(f"{path}: {len(track)} samples over {track.duration:.0f} s")
+        tracks.append(track)
+
+    replay = TrafficReplay(fleet(tracks, copies, time_shift, spread), options['simulator'])
+    print(f"Replaying {len(replay.targets)} targets, {replay.messages} messages over {replay.duration:.0f} s to "
+          f"{address[0]}:{address[1]}" + (" at max throughput" if max_throughput else f" at {rate:g}x"))
+
+    def progress(number):
+        print(f"{number + 1}/{replay.messages} messages sent")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        stats = replay.run(sock, address, rate, max_throughput, progress=progress, progress_interval=5.0)
+    except KeyboardInterrupt:
+        replay.stop()
+        stats = replay.scheduler.stats
+        print("Stopped")
+    finally:
+        sock.close()
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
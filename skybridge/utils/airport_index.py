@@ -0,0 +1,234 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.geo_utils import LocalProjection
+from utils.spatial_index import GridIndex
+
+# Feature kinds
+RUNWAY = 'runway'
+TAXIWAY = 'taxiway'
+PARKING = 'parking'
+HOLDING = 'holding'
+KINDS = (RUNWAY, TAXIWAY, PARKING, HOLDING)
+
+# Size of the detection area around each feature
+RUNWAY_WIDTH_FACTOR = 0.5  # fraction of the runway width either side of the centre line
+TAXIWAY_WIDTH_FACTOR = 0.5  # fraction of the taxiway width either side of the centre line
+TAXIWAY_MARGIN = 0.0  # meters added beyond that
+PARKING_RADIUS = 5.0  # meters
+HOLDING_RADIUS = 10.0  # meters
+
+DEFAULT_RUNWAY_WIDTH = 45.0  # meters, as assumed by the OSM extractor
+DEFAULT_TAXIWAY_WIDTH = 30.0  # meters
+
+INDEX_CELL = 50.0  # meters
+# Nearest-feature searches give up beyond this distance unless told otherwise
+NEAREST_MAX_DISTANCE = 2000.0  # meters
+
+
+class AirportFeature:
+    """
+    One runway, taxiway segment, parking position or holding point, in
+    local metres (x east, y north) around the airport reference point.
+
+    Every feature is a centre line from (x0, y0) to (x1, y1) (a point has
+    both ends equal) plus a detection radius around it. Runways are
+    rectangles: their area ends at the thresholds instead of rounding off.
+    """
+    __slots__ = ('kind', 'name', 'data', 'x0', 'y0', 'x1', 'y1', 'radius',
+                 '_dx', '_dy', '_length_sq')
+
+    def __init__(self, kind: str, name: str, data: Dict[str, Any],
+                 x0: float, y0: float, x1: float, y1: float, radius: float):
+        self.kind = kind
+        self.name = name
+        self.data = data  # the layout entry the feature came from
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.radius = radius
+        self._dx = x1 - x0
+        self._dy = y1 - y0
+        self._length_sq = self._dx * self._dx + self._dy * self._dy
+
+    def __repr__(self) -> str:
+        return f"AirportFeature({self.kind!r}, {self.name!r})"
+
+    def along(self, x: float, y: float) -> float:
+        """Position of the foot of (x, y) along the centre line, 0 at the start and 1 at the end."""
+        if self._length_sq == 0:
+            return 0.0
+        return ((x - self.x0) * self._dx + (y - self.y0) * self._dy) / self._length_sq
+
+    def distance(self, x: float, y: float) -> float:
+        """Distance in metres from (x, y) to the centre line."""
+        t = min(1.0, max(0.0, self.along(x, y)))
+        return math.hypot(x - (self.x0 + t * self._dx), y - (self.y0 + t * self._dy))
+
+    def contains(self, x: float, y: float, margin: float = 0.0) -> bool:
+        """True if (x, y) is inside the detection area grown by margin metres."""
+        if self.kind == RUNWAY:
+            along = self.along(x, y)
+            slack = margin / math.sqrt(self._length_sq) if self._length_sq else 0.0
+            if not -slack <= along <= 1.0 + slack:
+                return False
+        return self.distance(x, y) <= self.radius + margin
+
+
+class AirportIndex:
+    """
+    Grid index over the features of one airport layout (the JSON written by
+    OSMAirportExtractor), for position-to-feature questions such as "which
+    taxiway segment am I on" or "nearest parking position".
+
+    The layout is projected once onto the tangent plane at its centre
+    (to_local, a LocalProjection), so every feature keeps its local
+    coordinates and each query projects only the query position. Each
+    kind of feature has its own grid, so a query only tests the features of
+    the kind asked for that lie near the position; query cost stays flat as
+    the number of taxiway segments grows.
+    """
+
+    def __init__(self, layout: Dict[str, Any],
+                 runway_width_factor: float = RUNWAY_WIDTH_FACTOR,
+                 taxiway_width_factor: float = TAXIWAY_WIDTH_FACTOR,
+                 taxiway_margin: float = TAXIWAY_MARGIN,
+                 parking_radius: float = PARKING_RADIUS,
+                 holding_radius: float = HOLDING_RADIUS,
+                 cell_size: float = INDEX_CELL):
+        self.name = layout.get('name', '')
+        self.icao = layout.get('icao', '')
+        self.cell_size = cell_size
+        self.features: List[AirportFeature] = []
+        self._grids: Dict[str, GridIndex] = {kind: GridIndex(cell_size) for kind in KINDS}
+
+        self.ref_lat, self.ref_lon = self._reference_point(layout)
+        self.projection = LocalProjection(self.ref_lat, self.ref_lon)
+
+        for runway in layout.get('runways', []):
+            width = float(runway.get('width') or DEFAULT_RUNWAY_WIDTH)
+            self._add(RUNWAY, runway.get('name', ''), runway,
+                      runway['threshold1_coords'], runway['threshold2_coords'],
+                      width * runway_width_factor)
+        for taxiway in layout.get('taxiways', []):
+            for segment in taxiway.get('segments', []):
+                width = float(segment.get('width') or DEFAULT_TAXIWAY_WIDTH)
+                self._add(TAXIWAY, taxiway.get('name', ''), segment,
+                          segment['start'], segment['end'], width * taxiway_width_factor + taxiway_margin)
+        for parking in layout.get('parking_positions', []):
+            self._add(PARKING, parking.get('name', ''), parking,
+                      parking['coords'], parking['coords'], parking_radius)
+        for holding in layout.get('holding_points', []):
+            self._add(HOLDING, holding.get('name', ''), holding,
+                      holding['coords'], holding['coords'], holding_radius)
+
+    @staticmethod
+    def _reference_point(layout: Dict[str, Any]) -> Tuple[float, float]:
+        """Centre of the layout's bounding box."""
+        coords = []
+        for runway in layout.get('runways', []):
+            coords.extend((runway['threshold1_coords'], runway['threshold2_coords']))
+        for taxiway in layout.get('taxiways', []):
+            for segment in taxiway.get('segments', []):
+                coords.extend((segment['start'], segment['end']))
+        for key in ('parking_positions', 'holding_points'):
+            coords.extend(item['coords'] for item in layout.get(key, []))
+        if not coords:
+            return 0.0, 0.0
+        lats = [coord[0] for coord in coords]
+        lons = [coord[1] for coord in coords]
+        return (min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2
+
+    def to_local(self, lat: float, lon: float) -> Tuple[float, float]:
+        """(x east, y north) in metres from the reference point."""
+        return self.projection.to_local(lat, lon)
+
+    def _add(self, kind: str, name: str, data: Dict[str, Any],
+             start: Iterable[float], end: Iterable[float], radius: float) -> None:
+        x0, y0 = self.to_local(*start)
+        x1, y1 = self.to_local(*end)
+        feature = AirportFeature(kind, name, data, x0, y0, x1, y1, radius)
+        number = len(self.features)
+        self.features.append(feature)
+
+        # Long features (runways) are filed as pieces about a cell long, so
+        # a diagonal runway does not fill every cell of its bounding box
+        grid = self._grids[kind]
+        pieces = max(1, int(math.hypot(x1 - x0, y1 - y0) // self.cell_size))
+        for piece in range(pieces):
+            ax, ay = x0 + (x1 - x0) * piece / pieces, y0 + (y1 - y0) * piece / pieces
+            bx, by = x0 + (x1 - x0) * (piece + 1) / pieces, y0 + (y1 - y0) * (piece + 1) / pieces
+            grid.insert((number, piece),
+                        min(ax, bx) - radius, min(ay, by) - radius,
+                        max(ax, bx) + radius, max(ay, by) + radius)
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for feature in self.features if feature.kind == kind)
+
+    def _kinds(self, kind: Optional[str]) -> Tuple[str, ...]:
+        if kind is None:
+            return KINDS
+        if kind not in self._grids:
+            raise ValueError(f"Unknown feature kind: {kind}")
+        return (kind,)
+
+    def containing(self, lat: float, lon: float, kind: Optional[str] = None) -> List[AirportFeature]:
+        """Features whose detection area contains the position, nearest centre line first."""
+        x, y = self.to_local(lat, lon)
+        found: Set[int] = set()
+        for grid_kind in self._kinds(kind):
+            for number, _ in self._grids[grid_kind].query(x, y, x, y):
+                found.add(number)
+        features = [self.features[number] for number in found]
+        return sorted((feature for feature in features if feature.contains(x, y)),
+                      key=lambda feature: feature.distance(x, y))
+
+    def nearest(self, lat: float, lon: float, kind: Optional[str] = None,
+                max_distance: float = NEAREST_MAX_DISTANCE) -> Optional[Tuple[AirportFeature, float]]:
+        """(feature, distance in metres to its centre line) of the nearest feature, or None."""
+        x, y = self.to_local(lat, lon)
+        size = self.cell_size
+        rings = int(math.ceil(max_distance / size)) + 1
+        best: Optional[AirportFeature] = None
+        best_distance = max_distance
+        for grid_kind in self._kinds(kind):
+            grid = self._grids[grid_kind]
+            if not len(grid):
+                continue
+            seen: Set[int] = set()
+            current_ring = 0
+            for ring, members in grid.cells_around(x, y, rings):
+                if ring != current_ring:
+                    # Everything not yet seen is more than (ring - 1) cells away
+                    if best is not None and best_distance <= (ring - 1) * size:
+                        break
+                    current_ring = ring
+                for number, _ in members:
+                    if number in seen:
+                        continue
+                    seen.add(number)
+                    feature = self.features[number]
+                    distance = feature.distance(x, y)
+                    if distance <= best_distance:
+                        best, best_distance = feature, distance
+        if best is None:
+            return None
+        return best, best_distance
+
+    def within(self, lat: float, lon: float, radius: float,
+               kind: Optional[str] = None) -> List[Tuple[AirportFeature, float]]:
+        """(feature, distance) of every feature whose centre line is within radius metres, nearest first."""
+        x, y = self.to_local(lat, lon)
+        found: Set[int] = set()
+        for grid_kind in self._kinds(kind):
+            for number, _ in self._grids[grid_kind].query(x - radius, y - radius, x + radius, y + radius):
+                found.add(number)
+        results = []
+        for number in found:
+            feature = self.features[number]
+            distance = feature.distance(x, y)
+            if distance <= radius:
+                results.append((feature, distance))
+        results.sort(key=lambda result: result[1])
+        return results
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import time
+
+# os.replace fails on Windows while another process has the target open without
+# FILE_SHARE_DELETE; readers only hold it for a moment, so retry briefly
+REPLACE_RETRIES = 5
+REPLACE_RETRY_DELAY = 0.01  # seconds
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Replace the contents of path with data so that readers see either the old
+    or the new file, never a partially written one.
+
+    The data is written to a temporary file in the same directory and moved
+    over path with os.replace.
+
+    Raises:
+        OSError: if the file could not be written or replaced
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp_path, path)
+                return
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -1,9 +1,21 @@
 import math
-from typing import Tuple
+from typing import Iterable, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the batched kernels below need numpy; the scalar functions do not
+    np = None
 
 # Earth's radius in meters
 EARTH_RADIUS = 6371000
 
+DEG_TO_RAD = math.pi / 180.0
+RAD_TO_DEG = 180.0 / math.pi
+
+# WGS84 ellipsoid, for LocalProjection
+WGS84_A = 6378137.0  # semi-major axis in meters
+WGS84_E2 = 6.69437999014e-3  # first eccentricity squared
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the distance between two points using the Haversine formula.
@@ -15,16 +27,14 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     Returns:
         Distance in meters
     """
-    # Convert to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    
+    lat1 *= DEG_TO_RAD
+    lat2 *= DEG_TO_RAD
+
     # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    return EARTH_RADIUS * c
+    sin_dlat = math.sin((lat2 - lat1) / 2)
+    sin_dlon = math.sin((lon2 - lon1) * DEG_TO_RAD / 2)
+    a = sin_dlat * sin_dlat + math.cos(lat1) * math.cos(lat2) * sin_dlon * sin_dlon
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
 
 def calculate_heading(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -37,11 +47,9 @@ def calculate_heading(lat1: float, lon1: float, lat2: float, lon2: float) -> flo
     Returns:
         Heading in degrees from 0 to 360
     """
-    # Convert to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    
-    # Calculate differences
-    dlon = lon2 - lon1
+    lat1 *= DEG_TO_RAD
+    lat2 *= DEG_TO_RAD
+    dlon = (lon2 - lon1) * DEG_TO_RAD
     
     # Calculate heading using the formula
     y = math.sin(dlon) * math.cos(lat2)
@@ -66,10 +74,13 @@ def lat_lon_to_meters(lat: float, lon: float) -> Tuple[float, float]:
         
     Returns:
         Tuple of (x, y) coordinates in meters relative to the reference point
+
+    Note: x and y are the Earth-centred coordinates of the point in the
+    equatorial plane, not a local map plane; use LocalProjection to measure
+    distances and shapes on an airport.
     """
-    # Convert to radians
-    lat_rad = math.radians(lat)
-    lon_rad = math.radians(lon)
+    lat_rad = lat * DEG_TO_RAD
+    lon_rad = lon * DEG_TO_RAD
     
     # Calculate x and y in meters
     x = EARTH_RADIUS * math.cos(lat_rad) * math.cos(lon_rad)
@@ -91,34 +102,196 @@ def distance_to_segment(position: Tuple[float, float],
     Returns:
         Perpendicular distance in meters
     """
-    # Convert all coordinates to meters
-    pos_meters = lat_lon_to_meters(position[0], position[1])
-    start_meters = lat_lon_to_meters(segment_start[0], segment_start[1])
-    end_meters = lat_lon_to_meters(segment_end[0], segment_end[1])
-    
-    # Calculate segment vector
-    segment_vector = (end_meters[0] - start_meters[0], 
-                     end_meters[1] - start_meters[1])
-    
-    # Calculate vector from start to position
-    position_vector = (pos_meters[0] - start_meters[0],
-                      pos_meters[1] - start_meters[1])
-    
-    # Calculate projection parameter
-    segment_length_squared = segment_vector[0]**2 + segment_vector[1]**2
+    # Project the segment onto the tangent plane at the position
+    projection = LocalProjection(position[0], position[1])
+    ax, ay = projection.to_local(segment_start[0], segment_start[1])
+    bx, by = projection.to_local(segment_end[0], segment_end[1])
+    return _segment_distance(0.0, 0.0, ax, ay, bx, by)
+
+def _segment_distance(px: float, py: float, ax: float, ay: float, bx: float, by: float) -> float:
+    """Distance from (px, py) to the segment (ax, ay)-(bx, by), all in meters."""
+    # Segment vector and vector from start to position
+    dx = bx - ax
+    dy = by - ay
+    segment_length_squared = dx * dx + dy * dy
     if segment_length_squared == 0:
         return float('inf')
-        
-    projection = (position_vector[0] * segment_vector[0] + 
-                 position_vector[1] * segment_vector[1]) / segment_length_squared
-    
-    # Clamp projection to segment
-    projection = max(0, min(1, projection))
-    
-    # Calculate projected point
-    projected_point = (start_meters[0] + projection * segment_vector[0],
-                      start_meters[1] + projection * segment_vector[1])
-    
-    # Calculate distance to projected point
-    return ((pos_meters[0] - projected_point[0])**2 + 
-            (pos_meters[1] - projected_point[1])**2)**0.5 
\ No newline at end of file
+
+    # Projection parameter, clamped to the segment
+    projection = ((px - ax) * dx + (py - ay) * dy) / segment_length_squared
+    projection = max(0.0, min(1.0, projection))
+
+    # Distance to the projected point
+    return math.hypot(px - (ax + projection * dx), py - (ay + projection * dy))
+
+
+class LocalProjection:
+    """
+    East/north tangent plane (ENU without the up axis) on the WGS84
+    ellipsoid, touching the Earth at a reference point.
+
+    Points are converted through Earth-centred coordinates, so distances
+    and angles in the plane match the ground to well under a centimetre
+    across an airport. The reference point's trigonometry is computed once;
+    projecting a point costs four sin/cos calls, and everything measured
+    between projected points afterwards (point-to-segment distances, areas,
+    headings) is plain arithmetic. Project an airport's features once and
+    each query position once, then compare in the plane.
+    """
+    __slots__ = ('ref_lat', 'ref_lon', '_sin_lat0', '_cos_lat0', '_x0', '_z0')
+
+    def __init__(self, ref_lat: float, ref_lon: float):
+        self.ref_lat = ref_lat
+        self.ref_lon = ref_lon
+        lat0 = ref_lat * DEG_TO_RAD
+        self._sin_lat0 = math.sin(lat0)
+        self._cos_lat0 = math.cos(lat0)
+        # Reference point in Earth-centred coordinates, rotated so its longitude is 0
+        n0 = WGS84_A / math.sqrt(1.0 - WGS84_E2 * self._sin_lat0 * self._sin_lat0)
+        self._x0 = n0 * self._cos_lat0
+        self._z0 = n0 * (1.0 - WGS84_E2) * self._sin_lat0
+
+    def __repr__(self) -> str:
+        return f"LocalProjection({self.ref_lat!r}, {self.ref_lon!r})"
+
+    def to_local(self, lat: float, lon: float) -> Tuple[float, float]:
+        """(x east, y north) in meters from the reference point."""
+        lat *= DEG_TO_RAD
+        dlon = (lon - self.ref_lon) * DEG_TO_RAD
+        sin_lat = math.sin(lat)
+        n = WGS84_A / math.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+        radius = n * math.cos(lat)
+        x = radius * math.cos(dlon) - self._x0
+        z = n * (1.0 - WGS84_E2) * sin_lat - self._z0
+        return radius * math.sin(dlon), self._cos_lat0 * z - self._sin_lat0 * x
+
+    def to_local_many(self, lats: Sequence[float], lons: Sequence[float]):
+        """to_local over arrays: (x, y) NumPy arrays in meters."""
+        _require_numpy()
+        lat = np.asarray(lats, dtype=np.float64) * DEG_TO_RAD
+        dlon = (np.asarray(lons, dtype=np.float64) - self.ref_lon) * DEG_TO_RAD
+        sin_lat = np.sin(lat)
+        n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+        radius = n * np.cos(lat)
+        x = radius * np.cos(dlon) - self._x0
+        z = n * (1.0 - WGS84_E2) * sin_lat - self._z0
+        return radius * np.sin(dlon), self._cos_lat0 * z - self._sin_lat0 * x
+
+    def distance_to_segment(self, position: Tuple[float, float],
+                            start: Tuple[float, float], end: Tuple[float, float]) -> float:
+        """
+        Distance in meters from position to the segment start-end, all three
+        already projected with to_local; inf for a zero-length segment, as
+        the module-level distance_to_segment.
+        """
+        return _segment_distance(position[0], position[1], start[0], start[1], end[0], end[1])
+
+
+# Batched kernels
+#
+# The functions below take many points at once as NumPy arrays and do the
+# degree-to-radian (or degree-to-meter) conversion once, up front, in
+# PointArray and SegmentArray. They agree with the scalar functions above
+# for every element (to a millimetre for segments, which are measured on
+# one shared tangent plane instead of one per position), at a small fraction of the per-point
+# cost once there are more than a handful of points. Each formula is written
+# twice, so scripts/bench_geo_kernels.py checks that both sides agree on
+# random inputs from the whole globe; run it after changing either.
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy is required for the batched geo_utils functions")
+
+
+class PointArray:
+    """
+    N points converted once for the batched kernels: latitude and longitude
+    in radians plus the cosine of each latitude.
+    """
+    __slots__ = ('lat', 'lon', 'cos_lat')
+
+    def __init__(self, lats: Sequence[float], lons: Sequence[float]):
+        _require_numpy()
+        self.lat = np.asarray(lats, dtype=np.float64) * DEG_TO_RAD
+        self.lon = np.asarray(lons, dtype=np.float64) * DEG_TO_RAD
+        if self.lat.shape != self.lon.shape:
+            raise ValueError("lats and lons must have the same shape")
+        self.cos_lat = np.cos(self.lat)
+
+    @classmethod
+    def from_coords(cls, coords: Iterable[Sequence[float]]) -> 'PointArray':
+        """From (lat, lon) pairs in degrees."""
+        _require_numpy()
+        array = np.asarray(list(coords), dtype=np.float64).reshape(-1, 2)
+        return cls(array[:, 0], array[:, 1])
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+
+class SegmentArray:
+    """
+    N segments with their endpoints projected once onto a LocalProjection,
+    by default one centred on the first segment's start.
+    """
+    __slots__ = ('projection', 'ax', 'ay', 'dx', 'dy', 'length_sq')
+
+    def __init__(self, starts: Iterable[Sequence[float]], ends: Iterable[Sequence[float]],
+                 projection: Optional[LocalProjection] = None):
+        _require_numpy()
+        start = np.asarray(list(starts), dtype=np.float64).reshape(-1, 2)
+        end = np.asarray(list(ends), dtype=np.float64).reshape(-1, 2)
+        if start.shape != end.shape:
+            raise ValueError("starts and ends must have the same length")
+        if projection is None:
+            projection = LocalProjection(*start[0]) if len(start) else LocalProjection(0.0, 0.0)
+        self.projection = projection
+        self.ax, self.ay = projection.to_local_many(start[:, 0], start[:, 1])
+        bx, by = projection.to_local_many(end[:, 0], end[:, 1])
+        self.dx = bx - self.ax
+        self.dy = by - self.ay
+        self.length_sq = self.dx * self.dx + self.dy * self.dy
+
+    def __len__(self) -> int:
+        return len(self.ax)
+
+
+def haversine_distances(lat: float, lon: float, points: PointArray):
+    """Distances in meters from one point (degrees) to each of N points."""
+    lat *= DEG_TO_RAD
+    sin_dlat = np.sin((points.lat - lat) / 2)
+    sin_dlon = np.sin((points.lon - lon * DEG_TO_RAD) / 2)
+    a = sin_dlat * sin_dlat + math.cos(lat) * points.cos_lat * sin_dlon * sin_dlon
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def calculate_headings(lat: float, lon: float, points: PointArray):
+    """Headings in degrees (0 to 360) from one point (degrees) to each of N points."""
+    lat *= DEG_TO_RAD
+    dlon = points.lon - lon * DEG_TO_RAD
+    y = np.sin(dlon) * points.cos_lat
+    x = math.cos(lat) * np.sin(points.lat) - math.sin(lat) * points.cos_lat * np.cos(dlon)
+    return (np.arctan2(y, x) * RAD_TO_DEG + 360) % 360
+
+
+def haversine_matrix(first: PointArray, second: PointArray):
+    """N x M matrix of distances in meters between every point of first and every point of second."""
+    sin_dlat = np.sin((second.lat[np.newaxis, :] - first.lat[:, np.newaxis]) / 2)
+    sin_dlon = np.sin((second.lon[np.newaxis, :] - first.lon[:, np.newaxis]) / 2)
+    a = sin_dlat * sin_dlat + np.outer(first.cos_lat, second.cos_lat) * sin_dlon * sin_dlon
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distances_to_segments(position: Tuple[float, float], segments: SegmentArray):
+    """
+    Distances in meters from one point (latitude, longitude) to each of N
+    segments; inf for zero-length segments, as distance_to_segment.
+    """
+    px, py = segments.projection.to_local(position[0], position[1])
+    rx = px - segments.ax
+    ry = py - segments.ay
+    with np.errstate(divide='ignore', invalid='ignore'):
+        projection = np.clip((rx * segments.dx + ry * segments.dy) / segments.length_sq, 0.0, 1.0)
+    distances = np.hypot(rx - projection * segments.dx, ry - projection * segments.dy)
+    distances[segments.length_sq == 0] = np.inf
+    return distances 
\ No newline at end of file
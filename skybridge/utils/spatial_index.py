@@ -0,0 +1,164 @@
+import math
+from typing import Dict, Hashable, Iterator, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+Box = Tuple[float, float, float, float]  # min_x, min_y, max_x, max_y
+
+
+class GridIndex:
+    """
+    Uniform grid over axis-aligned boxes, for "what is near here" queries.
+
+    Items are boxes (a point is a box of zero size) filed in every cell of
+    size cell_size they overlap. A query only looks at the cells its box
+    covers, so its cost follows the number of items nearby instead of the
+    total. The coordinates are whatever the caller uses consistently:
+    longitude/latitude degrees, or metres in a local projection.
+
+    Items can be moved cheaply, which suits moving targets: an item whose
+    cells do not change is updated without touching the grid.
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Set[Hashable]] = {}
+        self._boxes: Dict[Hashable, Box] = {}
+        self._spans: Dict[Hashable, Tuple[int, int, int, int]] = {}
+        # Cells every occupied cell lies within; only grows until the grid is emptied
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._boxes
+
+    def _span(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (math.floor(min_x / size), math.floor(min_y / size),
+                math.floor(max_x / size), math.floor(max_y / size))
+
+    def insert(self, key: Hashable, min_x: float, min_y: float,
+               max_x: Optional[float] = None, max_y: Optional[float] = None) -> None:
+        """Add or move an item; leave max_x/max_y out for a point."""
+        if max_x is None:
+            max_x = min_x
+        if max_y is None:
+            max_y = min_y
+        span = self._span(min_x, min_y, max_x, max_y)
+        old_span = self._spans.get(key)
+        self._boxes[key] = (min_x, min_y, max_x, max_y)
+        if span == old_span:
+            return
+        if old_span is not None:
+            self._unfile(key, old_span)
+        self._spans[key] = span
+        cells = self._cells
+        x0, y0, x1, y1 = span
+        if self._extent is None:
+            self._extent = span
+        else:
+            ex0, ey0, ex1, ey1 = self._extent
+            self._extent = (min(ex0, x0), min(ey0, y0), max(ex1, x1), max(ey1, y1))
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                members = cells.get((cx, cy))
+                if members is None:
+                    cells[(cx, cy)] = {key}
+                else:
+                    members.add(key)
+
+    def _unfile(self, key: Hashable, span: Tuple[int, int, int, int]) -> None:
+        cells = self._cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                members = cells.get((cx, cy))
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del cells[(cx, cy)]
+        if not cells:
+            self._extent = None
+
+    def remove(self, key: Hashable) -> bool:
+        """Remove an item; return False if it was not indexed."""
+        span = self._spans.pop(key, None)
+        if span is None:
+            return False
+        del self._boxes[key]
+        self._unfile(key, span)
+        return True
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._boxes.clear()
+        self._spans.clear()
+        self._extent = None
+
+    def box(self, key: Hashable) -> Box:
+        return self._boxes[key]
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Set[Hashable]:
+        """Keys of all items whose box overlaps the query box."""
+        x0, y0, x1, y1 = self._span(min_x, min_y, max_x, max_y)
+        cells = self._cells
+        boxes = self._boxes
+        found: Set[Hashable] = set()
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+            # Query larger than the populated area: walk the occupied cells instead
+            candidates = (cell for cell in cells.items()
+                          if x0 <= cell[0][0] <= x1 and y0 <= cell[0][1] <= y1)
+        else:
+            candidates = (((cx, cy), cells[(cx, cy)])
+                          for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1) if (cx, cy) in cells)
+        for _, members in candidates:
+            for key in members:
+                if key in found:
+                    continue
+                bx0, by0, bx1, by1 = boxes[key]
+                if bx0 <= max_x and bx1 >= min_x and by0 <= max_y and by1 >= min_y:
+                    found.add(key)
+        return found
+
+    def cells_around(self, x: float, y: float, rings: int) -> Iterator[Tuple[int, Set[Hashable]]]:
+        """
+        (ring, members) of the occupied cells within rings cells of (x, y),
+        nearest ring first. Items not seen by the end of ring r lie more than
+        r * cell_size away from (x, y).
+
+        Rings outside the occupied cells are not visited, and once a ring
+        has more cells than the grid has occupied, the occupied cells are
+        walked directly instead, so a search from far away or over a sparse
+        grid does not step through empty rings.
+        """
+        cells = self._cells
+        if not cells:
+            return
+        size = self.cell_size
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        x0, y0, x1, y1 = self._extent
+        # Rings nearer than the occupied cells start, or past where they end, are empty
+        first = max(x0 - cx, cx - x1, y0 - cy, cy - y1, 0)
+        rings = min(rings, max(cx - x0, x1 - cx, cy - y0, y1 - cy))
+        if first > rings:
+            return
+        members = cells.get((cx, cy))
+        if members:
+            yield 0, members
+        for ring in range(max(first, 1), rings + 1):
+            if 8 * ring > len(cells):
+                remaining = sorted((max(abs(kx - cx), abs(ky - cy)), kx, ky) for kx, ky in cells)
+                for cell_ring, kx, ky in remaining:
+                    if cell_ring > rings:
+                        break
+                    if cell_ring >= ring:
+                        yield cell_ring, cells[(kx, ky)]
+                return
+            for dx in range(-ring, ring + 1):
+                for dy in (-ring, ring) if abs(dx) != ring else range(-ring, ring + 1):
+                    members = cells.get((cx + dx, cy + dy))
+                    if members:
+                        yield ring, members